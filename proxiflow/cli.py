@@ -1,8 +1,52 @@
 import click
+import logging
+import os
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .config import Config
-from .utils import get_logger, load_data, write_data
-from .core import Cleaner, Normalizer, Engineer
+from .utils import (
+    MemoryGovernor,
+    RunProfiler,
+    count_rows,
+    get_logger,
+    iter_data,
+    load_data,
+    row_footprint,
+    write_chunks,
+    write_data,
+)
+from .utils.memory import format_size
+from .core import (
+    STAGES,
+    Checkpoint,
+    Coordinator,
+    ExecutionPlan,
+    IncrementalState,
+    Profiler,
+    Sampler,
+    Selector,
+    Splitter,
+    Stage,
+    Sweep,
+    Validator,
+    build_plan,
+    build_stages,
+    expand_grid,
+    fit_on_sample,
+    named_stages,
+    parse_address,
+    partition_path,
+    run_fingerprint,
+    run_worker,
+)
+from .core.distributed import ACCEPT_TIMEOUT
+
+# Rows read to estimate the memory footprint of a row
+SCHEMA_SAMPLE_ROWS = 1000
 
 
 @click.group(invoke_without_command=True, no_args_is_help=True)
@@ -27,55 +71,1127 @@ from .core import Cleaner, Normalizer, Engineer
     type=click.Path(exists=False),
     help="Path to output data file",
 )
+@click.option(
+    "--state-file",
+    "-s",
+    required=False,
+    type=click.Path(exists=False),
+    help="Path to incremental state file. Only rows appended since the last run are processed",
+)
+@click.option(
+    "--max-memory",
+    "-m",
+    required=False,
+    type=str,
+    help="Memory budget, e.g. 4GB. Larger inputs are streamed in chunks (overrides execution.max_memory)",
+)
+@click.option(
+    "--checkpoint-dir",
+    required=False,
+    type=click.Path(file_okay=False),
+    help="Directory for checkpoints of completed stages and chunks (overrides execution.checkpoint_dir)",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Resume a failed run from its checkpoints, skipping the completed stages and chunks",
+)
+@click.option(
+    "--explain",
+    is_flag=True,
+    default=False,
+    help="Print the execution plan of the configured operations instead of running it",
+)
+@click.option(
+    "--profile",
+    required=False,
+    type=click.Path(file_okay=False),
+    help="Directory for a cProfile profile and the execution plans of the run",
+)
+@click.option(
+    "--trace-allocations",
+    is_flag=True,
+    default=False,
+    help="With --profile, trace the allocations of every stage with tracemalloc. Every stage then runs as its own "
+    "plan and tracing slows down the run, so its timings are skewed",
+)
 @click.pass_context
 @click.version_option()
-def main(ctx, config_file, input_file, output_file):
+def main(
+    ctx: click.Context,
+    config_file: str,
+    input_file: str,
+    output_file: str,
+    state_file: Optional[str],
+    max_memory: Optional[str],
+    checkpoint_dir: Optional[str],
+    resume: bool,
+    explain: bool,
+    profile: Optional[str],
+    trace_allocations: bool,
+) -> None:
     # Set up logger
     logger = get_logger(__name__)
 
     # Load configuration
     config = Config(config_file)
 
-    # Load data
+    if trace_allocations and not profile:
+        logger.warning("--trace-allocations has no effect without --profile.")
+    run_profiler = RunProfiler(profile, trace_allocations=trace_allocations) if profile else None
+    with run_profiler or nullcontext():
+        run(
+            config,
+            config_file,
+            input_file,
+            output_file,
+            state_file,
+            max_memory,
+            checkpoint_dir,
+            resume,
+            explain,
+            run_profiler,
+            logger,
+        )
+    if run_profiler is not None:
+        logger.info("Wrote the profile of the run to %s.", profile)
+
+
+def run(
+    config: Config,
+    config_file: str,
+    input_file: str,
+    output_file: str,
+    state_file: Optional[str],
+    max_memory: Optional[str],
+    checkpoint_dir: Optional[str],
+    resume: bool,
+    explain: bool,
+    run_profiler: Optional[RunProfiler],
+    logger: logging.Logger,
+) -> None:
+    """
+    Run the pipeline: eagerly, in chunks within the memory budget, or on splits.
+
+    :param config: The configuration.
+    :type config: Config
+    :param config_file: The path to the configuration file.
+    :type config_file: str
+    :param input_file: The path to the input data file.
+    :type input_file: str
+    :param output_file: The path to the output data file.
+    :type output_file: str
+    :param state_file: The path to the incremental state file, if running incrementally.
+    :type state_file: Optional[str]
+    :param max_memory: The memory budget given on the command line.
+    :type max_memory: Optional[str]
+    :param checkpoint_dir: The checkpoint directory given on the command line.
+    :type checkpoint_dir: Optional[str]
+    :param resume: Resume a failed run from its checkpoints.
+    :type resume: bool
+    :param explain: Print the execution plan instead of running it.
+    :type explain: bool
+    :param run_profiler: The profiler of the run, if profiling.
+    :type run_profiler: Optional[RunProfiler]
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+    # Load incremental state
+    state = None
+    skip_rows = 0
+    if state_file:
+        try:
+            state = IncrementalState.load(state_file)
+        except ValueError as e:
+            logger.error("Error loading state file: %s", str(e))
+            return
+        skip_rows = state.rows_processed(input_file)
+
+    # Estimate the peak memory from the row count and the schema, and stream the input in chunks if the eager
+    # pipeline would exceed the memory budget
+    chunk_rows = None
+    max_memory = max_memory or config.execution_config.get("max_memory")
+    if max_memory:
+        try:
+            governor = MemoryGovernor(max_memory, config.execution_config.get("peak_factor"))
+            rows, row_bytes = estimate_rows(config, input_file, skip_rows)
+        except Exception as e:
+            logger.error("Error estimating the memory of input file: %s", str(e))
+            return
+        peak = format_size(governor.peak_memory(rows, row_bytes))
+        if governor.fits(rows, row_bytes):
+            logger.info(
+                "Estimated peak memory %s of %d rows (%.0f bytes per row) is within max_memory %s, processing "
+                "eagerly.",
+                peak,
+                rows,
+                row_bytes,
+                format_size(governor.max_memory),
+            )
+        else:
+            chunk_rows = governor.chunk_rows(row_bytes)
+            logger.info(
+                "Estimated peak memory %s of %d rows (%.0f bytes per row) exceeds max_memory %s, streaming in "
+                "chunks of %d rows.",
+                peak,
+                rows,
+                row_bytes,
+                format_size(governor.max_memory),
+                chunk_rows,
+            )
+
+    # Splits are fitted on the training rows, which have to be known before any stage runs
+    if config.split_config:
+        if state is not None or checkpoint_dir or resume:
+            logger.error("Splits can not be combined with incremental runs or checkpoints")
+            return
+        if chunk_rows is not None:
+            logger.warning("Splits are processed eagerly, the input is loaded at once.")
+        run_split(config, input_file, output_file, explain, run_profiler, logger)
+        return
+
+    # Checkpoint completed stages and chunks, so a failed run can be resumed
+    checkpoint = None
+    checkpoint_dir = checkpoint_dir or config.execution_config.get("checkpoint_dir")
+    if resume and not checkpoint_dir:
+        logger.error("--resume needs --checkpoint-dir or execution.checkpoint_dir")
+        return
+    if checkpoint_dir and not explain:
+        try:
+            fingerprint = run_fingerprint(config_file, input_file, skip_rows, output=output_file, chunk_rows=chunk_rows)
+            checkpoint = Checkpoint(checkpoint_dir, fingerprint, resume=resume)
+        except (OSError, ValueError) as e:
+            logger.error("Error opening checkpoint directory: %s", str(e))
+            return
+        if resume:
+            if len(checkpoint.names()) > 0:
+                logger.info("Resuming from %d checkpoints in %s.", len(checkpoint.names()), checkpoint_dir)
+            else:
+                logger.info("No checkpoints in %s, starting from the beginning.", checkpoint_dir)
+        if state is not None:
+            state = checkpoint.state() or state
+
+    if chunk_rows is not None:
+        run_chunked(
+            config,
+            input_file,
+            output_file,
+            state,
+            state_file,
+            skip_rows,
+            chunk_rows,
+            explain,
+            checkpoint,
+            run_profiler,
+            logger,
+        )
+    else:
+        run_eager(
+            config, input_file, output_file, state, state_file, skip_rows, explain, checkpoint, run_profiler, logger
+        )
+
+
+def estimate_rows(config: Config, input_file: str, skip_rows: int = 0) -> Tuple[int, float]:
+    """
+    Count the input rows and estimate the size of a row from the first rows, without loading the input.
+
+    :param config: The configuration.
+    :type config: Config
+    :param input_file: The path to the input data file.
+    :type input_file: str
+    :param skip_rows: The number of input rows processed by previous incremental runs.
+    :type skip_rows: int
+    :returns: The number of rows and the estimated bytes per row.
+    :rtype: Tuple[int, float]
+    """
+    rows = count_rows(input_file, config.input_format, skip_rows=skip_rows, options=config.input_config)
+    row_bytes = 0.0
+    if rows > 0:
+        head = iter_data(input_file, config.input_format, SCHEMA_SAMPLE_ROWS, skip_rows, config.input_config)
+        row_bytes = row_footprint(next(head, pl.DataFrame()))
+        head.close()
+    return rows, row_bytes
+
+
+def run_eager(
+    config: Config,
+    input_file: str,
+    output_file: str,
+    state: Optional[IncrementalState],
+    state_file: Optional[str],
+    skip_rows: int,
+    explain: bool,
+    checkpoint: Optional[Checkpoint],
+    run_profiler: Optional[RunProfiler],
+    logger: logging.Logger,
+) -> None:
+    """
+    Process the whole input at once.
+
+    With checkpoints or when profiling every stage runs as its own plan. Its output is checkpointed. A resumed run
+    loads the output of the last completed stage instead of the input and only runs the remaining stages.
+
+    :param config: The configuration.
+    :type config: Config
+    :param input_file: The path to the input data file.
+    :type input_file: str
+    :param output_file: The path to the output data file.
+    :type output_file: str
+    :param state: The incremental state, if running incrementally.
+    :type state: Optional[IncrementalState]
+    :param state_file: The path to the incremental state file.
+    :type state_file: Optional[str]
+    :param skip_rows: The number of input rows processed by previous incremental runs.
+    :type skip_rows: int
+    :param explain: Print the execution plan instead of running it.
+    :type explain: bool
+    :param checkpoint: The checkpoints of the run, if checkpointing.
+    :type checkpoint: Optional[Checkpoint]
+    :param run_profiler: The profiler of the run, if profiling.
+    :type run_profiler: Optional[RunProfiler]
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+    completed = [stage for stage in STAGES if checkpoint is not None and checkpoint.has(stage)]
+    if checkpoint is not None and len(completed) > 0:
+        data = checkpoint.load(completed[-1])
+        input_rows = int(checkpoint.meta(completed[-1])["input_rows"])
+        logger.info("Skipping the completed stages %s.", ", ".join(completed))
+    else:
+        # Load data
+        try:
+            data = load_data(
+                input_file, input_file_format=config.input_format, skip_rows=skip_rows, options=config.input_config
+            )
+        except FileNotFoundError as e:
+            logger.error("Input file not found: %s", str(e))
+            return
+        except ValueError as e:
+            logger.error("Error parsing input file: %s", str(e))
+            return
+
+        if state is not None and data.shape[0] == 0:
+            logger.info("No new rows in %s since the last run.", input_file)
+            return
+        input_rows = data.shape[0]
+    # Append to the output of previous incremental runs
+    append = state is not None and len(state.sources) > 0
+
+    # Route the rows violating the validation rules to the quarantine before cleaning
+    if config.validation_config and len(completed) == 0:
+        validator = Validator(config)
+        try:
+            data = validate(config, validator, data, append=append, write=not explain)
+        except Exception as e:
+            logger.error("Error validating data: %s", str(e))
+            return
+        log_violations(validator.violations, input_rows, logger)
+
+    # Profile all columns in one pass. The statistics are reused by the cleaning and normalization stages.
+    try:
+        stats = Profiler(config).profile(data)
+    except Exception as e:
+        logger.error("Error profiling data: %s", str(e))
+        return
+    report_file = config.profiling_config.get("report")
+    if report_file and len(completed) == 0:
+        try:
+            stats.write(report_file)
+        except OSError as e:
+            logger.error(f"Error writing profile report to file {report_file}: {str(e)}")
+
+    try:
+        stages = build_stages(config, state, stats)
+    except ValueError as e:
+        logger.error("Error loading feature selection: %s", str(e))
+        return
+    selector = stages[-1]
+
+    if state is not None and selector.config and not selector.config.get("columns_file"):
+        logger.warning("Without feature_selection.columns_file every incremental run selects its own columns.")
+
+    # Fit the stage parameters on a reservoir sample. They are then applied to all rows. A resumed run fits on the
+    # checkpointed sample, the input may not have been loaded.
+    if config.sampling_config:
+        try:
+            if checkpoint is not None and checkpoint.has("sample"):
+                sample = checkpoint.load("sample")
+            else:
+                sample = Sampler(config).sample(data)
+                if checkpoint is not None:
+                    checkpoint.save("sample", sample, input_rows=input_rows)
+            fit_on_sample(sample, stages)
+        except Exception as e:
+            logger.error("Error fitting on a sample: %s", str(e))
+            return
+        logger.info("Fitted on a sample of %d of %d rows.", sample.shape[0], input_rows)
+
+    workers = config.execution_config.get("workers")
+    if checkpoint is None and not traced(run_profiler):
+        # Plan the operations of all stages as one DAG, so that independent operations of all stages run
+        # concurrently
+        try:
+            plan = build_plan(data, stages)
+        except Exception as e:
+            logger.error("Error planning data preprocessing: %s", str(e))
+            return
+        if explain:
+            click.echo(plan.explain())
+            return
+        if run_profiler is not None:
+            run_profiler.explain("run", plan.explain())
+
+        try:
+            engineered_data = plan.execute(data, workers=workers)
+        except Exception as e:
+            logger.error("Error preprocessing data: %s", str(e))
+            return
+    else:
+        for name, stage in named_stages(stages)[len(completed) :]:
+            try:
+                data = run_stage(name, stage, data, workers, run_profiler)
+                if checkpoint is not None:
+                    checkpoint.save(name, data, state, input_rows=input_rows)
+            except Exception as e:
+                logger.error("Error preprocessing data in stage %s: %s", name, str(e))
+                return
+        engineered_data = data
+
+    try:
+        write_data(
+            engineered_data,
+            output_file,
+            output_file_format=config.output_format,
+            append=append,
+            options=config.output_config,
+        )
+    except Exception as e:
+        logger.error(f"Error writing data to file {output_file}: {str(e)}")
+        return
+
+    log_selection(selector, logger)
+
+    # Remember the processed rows only once the output was written
+    if state is not None and state_file is not None:
+        state.mark_processed(input_file, skip_rows + input_rows)
+        state.save(state_file)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    # Log completion message
+    logger.info("Data preprocessing complete.")
+
+
+def run_split(
+    config: Config,
+    input_file: str,
+    output_file: str,
+    explain: bool,
+    run_profiler: Optional[RunProfiler],
+    logger: logging.Logger,
+) -> None:
+    """
+    Split the input into train/validation/test sets or k folds and process every split with parameters fitted
+    on the training rows only, so no statistics of the validation or test rows leak into the training data.
+    Every split is written to the output file with ``{split}`` replaced by its name, while the next split is
+    processed.
+
+    :param config: The configuration.
+    :type config: Config
+    :param input_file: The path to the input data file.
+    :type input_file: str
+    :param output_file: The output file of every split, with a {split} placeholder.
+    :type output_file: str
+    :param explain: Print the execution plan instead of running it.
+    :type explain: bool
+    :param run_profiler: The profiler of the run, if profiling. When tracing allocations, the stages of every split
+        run as their own plans.
+    :type run_profiler: Optional[RunProfiler]
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+    if "{split}" not in output_file:
+        logger.error("--output-file needs a {split} placeholder to write the splits")
+        return
     try:
-        data = load_data(input_file, input_file_format=config.input_format)
+        data = load_data(input_file, input_file_format=config.input_format, options=config.input_config)
     except FileNotFoundError as e:
         logger.error("Input file not found: %s", str(e))
+        return
     except ValueError as e:
         logger.error("Error parsing input file: %s", str(e))
+        return
+    input_rows = data.shape[0]
+
+    if config.validation_config:
+        validator = Validator(config)
+        try:
+            data = validate(config, validator, data, append=False, write=not explain)
+        except Exception as e:
+            logger.error("Error validating data: %s", str(e))
+            return
+        log_violations(validator.violations, input_rows, logger)
+
+    try:
+        runs = Splitter(config).split(data)
+    except Exception as e:
+        logger.error("Error splitting data: %s", str(e))
+        return
+
+    workers = config.execution_config.get("workers")
+    with ThreadPoolExecutor(max_workers=config.output_config.get("writers") or os.cpu_count()) as pool:
+        writes = []
+        for fit_on, splits in runs:
+            # Every run fits its own stages, on a sample of its training rows if sampling is configured
+            try:
+                stages = build_stages(config)
+                train = splits[fit_on]
+                if train.shape[0] == 0:
+                    raise ValueError(f"Split {fit_on} has no rows")
+                sample = Sampler(config).sample(train) if config.sampling_config else train
+                fit_on_sample(sample, stages)
+            except Exception as e:
+                logger.error("Error fitting on split %s: %s", fit_on, str(e))
+                return
+            logger.info("Fitted on split %s of %d rows.", fit_on, train.shape[0])
+
+            for name, split in splits.items():
+                try:
+                    if traced(run_profiler) and not explain:
+                        processed = split
+                        for stage_name, stage in named_stages(stages) if split.shape[0] > 0 else []:
+                            processed = run_stage(stage_name, stage, processed, workers, run_profiler)
+                    else:
+                        plan = build_plan(split, stages)
+                        if explain:
+                            click.echo(plan.explain())
+                            return
+                        if run_profiler is not None:
+                            run_profiler.explain(name, plan.explain())
+                        processed = plan.execute(split, workers=workers) if split.shape[0] > 0 else split
+                except Exception as e:
+                    logger.error("Error preprocessing split %s: %s", name, str(e))
+                    return
+                split_file = output_file.replace("{split}", name)
+                if os.path.dirname(split_file):
+                    os.makedirs(os.path.dirname(split_file), exist_ok=True)
+                write = pool.submit(
+                    write_data,
+                    processed,
+                    split_file,
+                    output_file_format=config.output_format,
+                    options=config.output_config,
+                )
+                writes.append((name, split_file, processed.shape[0], write))
+
+        for name, split_file, rows, write in writes:
+            try:
+                write.result()
+            except Exception as e:
+                logger.error(f"Error writing split {name} to file {split_file}: {str(e)}")
+                return
+            logger.info("Wrote %d rows of split %s to %s.", rows, name, split_file)
+
+    logger.info("Data preprocessing of %d splits complete.", len(writes))
+
+
+def validate(config: Config, validator: Validator, df: pl.DataFrame, append: bool, write: bool = True) -> pl.DataFrame:
+    """
+    Validate rows and write the violating rows to the quarantine file, if configured.
+
+    :param config: The configuration.
+    :type config: Config
+    :param validator: The validator, counting the violations of all validated rows.
+    :type validator: Validator
+    :param df: The rows to validate.
+    :type df: polars.DataFrame
+    :param append: Append to the quarantine file instead of overwriting it.
+    :type append: bool
+    :param write: Write the quarantine file, False when only explaining the plan.
+    :type write: bool
+    :returns: The valid rows.
+    :rtype: polars.DataFrame
+    """
+    valid, quarantined = validator.validate(df)
+    quarantine_file = config.validation_config.get("quarantine")
+    if quarantine_file and write:
+        quarantine_format = config.validation_config.get("quarantine_format", "csv")
+        write_data(quarantined, quarantine_file, output_file_format=quarantine_format, append=append)
+    return valid
+
+
+def log_violations(violations: Dict[str, int], rows: int, logger: logging.Logger) -> None:
+    """
+    Log the number of violations per validation rule.
+
+    :param violations: The number of violations of every rule, e.g. counted by the validator.
+    :type violations: Dict[str, int]
+    :param rows: The number of validated rows.
+    :type rows: int
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+    violations = {name: count for name, count in violations.items() if count > 0}
+    if len(violations) == 0:
+        logger.info("All %d rows passed validation.", rows)
+        return
+    counts = ", ".join(f"{name}: {count}" for name, count in violations.items())
+    logger.warning("Rows violating validation rules were quarantined (%s).", counts)
+
+
+def log_selection(selector: Selector, logger: logging.Logger) -> None:
+    """
+    Log the number of selected features, and the dropped features with the reason at debug level.
+
+    :param selector: The feature selection stage.
+    :type selector: Selector
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+    if selector.columns is None:
+        return
+    logger.info("Feature selection kept %d columns and dropped %d.", len(selector.columns), len(selector.dropped))
+    for col, reason in selector.dropped.items():
+        logger.debug("Dropped feature %s: %s.", col, reason)
+
+
+def traced(run_profiler: Optional[RunProfiler]) -> bool:
+    """
+    Check whether the run traces the allocations of every stage, which then runs as its own plan.
+
+    :param run_profiler: The profiler of the run, if profiling.
+    :type run_profiler: Optional[RunProfiler]
+    :returns: Whether allocations are traced.
+    :rtype: bool
+    """
+    return run_profiler is not None and run_profiler.trace_allocations
+
+
+def run_stage(
+    name: str,
+    stage: Stage,
+    df: pl.DataFrame,
+    workers: Optional[int],
+    run_profiler: Optional[RunProfiler],
+) -> pl.DataFrame:
+    """
+    Run a stage as its own plan. When profiling, the allocations and the plan of the stage are recorded.
+
+    :param name: The stage name, one of STAGES.
+    :type name: str
+    :param stage: The stage.
+    :type stage: Stage
+    :param df: The output of the previous stage.
+    :type df: polars.DataFrame
+    :param workers: The number of threads running the operations of a layer.
+    :type workers: Optional[int]
+    :param run_profiler: The profiler of the run, if profiling.
+    :type run_profiler: Optional[RunProfiler]
+    :returns: The output of the stage.
+    :rtype: polars.DataFrame
+    """
+    if run_profiler is None:
+        return ExecutionPlan(stage.operations(df)).execute(df, workers=workers)
+    with run_profiler.stage(name):
+        plan = ExecutionPlan(stage.operations(df))
+        df = plan.execute(df, workers=workers)
+    run_profiler.explain(name, plan.explain())
+    return df
+
+
+def run_chunked(
+    config: Config,
+    input_file: str,
+    output_file: str,
+    state: Optional[IncrementalState],
+    state_file: Optional[str],
+    skip_rows: int,
+    chunk_rows: int,
+    explain: bool,
+    checkpoint: Optional[Checkpoint],
+    run_profiler: Optional[RunProfiler],
+    logger: logging.Logger,
+) -> None:
+    """
+    Process an input that does not fit the memory budget chunk by chunk.
+
+    A first pass over the chunks draws a reservoir sample of at most half a chunk, which the stage parameters
+    are fitted on, so all chunks are transformed alike. A second pass profiles, transforms and writes one chunk at
+    a time. Duplicate removal and time-series features only see the rows of their chunk.
+
+    With checkpoints the sample and every processed chunk are checkpointed and the output is written from the
+    checkpoints once all chunks are done. A resumed run reuses the sample and continues after the last completed
+    chunk.
+
+    :param config: The configuration.
+    :type config: Config
+    :param input_file: The path to the input data file.
+    :type input_file: str
+    :param output_file: The path to the output data file.
+    :type output_file: str
+    :param state: The incremental state, if running incrementally.
+    :type state: Optional[IncrementalState]
+    :param state_file: The path to the incremental state file.
+    :type state_file: Optional[str]
+    :param skip_rows: The number of input rows processed by previous incremental runs.
+    :type skip_rows: int
+    :param chunk_rows: The number of rows per chunk.
+    :type chunk_rows: int
+    :param explain: Print the execution plan instead of running it.
+    :type explain: bool
+    :param checkpoint: The checkpoints of the run, if checkpointing.
+    :type checkpoint: Optional[Checkpoint]
+    :param run_profiler: The profiler of the run, if profiling. When tracing allocations, the stages of every chunk
+        run as their own plans and the allocations of a stage are summed over the chunks.
+    :type run_profiler: Optional[RunProfiler]
+    :param logger: The logger.
+    :type logger: logging.Logger
+    """
+
+    def read(skip: int = 0) -> Iterator[pl.DataFrame]:
+        return iter_data(input_file, config.input_format, chunk_rows, skip_rows + skip, config.input_config)
+
+    profiler = Profiler(config)
+    if checkpoint is not None and checkpoint.has("sample"):
+        sample = checkpoint.load("sample")
+        rows_read = int(checkpoint.meta("sample")["input_rows"])
+    else:
+        # The sampling pass holds the reservoir next to the chunk being read, half a chunk keeps both within budget
+        size = max(1, chunk_rows // 2)
+        size = min(config.sampling_config.get("size") or size, size)
+        rows_read = 0
+        try:
+            sampler = Sampler(config, size=size)
+            for chunk in read():
+                rows_read += chunk.shape[0]
+                # Fit on valid rows only, the violations are counted and quarantined by the second pass
+                if config.validation_config:
+                    chunk, _ = Validator(config).validate(chunk)
+                sampler.add(chunk)
+        except Exception as e:
+            logger.error("Error sampling input file: %s", str(e))
+            return
+        if rows_read == 0:
+            logger.info("No new rows in %s since the last run." if state is not None else "No rows in %s.", input_file)
+            return
+        sample = sampler.sample()
+        del sampler
+
+        report_file = config.profiling_config.get("report")
+        if report_file:
+            try:
+                profiler.profile(sample).write(report_file)
+            except OSError as e:
+                logger.error(f"Error writing profile report to file {report_file}: {str(e)}")
+            logger.info("Profile report computed on a sample of %d rows.", sample.shape[0])
+        if checkpoint is not None and not explain:
+            checkpoint.save("sample", sample, input_rows=rows_read)
 
-    # Perform data cleaning
-    cleaner = Cleaner(config)
     try:
-        cleaned_data = cleaner.clean_data(data)
+        stages = build_stages(config, state)
     except ValueError as e:
-        logger.error("Error cleaning data: %s", str(e))
+        logger.error("Error loading feature selection: %s", str(e))
+        return
+    cleaner, normalizer, _, _, selector = stages
+    try:
+        fit_on_sample(sample, stages)
+    except Exception as e:
+        logger.error("Error fitting on a sample: %s", str(e))
+        return
+    logger.info("Fitted on a sample of %d of %d rows.", sample.shape[0], rows_read)
+    log_selection(selector, logger)
+    if config.cleaning_config.get("remove_duplicates") or config.feature_engineering_config.get("time_series"):
+        logger.warning("Duplicate removal and time-series features only see the rows of their chunk.")
+    if config.validation_config.get("unique"):
+        logger.warning("Uniqueness rules only see the rows of their chunk.")
+
+    if explain:
+        try:
+            click.echo(build_plan(sample, stages).explain())
+        except Exception as e:
+            logger.error("Error planning data preprocessing: %s", str(e))
         return
 
-    # Perform data normalization
-    normalizer = Normalizer(config)
-    # normalized_data = normalizer.normalize(cleaned_data)
+    # Only the fitted parameters are needed from here on
+    del sample
+
+    completed = checkpoint.names("chunk-") if checkpoint is not None else []
+    resumed_rows = sum(int(checkpoint.meta(name)["input_rows"]) for name in completed) if checkpoint else 0
+    if len(completed) > 0:
+        logger.info("Skipping %d completed chunks with %d input rows.", len(completed), resumed_rows)
+
+    append = state is not None and len(state.sources) > 0
+    validator = Validator(config) if config.validation_config else None
+
+    def process() -> Iterator[pl.DataFrame]:
+        if resumed_rows >= rows_read:
+            return
+        for index, chunk in enumerate(read(resumed_rows), start=len(completed)):
+            input_rows = chunk.shape[0]
+            if validator is not None:
+                # The quarantine is written before the checkpoint, a chunk that fails in between is quarantined
+                # again when resuming
+                chunk = validate(config, validator, chunk, append=append or index > 0)
+            # Statistics are invalidated by the stages, every chunk gets its own index
+            cleaner.stats = normalizer.stats = profiler.profile(chunk)
+            workers = config.execution_config.get("workers")
+            if traced(run_profiler):
+                processed = chunk
+                for name, stage in named_stages(stages):
+                    processed = run_stage(name, stage, processed, workers, run_profiler)
+            else:
+                plan = build_plan(chunk, stages)
+                if run_profiler is not None:
+                    run_profiler.explain("chunk", plan.explain())
+                processed = plan.execute(chunk, workers=workers)
+            if checkpoint is not None:
+                checkpoint.save(f"chunk-{index:05d}", processed, state, input_rows=input_rows)
+            yield processed
+
     try:
-        normalized_data = normalizer.normalize(cleaned_data)
+        chunks = process()
+        if checkpoint is not None:
+            # Write the output from the checkpoints once all chunks are done, so a failed write can be resumed too
+            for _ in chunks:
+                pass
+            chunks = (checkpoint.load(name) for name in checkpoint.names("chunk-"))
+        rows = write_chunks(
+            chunks,
+            output_file,
+            config.output_format,
+            append=append,
+            options=config.output_config,
+            spill_dir=config.execution_config.get("spill_dir"),
+        )
     except Exception as e:
-        logger.error("Normalizing data: %s", str(e))
+        logger.error(f"Error preprocessing data in chunks to file {output_file}: {str(e)}")
+        return
+    logger.info("Wrote %d rows in chunks of %d rows.", rows, chunk_rows)
+    if validator is not None:
+        log_violations(validator.violations, rows_read - resumed_rows, logger)
+
+    if state is not None and state_file is not None:
+        state.mark_processed(input_file, skip_rows + rows_read)
+        state.save(state_file)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    logger.info("Data preprocessing complete.")
+
+
+@click.command()
+@click.option(
+    "--config-file",
+    "-c",
+    required=True,
+    multiple=True,
+    type=click.Path(exists=True),
+    help="Path to a configuration file, can be given several times",
+)
+@click.option(
+    "--grid",
+    "-g",
+    required=False,
+    type=click.Path(exists=True),
+    help="Path to a YAML parameter grid of dotted configuration keys and their values, expanded for every config",
+)
+@click.option(
+    "--input-file",
+    "-i",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to input data file",
+)
+@click.option(
+    "--output-file",
+    "-o",
+    required=True,
+    type=str,
+    help="Output file of every variant, {variant} is replaced by the variant name",
+)
+@click.option(
+    "--max-memory",
+    "-m",
+    required=False,
+    type=str,
+    help="Memory budget, e.g. 4GB. Limits the number of variants run concurrently (overrides execution.max_memory)",
+)
+@click.option(
+    "--explain",
+    is_flag=True,
+    default=False,
+    help="Print which variants share the stages instead of running them",
+)
+@click.version_option()
+def sweep(
+    config_file: Tuple[str, ...],
+    grid: Optional[str],
+    input_file: str,
+    output_file: str,
+    max_memory: Optional[str],
+    explain: bool,
+) -> None:
+    """
+    Run several configurations, or a parameter grid, over the same input. The input is loaded once and
+    variants share the stages their configurations agree on.
+    """
+    logger = get_logger(__name__)
+
+    # Build the variants, named after their config file and grid combination
+    variants: Dict[str, Config] = {}
+    try:
+        params = Config.load_config(grid) if grid else None
+        for file_path in config_file:
+            config = Config(file_path)
+            stem = os.path.splitext(os.path.basename(file_path))[0]
+            expanded = expand_grid(config, params) if params else [(config, {})]
+            for i, (variant, values) in enumerate(expanded):
+                name = f"{stem}-{i}" if params else stem
+                name = name if name not in variants else f"{name}-{len(variants)}"
+                variants[name] = variant
+                if values:
+                    logger.info("Variant %s: %s", name, ", ".join(f"{key}={value}" for key, value in values.items()))
+        runner = Sweep(variants)
+    except (FileNotFoundError, TypeError, ValueError) as e:
+        logger.error("Error building sweep variants: %s", str(e))
+        return
+    if len(variants) > 1 and "{variant}" not in output_file:
+        logger.error("--output-file needs a {variant} placeholder to write several variants")
+        return
+    if explain:
+        click.echo(runner.explain())
         return
 
-    # Perform feature engineering
-    engineer = Engineer(config)
+    # Every running group holds about one eager run's peak memory, and the result of the level it was computed
+    # from until all groups computed from that result completed. The deepest groups run first and every variant
+    # is written as soon as it completed, so about one more frame of the input size stays alive per running group.
+    config = next(iter(variants.values()))
+    workers = config.execution_config.get("workers")
+    max_memory = max_memory or config.execution_config.get("max_memory")
+    if max_memory:
+        try:
+            governor = MemoryGovernor(max_memory, config.execution_config.get("peak_factor"))
+            rows, row_bytes = estimate_rows(config, input_file)
+        except Exception as e:
+            logger.error("Error estimating the memory of input file: %s", str(e))
+            return
+        peak = governor.peak_memory(rows, row_bytes) + int(rows * row_bytes)
+        workers = max(1, governor.max_memory // max(peak, 1))
+        if peak > governor.max_memory:
+            logger.warning(
+                "Estimated peak memory %s of a variant exceeds max_memory %s, sweeps run eagerly.",
+                format_size(peak),
+                format_size(governor.max_memory),
+            )
+        logger.info("Running up to %d variants concurrently (%s each).", workers, format_size(peak))
+
     try:
-        engineered_data = engineer.execute(normalized_data)
+        data = load_data(input_file, input_file_format=config.input_format, options=config.input_config)
+    except FileNotFoundError as e:
+        logger.error("Input file not found: %s", str(e))
+        return
+    except ValueError as e:
+        logger.error("Error parsing input file: %s", str(e))
+        return
+
+    try:
+        for name, result in runner.run(data, workers=workers):
+            variant = variants[name]
+            variant_file = output_file.replace("{variant}", name)
+            if os.path.dirname(variant_file):
+                os.makedirs(os.path.dirname(variant_file), exist_ok=True)
+            write_data(
+                result, variant_file, output_file_format=variant.output_format, options=variant.output_config
+            )
+            logger.info("Wrote variant %s to %s.", name, variant_file)
     except Exception as e:
-        logger.error("Engineering data: %s", str(e))
+        logger.error("Error running sweep: %s", str(e))
+        return
+
+    # Variants sharing their validation and profiling share the quarantine and report files too
+    written = set()
+    for name, variant in variants.items():
+        files = [
+            (variant.validation_config.get("quarantine"), runner.quarantined.get(name)),
+            (variant.profiling_config.get("report"), runner.profiles.get(name)),
+        ]
+        for path, frame in files:
+            file_path = str(path or "").replace("{variant}", name)
+            if not file_path or frame is None or file_path in written:
+                continue
+            try:
+                if isinstance(frame, pl.DataFrame):
+                    quarantine_format = variant.validation_config.get("quarantine_format", "csv")
+                    write_data(frame, file_path, output_file_format=quarantine_format)
+                else:
+                    frame.write(file_path)
+            except Exception as e:
+                logger.error(f"Error writing file {file_path}: {str(e)}")
+            written.add(file_path)
+
+    logger.info("Sweep of %d variants complete.", len(variants))
+
+
+@click.command()
+@click.option(
+    "--config-file",
+    "-c",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to configuration file",
+)
+@click.option(
+    "--input-file",
+    "-i",
+    required=True,
+    multiple=True,
+    type=click.Path(exists=True),
+    help="Path to an input data file, a partition of the input. Can be given several times",
+)
+@click.option(
+    "--output-file",
+    "-o",
+    required=True,
+    type=str,
+    help="Output file of every partition, {partition} is replaced by the input file name",
+)
+@click.option(
+    "--workers",
+    "-w",
+    required=False,
+    default=2,
+    show_default=True,
+    type=int,
+    help="Number of worker processes",
+)
+@click.option(
+    "--listen",
+    required=False,
+    type=str,
+    help="Address host:port to wait for remote workers on, instead of starting local worker processes",
+)
+@click.option(
+    "--authkey",
+    required=False,
+    envvar="PROXIFLOW_AUTHKEY",
+    type=str,
+    help="Shared secret of the coordinator and remote workers (or PROXIFLOW_AUTHKEY)",
+)
+@click.option(
+    "--accept-timeout",
+    required=False,
+    default=ACCEPT_TIMEOUT,
+    show_default=True,
+    type=float,
+    help="Seconds to wait for all workers to connect before failing the run",
+)
+@click.version_option()
+def coordinator(
+    config_file: str,
+    input_file: Tuple[str, ...],
+    output_file: str,
+    workers: int,
+    listen: Optional[str],
+    authkey: Optional[str],
+    accept_timeout: float,
+) -> None:
+    """
+    Process partitions of the input in worker processes. Means, bounds and vocabularies are reduced from the
+    statistics of all partitions, so the workers normalize and encode like one run over all rows.
+    """
+    logger = get_logger(__name__)
+    config = Config(config_file)
+
+    # Partitions are named after their input files
+    partitions: List[Tuple[str, str, str]] = []
+    for file_path in input_file:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        name = name if name not in [p[0] for p in partitions] else f"{name}-{len(partitions)}"
+        partitions.append((name, file_path, partition_path(output_file, name)))
+    for _, _, file_path in partitions:
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    try:
+        address = parse_address(listen) if listen else None
+        runner = Coordinator(
+            config, partitions, workers, address, authkey.encode() if authkey else None, accept_timeout
+        )
+    except ValueError as e:
+        logger.error("Error setting up the coordinator: %s", str(e))
         return
 
+    binning = config.feature_engineering_config.get("binning") or {}
+    quantile_binning = any(
+        (spec or {}).get("method", "custom" if (spec or {}).get("edges") else "quantile") == "quantile"
+        for spec in binning.values()
+    )
+    local = [
+        key
+        for key, value in [
+            ("outlier handling", config.cleaning_config.get("handle_outliers")),
+            ("duplicate removal", config.cleaning_config.get("remove_duplicates")),
+            ("KNN imputation", (config.cleaning_config.get("handle_missing_values") or {}).get("knn")),
+            ("time-series features", config.feature_engineering_config.get("time_series")),
+            ("quantile binning", quantile_binning),
+            ("uniqueness rules", config.validation_config.get("unique")),
+        ]
+        if value
+    ]
+    if len(local) > 0:
+        logger.warning("%s only see the rows of their partition.", ", ".join(local).capitalize())
+    reduction = config.feature_engineering_config.get("dimensionality_reduction") or {}
+    text_features = (config.feature_engineering_config.get("text_features") or {}).values()
+    if (
+        (reduction and not reduction.get("components_file"))
+        or (config.feature_selection_config and not config.feature_selection_config.get("columns_file"))
+        or any((spec or {}).get("idf") and not spec.get("idf_file") for spec in text_features)
+    ):
+        logger.warning(
+            "Without a persisted components_file, columns_file or idf_file every partition is fitted on its own."
+        )
+    if address is not None:
+        logger.info("Waiting for %d workers on %s:%d.", runner.workers, *address)
+
     try:
-        write_data(engineered_data, output_file, output_file_format=config.output_format)
+        rows = runner.run()
     except Exception as e:
-        logger.error(f"Error writing data to file {output_file}: {str(e)}")
+        logger.error("Error in distributed run: %s", str(e))
+        return
+    for name, count in rows.items():
+        logger.info("Wrote %d rows of partition %s.", count, name)
+    if config.validation_config:
+        log_violations(runner.violations, runner.input_rows, logger)
+    logger.info("Distributed run of %d partitions on %d workers complete.", len(partitions), runner.workers)
 
-    # Log completion message
-    logger.info("Data preprocessing complete.")
+
+@click.command()
+@click.option(
+    "--connect",
+    required=True,
+    type=str,
+    help="Address host:port of the coordinator",
+)
+@click.option(
+    "--authkey",
+    required=True,
+    envvar="PROXIFLOW_AUTHKEY",
+    type=str,
+    help="Shared secret of the coordinator and workers (or PROXIFLOW_AUTHKEY)",
+)
+@click.version_option()
+def worker(connect: str, authkey: str) -> None:
+    """
+    Serve a coordinator started with --listen until its run is over.
+    """
+    logger = get_logger(__name__)
+    try:
+        run_worker(parse_address(connect), authkey.encode())
+    except (OSError, ValueError) as e:
+        logger.error("Error connecting to the coordinator: %s", str(e))
+        return
+    logger.info("Worker finished.")
 
 
 if __name__ == "__main__":
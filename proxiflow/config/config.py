@@ -1,5 +1,5 @@
 import yaml
-from typing import Dict, Any, cast
+from typing import Dict, Any, List, cast
 
 
 class Config:
@@ -116,3 +116,109 @@ class Config:
             return cast(Dict[str, Any], self.config["feature_engineering"])
         except KeyError:
             raise ValueError("feature_engineering config not found in config file")
+
+    @property
+    def feature_selection_config(self) -> Dict[str, Any]:
+        """
+        Get the feature selection configuration values (the null ratio, variance and correlation thresholds) from
+        the configuration dictionary.
+
+        :returns: A dictionary containing the feature selection configuration values (empty if the optional
+            "feature_selection" key is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("feature_selection") or {})
+
+    @property
+    def profiling_config(self) -> Dict[str, Any]:
+        """
+        Get the profiling configuration values from the configuration dictionary.
+
+        :returns: A dictionary containing the profiling configuration values (empty if the optional
+            "profiling" key is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("profiling") or {})
+
+    @property
+    def custom_transforms_config(self) -> List[Dict[str, Any]]:
+        """
+        Get the custom transforms from the configuration dictionary.
+
+        :returns: A list of custom transform configurations (empty if the optional "custom_transforms" key is not
+            present).
+        :rtype: List[Dict]
+        """
+        return cast(List[Dict[str, Any]], self.config.get("custom_transforms") or [])
+
+    @property
+    def sampling_config(self) -> Dict[str, Any]:
+        """
+        Get the sampling configuration values (the size, seed and strata of the sample the stages are fitted on)
+        from the configuration dictionary.
+
+        :returns: A dictionary containing the sampling configuration values (empty if the optional "sampling" key
+            is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("sampling") or {})
+
+    @property
+    def validation_config(self) -> Dict[str, Any]:
+        """
+        Get the validation configuration values (the schema, range, uniqueness, regex and not-null rules checked
+        before cleaning and the quarantine file of the violating rows) from the configuration dictionary.
+
+        :returns: A dictionary containing the validation configuration values (empty if the optional "validation"
+            key is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("validation") or {})
+
+    @property
+    def split_config(self) -> Dict[str, Any]:
+        """
+        Get the split configuration values (the train/validation/test fractions or folds, the seed and the
+        stratify_by or group_by columns) from the configuration dictionary.
+
+        :returns: A dictionary containing the split configuration values (empty if the optional "split" key is not
+            present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("split") or {})
+
+    @property
+    def execution_config(self) -> Dict[str, Any]:
+        """
+        Get the execution configuration values (e.g. the number of workers running independent operations) from
+        the configuration dictionary.
+
+        :returns: A dictionary containing the execution configuration values (empty if the optional "execution" key
+            is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("execution") or {})
+
+    @property
+    def input_config(self) -> Dict[str, Any]:
+        """
+        Get the input configuration values (e.g. the compression of the input file) from the configuration
+        dictionary.
+
+        :returns: A dictionary containing the input configuration values (empty if the optional "input" key is not
+            present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("input") or {})
+
+    @property
+    def output_config(self) -> Dict[str, Any]:
+        """
+        Get the output configuration values (e.g. the dtype and order of a npy feature matrix) from the
+        configuration dictionary.
+
+        :returns: A dictionary containing the output configuration values (empty if the optional "output" key
+            is not present).
+        :rtype: Dict
+        """
+        return cast(Dict[str, Any], self.config.get("output") or {})
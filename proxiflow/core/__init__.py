@@ -1,5 +1,54 @@
+from .checkpoint import Checkpoint, run_fingerprint
 from .cleaner import Cleaner
+from .distributed import Coordinator, Worker, parse_address, partition_path, run_worker
 from .normalizer import Normalizer
+from .pipeline import STAGES, Stage, Stages, build_plan, build_stages, fit_on_sample, named_stages
 from .engineer import Engineer
+from .planner import ExecutionPlan, Operation
+from .profiler import Profiler, StatsIndex
+from .reducer import Reducer
+from .sampler import Sampler
+from .selector import Selector
+from .splitter import Splitter
+from .state import IncrementalState, merge_stats
+from .sweep import Sweep, expand_grid
+from .text import TextVectorizer
+from .validator import Validator
+from .transformer import Transformer, register_transform, get_transform
 
-__all__ = ["Cleaner", "Normalizer", "Engineer"]
+__all__ = [
+    "Checkpoint",
+    "run_fingerprint",
+    "Cleaner",
+    "Coordinator",
+    "Worker",
+    "parse_address",
+    "partition_path",
+    "run_worker",
+    "Normalizer",
+    "STAGES",
+    "Stage",
+    "Stages",
+    "build_plan",
+    "build_stages",
+    "fit_on_sample",
+    "named_stages",
+    "Engineer",
+    "ExecutionPlan",
+    "Operation",
+    "IncrementalState",
+    "merge_stats",
+    "Profiler",
+    "StatsIndex",
+    "Reducer",
+    "Sampler",
+    "Selector",
+    "Splitter",
+    "Sweep",
+    "expand_grid",
+    "TextVectorizer",
+    "Transformer",
+    "register_transform",
+    "get_transform",
+    "Validator",
+]
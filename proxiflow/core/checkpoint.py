@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import polars as pl
+from .state import IncrementalState
+
+from typing import Any, Dict, List, Optional
+
+# Subdirectory of the checkpoint directory holding the checkpoints. Everything in it belongs to the checkpoints,
+# other files of the checkpoint directory are never touched
+CHECKPOINT_SUBDIR = "proxiflow-checkpoints"
+# The manifest listing the checkpointed frames of a run
+MANIFEST_FILE = "manifest.json"
+# Running statistics of incremental runs as of the latest checkpoint
+STATE_FILE = "state.json"
+
+
+class Checkpoint:
+    """
+    Checkpoints of a pipeline run: the output of completed stages and chunks, written as uncompressed Arrow IPC
+    files next to a JSON manifest, in the proxiflow-checkpoints subdirectory of the checkpoint directory.
+
+    Every file is written to a temporary name first and renamed once complete, and the manifest is only updated
+    afterwards, so a run that dies while writing never leaves a checkpoint behind that looks complete. The
+    manifest carries a fingerprint of the configuration and the input, so a resumed run can not pick up the
+    checkpoints of a different run.
+    """
+
+    def __init__(self, directory: str, fingerprint: str, resume: bool = False):
+        """
+        Open the checkpoint directory of a run.
+
+        :param directory: The checkpoint directory. The checkpoints are written to its proxiflow-checkpoints
+            subdirectory, created on the first checkpoint.
+        :type directory: str
+        :param fingerprint: The fingerprint of the run, see :func:`run_fingerprint`.
+        :type fingerprint: str
+        :param resume: Keep the checkpoints of a previous attempt of the same run. Otherwise they are removed.
+        :type resume: bool
+
+        :raises ValueError: If resuming and the checkpoints belong to a different run or can not be parsed.
+        """
+        self.directory = os.path.join(directory, CHECKPOINT_SUBDIR)
+        self.fingerprint = fingerprint
+        self.frames: Dict[str, Dict[str, Any]] = {}
+
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if not resume or not os.path.exists(manifest_path):
+            self.clear()
+            return
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            if manifest["fingerprint"] != fingerprint:
+                raise ValueError(
+                    f"The checkpoints in {directory} were written by a run with a different configuration or input"
+                )
+            self.frames = manifest["frames"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Error parsing checkpoint manifest {manifest_path}: {str(e)}")
+
+    def has(self, name: str) -> bool:
+        """
+        Check whether a frame was checkpointed.
+
+        :param name: The checkpoint name, e.g. "data_cleaning" or "chunk-00003".
+        :type name: str
+        :returns: True if the frame was checkpointed.
+        :rtype: bool
+        """
+        return name in self.frames
+
+    def names(self, prefix: str = "") -> List[str]:
+        """
+        Get the names of the checkpointed frames in the order they were written.
+
+        :param prefix: Only names starting with this prefix, e.g. "chunk-".
+        :type prefix: str
+        :returns: The checkpoint names.
+        :rtype: List[str]
+        """
+        return [name for name in self.frames if name.startswith(prefix)]
+
+    def meta(self, name: str) -> Dict[str, Any]:
+        """
+        Get the metadata stored with a checkpointed frame, e.g. the number of input rows of a chunk.
+
+        :param name: The checkpoint name.
+        :type name: str
+        :returns: The metadata, including the number of rows of the frame.
+        :rtype: Dict
+        """
+        return self.frames[name]
+
+    def save(self, name: str, df: pl.DataFrame, state: Optional[IncrementalState] = None, **meta: Any) -> None:
+        """
+        Checkpoint a frame.
+
+        :param name: The checkpoint name.
+        :type name: str
+        :param df: The frame.
+        :type df: polars.DataFrame
+        :param state: The running statistics of an incremental run after the frame was computed.
+        :type state: Optional[IncrementalState]
+        :param meta: JSON compatible metadata stored in the manifest.
+        :type meta: Any
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{name}.arrow"
+        tmp_path = os.path.join(self.directory, f"{file_name}.tmp")
+        df.write_ipc(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, os.path.join(self.directory, file_name))
+        if state is not None:
+            state.save(os.path.join(self.directory, STATE_FILE))
+
+        self.frames[name] = {"file": file_name, "rows": df.shape[0], **meta}
+        self._write_manifest()
+
+    def load(self, name: str) -> pl.DataFrame:
+        """
+        Load a checkpointed frame.
+
+        :param name: The checkpoint name.
+        :type name: str
+        :returns: The frame.
+        :rtype: polars.DataFrame
+
+        :raises KeyError: If the frame was not checkpointed.
+        """
+        return pl.read_ipc(os.path.join(self.directory, self.frames[name]["file"]), memory_map=False)
+
+    def state(self) -> Optional[IncrementalState]:
+        """
+        Get the running statistics of an incremental run as of the latest checkpoint.
+
+        :returns: The state or None if no state was checkpointed.
+        :rtype: Optional[IncrementalState]
+        """
+        state_path = os.path.join(self.directory, STATE_FILE)
+        if len(self.frames) == 0 or not os.path.exists(state_path):
+            return None
+        return IncrementalState.load(state_path)
+
+    def clear(self) -> None:
+        """
+        Remove all checkpoints, e.g. once the run completed, with the files of a write that never completed.
+        """
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self.frames = {}
+
+    def _write_manifest(self) -> None:
+        """
+        Atomically write the manifest.
+        """
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "frames": self.frames}, f, indent=2)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def run_fingerprint(config_file: str, input_file: str, skip_rows: int = 0, **options: Any) -> str:
+    """
+    Fingerprint a run by its configuration file contents, its input file (path, size and modification time),
+    the skipped rows of an incremental run and further options such as the chunk size.
+
+    :param config_file: The path to the configuration file.
+    :type config_file: str
+    :param input_file: The path to the input file.
+    :type input_file: str
+    :param skip_rows: The number of input rows processed by previous incremental runs.
+    :type skip_rows: int
+    :param options: Further JSON compatible settings the checkpoints depend on.
+    :type options: Any
+    :returns: The hex digest of the fingerprint.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(config_file, "rb") as f:
+        digest.update(f.read())
+    stat = os.stat(input_file)
+    run = {"input": os.path.abspath(input_file), "size": stat.st_size, "mtime": stat.st_mtime_ns, "skip": skip_rows}
+    digest.update(json.dumps({**run, **options}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
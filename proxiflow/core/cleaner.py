@@ -1,22 +1,64 @@
+import math
+from functools import partial
 import polars as pl
 from sklearn.impute import KNNImputer
 from proxiflow.config import Config
-from proxiflow.utils import generate_trace
-
-
-class Cleaner:
+from proxiflow.utils import generate_trace, map_shared
+from .core_utils import FittedParamsMixin, group_keys, guarded
+from .planner import ExecutionPlan, Operation
+from .profiler import StatsIndex
+from .state import IncrementalState
+
+from typing import Callable, Dict, Any, List, Optional, cast
+
+# Strategies for filling missing values and the data types they support (None means all data types)
+FILL_STRATEGIES: Dict[str, Optional[List[pl.PolarsDataType]]] = {
+    "mean": [pl.Int64, pl.Float64],
+    "median": [pl.Int64, pl.Float64],
+    "mode": [pl.Int64, pl.Utf8, pl.Categorical, pl.Boolean],
+    "constant": None,
+    "forward_fill": None,
+    "interpolate": [pl.Int64, pl.Float64],
+    "knn": [pl.Int64, pl.Float64],
+}
+# Statistics of the strategies filling with a value computed from the column
+FILL_STATISTICS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "mean": lambda expr: expr.mean(),
+    "median": lambda expr: expr.median(),
+    # Nulls are dropped first so that the mode is never null. Ties are broken by the smallest value.
+    "mode": lambda expr: expr.drop_nulls().mode().sort().first(),
+}
+# Global switches of the handle_missing_values section in the order of their precedence
+GLOBAL_STRATEGIES = ["mean", "median", "mode", "knn"]
+
+
+class Cleaner(FittedParamsMixin):
     """
     A class for performing data preprocessing tasks such as cleaning, normalization, and feature engineering.
     """
 
-    def __init__(self, config: Config):
+    def __init__(
+        self, config: Config, state: Optional[IncrementalState] = None, stats: Optional[StatsIndex] = None
+    ):
         """
         Initialize a new Cleaner object with the specified configuration.
 
         :param config: A Config object containing the cleaning configuration values.
         :type config: Config
+        :param state: Running statistics of previous incremental runs. New rows are folded into it.
+        :type state: Optional[IncrementalState]
+        :param stats: Column statistics of the profiling stage. They are used instead of rescanning the columns
+            and invalidated for the columns the cleaning modifies.
+        :type stats: Optional[StatsIndex]
         """
         self.config = config.cleaning_config
+        self.state = state
+        self.stats = stats if stats is not None else StatsIndex()
+        self.workers: Optional[int] = config.execution_config.get("workers")
+        # Fill values, outlier bounds and the KNN reference rows fitted on a sample by fit(). They are applied to
+        # all rows of the following runs instead of being computed from them.
+        self.fitted_params: Dict[str, Any] = {}
+        self.fitting = False
 
     def clean_data(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -30,71 +72,108 @@ class Cleaner:
 
         :raises ValueError: If the DataFrame is empty.
         """
-        if df.shape[0] == 0:
-            raise ValueError("Empty DataFrame, no missing values to fill.")
+        return ExecutionPlan(self.operations(df)).execute(df, self.workers)
 
-        cleaned_df = df.clone()
-        # #Handle missing values. drop|mean|mode are mutually exclusive
-        missing_values = self.config["handle_missing_values"]
+    def fit(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fit the fill values, outlier bounds and KNN reference rows on a sample. Following runs apply them to all
+        rows. Statistics computed per group are fitted per group of the sample. The sample is neither folded into
+        the incremental state nor described by the profiled statistics.
 
-        # Drop missing values
-        if missing_values["drop"]:
-            try:
-                cleaned_df = self._drop_missing(cleaned_df)
-            except Exception as e:
-                trace = generate_trace(e, self._drop_missing)
-                raise Exception(f"Trying to drop missing values: {trace}")
-            return cleaned_df
+        :param df: The sample to fit on.
+        :type df: polars.DataFrame
+        :returns: The cleaned sample, to fit the next stage on.
+        :rtype: polars.DataFrame
+        """
+        state, stats = self.state, self.stats
+        self.state, self.stats, self.fitting = None, StatsIndex(), True
+        self.fitted_params = {}
+        try:
+            return self.clean_data(df)
+        finally:
+            self.state, self.stats, self.fitting = state, stats, False
+
+    def operations(self, df: pl.DataFrame) -> List[Operation]:
+        """
+        Split the configured cleaning into operations for the execution planner. Dropping missing values and
+        removing duplicates change the rows and are barriers. Filling missing values and replacing outliers only
+        rewrite the columns they touch.
 
-        # Fill missing values with the mean of the column
-        if missing_values["mean"]:
-            try:
-                cleaned_df = self._mean_missing(cleaned_df)
-            except Exception as e:
-                trace = generate_trace(e, self._mean_missing)
-                raise Exception(f"Trying to fill missing values with the mean: {trace}")
-            return cleaned_df
+        :param df: The DataFrame to clean.
+        :type df: polars.DataFrame
+        :returns: The operations in their configured order.
+        :rtype: List[Operation]
 
-        # Fill missing values with the median of the column
-        if missing_values["median"]:
-            try:
-                cleaned_df = self._median_missing(cleaned_df)
-            except Exception as e:
-                trace = generate_trace(e, self._median_missing)
-                raise Exception(f"Trying to fill missing values with the median: {trace}")
-            return cleaned_df
+        :raises ValueError: If the DataFrame is empty.
+        """
+        if df.shape[0] == 0:
+            raise ValueError("Empty DataFrame, no missing values to fill.")
 
-        # Fill missing values with KNN Imputer
-        if missing_values["knn"]:
-            try:
-                cleaned_df = self._knn_impute_missing(cleaned_df)
-            except Exception as e:
-                trace = generate_trace(e, self._knn_impute_missing)
-                raise Exception(f"Trying to fill missing values with KNN Imputer: {trace}")
+        operations = []
+        # Fold the new rows into the running statistics before they are modified
+        if self.state is not None:
+            operations.append(Operation("data_cleaning.fold_state", self._fold_state, reads=df.columns, barrier=True))
 
-        # NOTE: This is currently disabled because it randomly fails with:
-        # Fill missing values with the mode of the column.
-        # if missing_values["mode"]:
-        #     cleaned_df = self.mode_missing(cleaned_df)
-        #     return cleaned_df
+        # Handle missing values. Either drop the rows with missing values or fill them column by column
+        missing_values = self.config["handle_missing_values"]
+        strategies: Dict[str, Dict[str, Any]] = {}
 
-        # Fill outliers with the median of the column
-        if self.config["handle_outliers"]:
+        # Drop missing values
+        if missing_values.get("drop"):
+            drop = guarded(self._drop_missing, "Trying to drop missing values")
+            operations.append(Operation("data_cleaning.drop_missing", drop, reads=df.columns, barrier=True))
+        else:
+            # Fill missing values with the per-column strategies in a single pass
             try:
-                cleaned_df = self._handle_outliers(cleaned_df)
+                strategies = self._missing_strategies(df, missing_values)
+                reads = set(strategies) | set(group_keys(self.config, df))
             except Exception as e:
-                trace = generate_trace(e, self._handle_outliers)
-                raise Exception(f"Trying to fill outliers with the median: {trace}")
+                trace = generate_trace(e, self._fill_missing)
+                raise Exception(f"Trying to fill missing values: {trace}")
+            if any(spec["strategy"] == "knn" for spec in strategies.values()):
+                # The KNN imputer uses all numeric columns as features
+                reads |= {col for col in df.columns if df[col].dtype in pl.NUMERIC_DTYPES}
+            if strategies:
+                fill = guarded(
+                    lambda frame: self._fill_missing(frame, strategies).select(list(strategies)),
+                    "Trying to fill missing values",
+                )
+                operations.append(Operation("data_cleaning.fill_missing", fill, reads=reads, writes=strategies))
+
+        # Fill outliers with the median of the column. The stage handles the Float64 columns of the frame it gets,
+        # filling missing values can turn other numeric columns into Float64 (e.g. with the median), so they are
+        # planned as well
+        if self.config["handle_outliers"]:
+            columns = [
+                col
+                for col in df.columns
+                if df[col].dtype == pl.Float64 or (col in strategies and df[col].dtype in pl.NUMERIC_DTYPES)
+            ]
+            if columns:
+                outliers = guarded(
+                    lambda frame: self._handle_outliers(frame.select(columns)),
+                    "Trying to fill outliers with the median",
+                )
+                operations.append(Operation("data_cleaning.outliers", outliers, reads=columns, writes=columns))
 
         # Handle duplicate rows
         if self.config["remove_duplicates"]:
-            try:
-                cleaned_df = self._remove_duplicates(cleaned_df)
-            except Exception as e:
-                trace = generate_trace(e, self._remove_duplicates)
-                raise Exception(f"Trying to remove duplicate rows: {trace}")
+            dedup = guarded(self._remove_duplicates, "Trying to remove duplicate rows")
+            operations.append(Operation("data_cleaning.remove_duplicates", dedup, reads=df.columns, barrier=True))
 
-        return cleaned_df
+        return operations
+
+    def _fold_state(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fold the rows into the running statistics of the data cleaning section.
+
+        :param df: The new rows.
+        :type df: polars.DataFrame
+        :returns: The unchanged DataFrame.
+        :rtype: polars.DataFrame
+        """
+        cast(IncrementalState, self.state).update("data_cleaning", df)
+        return df
 
     def _remove_duplicates(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -107,7 +186,10 @@ class Cleaner:
         :rtype: polars.DataFrame
         """
         clone_df = df.clone()
-        return clone_df.unique(keep="first")
+        unique_df = clone_df.unique(keep="first")
+        if unique_df.shape[0] != clone_df.shape[0]:
+            self.stats.invalidate()
+        return unique_df
 
     def _drop_missing(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -120,30 +202,187 @@ class Cleaner:
         :rtype: polars.DataFrame
         """
         clone_df = df.clone()
-        return clone_df.drop_nulls()
+        dropped_df = clone_df.drop_nulls()
+        if dropped_df.shape[0] != clone_df.shape[0]:
+            self.stats.invalidate()
+        return dropped_df
 
-    def _mean_missing(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _missing_strategies(self, df: pl.DataFrame, missing_values: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """
-        Fill missing values with the mean of the column.
+        Resolve the fill strategy of every column from the handle_missing_values configuration.
+
+        The first enabled global switch (mean, median, mode, knn) applies to all columns of a supported data type.
+        Entries of the optional "columns" map override it for single columns, either as a strategy name
+        (e.g. ``Age: median``) or as a dictionary (e.g. ``City: {strategy: constant, value: unknown}``).
 
         :param df: The DataFrame to fill missing values in.
         :type df: polars.DataFrame
+        :param missing_values: The handle_missing_values configuration.
+        :type missing_values: Dict
+
+        :returns: A dictionary mapping column names to their strategy configuration.
+        :rtype: Dict[str, Dict]
+
+        :raises ValueError: If a strategy is unknown or does not support the data type of its column.
+        """
+        strategies: Dict[str, Dict[str, Any]] = {}
+
+        default = next((name for name in GLOBAL_STRATEGIES if missing_values.get(name)), None)
+        if default is not None:
+            strategies.update(self._eligible_strategies(df, default))
+
+        for col, spec in (missing_values.get("columns") or {}).items():
+            if col not in df.columns:
+                continue
+            spec = {"strategy": spec} if isinstance(spec, str) else dict(spec)
+            strategy = spec.get("strategy")
+            if strategy not in FILL_STRATEGIES:
+                raise ValueError(f"Unknown missing values strategy for column {col}: {strategy}")
+            dtypes = FILL_STRATEGIES[strategy]
+            if dtypes is not None and df[col].dtype not in dtypes:
+                raise ValueError(f"Strategy {strategy} does not support column {col} of type {df[col].dtype}")
+            if strategy == "constant" and "value" not in spec:
+                raise ValueError(f"Strategy constant requires a value for column {col}")
+            strategies[col] = spec
+
+        return strategies
+
+    def _fill_missing(self, df: pl.DataFrame, strategies: Dict[str, Dict[str, Any]]) -> pl.DataFrame:
+        """
+        Fill missing values with the given per-column strategies.
+
+        All strategies except KNN are compiled into expressions and evaluated in a single ``with_columns`` pass.
+        If a group_by key is configured, the statistics (mean, median, mode) are computed per group with window
+        expressions and forward fill and interpolation do not cross group boundaries.
+        The KNN columns are imputed afterwards in one KNN Imputer run.
+
+        :param df: The DataFrame to fill missing values in.
+        :type df: polars.DataFrame
+        :param strategies: A dictionary mapping column names to their strategy configuration.
+        :type strategies: Dict[str, Dict]
 
         :returns: The DataFrame with missing values filled.
         :rtype: polars.DataFrame
         """
         clone_df = df.clone()
-        for col in clone_df.columns:
-            # Only Integers and Floats supported
-            if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64:
-                mean_s = clone_df[col].fill_null(strategy="mean")
-                clone_df.replace(col, mean_s)
+        group_by = group_keys(self.config, clone_df)
+        # Statistics fitted per group are joined onto the rows, so that other splits and chunks get the fitted ones
+        fitted: Dict[str, pl.Expr] = {}
+        width = clone_df.width
+        for col, spec in strategies.items():
+            if group_by and spec["strategy"] in FILL_STATISTICS and col not in group_by:
+                statistic = FILL_STATISTICS[spec["strategy"]](pl.col(col))
+                clone_df, params = self._join_fitted("fill", col, clone_df, [statistic], group_by)
+                if params is not None:
+                    fitted[col] = params[0]
+        exprs = [
+            self._fill_expression(clone_df, col, spec, group_by, fitted.get(col))
+            for col, spec in strategies.items()
+            if spec["strategy"] != "knn" and col not in group_by
+        ]
+        if exprs:
+            clone_df = clone_df.with_columns(exprs)
+        clone_df = clone_df.select(clone_df.columns[:width])
+
+        knn_cols = [col for col, spec in strategies.items() if spec["strategy"] == "knn"]
+        if knn_cols:
+            clone_df = self._knn_impute_missing(clone_df, knn_cols)
+
+        # Only columns that actually had missing values were modified
+        self.stats.invalidate([col for col in strategies if self.stats.get(col, "null_count") != 0])
 
         return clone_df
 
-    def _median_missing(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _fill_expression(
+        self,
+        df: pl.DataFrame,
+        col: str,
+        spec: Dict[str, Any],
+        group_by: Optional[List[str]] = None,
+        group_fitted: Optional[pl.Expr] = None,
+    ) -> pl.Expr:
         """
-        Fill missing values with the median of the column.
+        Build the expression filling the missing values of a single column.
+
+        :param df: The DataFrame to fill missing values in.
+        :type df: polars.DataFrame
+        :param col: The name of the column.
+        :type col: str
+        :param spec: The strategy configuration of the column.
+        :type spec: Dict
+        :param group_by: The columns to compute the statistics over. If empty, the whole column is used.
+        :type group_by: Optional[List[str]]
+        :param group_fitted: The statistic of the row's group fitted by :meth:`fit`, if any.
+        :type group_fitted: Optional[polars.Expr]
+
+        :returns: The fill expression, aliased to the column name.
+        :rtype: polars.Expr
+        """
+        strategy = spec["strategy"]
+        expr = pl.col(col)
+
+        def over(value: pl.Expr) -> pl.Expr:
+            # Evaluate the statistic per group if group keys are configured
+            return value.over(group_by) if group_by else value
+
+        if group_fitted is not None:
+            # Only the mean is cast back, like the unfitted statistics below
+            filled = expr.fill_null(group_fitted)
+            return (filled.cast(df[col].dtype) if strategy == "mean" else filled).alias(col)
+
+        if strategy == "mean":
+            # In incremental mode the running mean of all rows processed so far is used
+            running = self.state.stats("data_cleaning") if self.state is not None and not group_by else {}
+            if col in running and running[col].count > 0:
+                return expr.fill_null(running[col].mean).cast(df[col].dtype).alias(col)
+            fitted = self._fitted("fill", col, df, [expr.mean()]) if not group_by else None
+            if fitted is not None and fitted[0] is not None:
+                return expr.fill_null(fitted[0]).cast(df[col].dtype).alias(col)
+            if not group_by and self.stats.has(col, "mean"):
+                return expr.fill_null(self.stats.get(col, "mean")).cast(df[col].dtype).alias(col)
+            return expr.fill_null(over(expr.mean())).cast(df[col].dtype).alias(col)
+        if strategy == "median":
+            fitted = self._fitted("fill", col, df, [expr.median()]) if not group_by else None
+            if fitted is not None and fitted[0] is not None:
+                return expr.fill_null(pl.lit(fitted[0], dtype=pl.Float64)).alias(col)
+            if not group_by and self.stats.has(col, "median"):
+                return expr.fill_null(pl.lit(self.stats.get(col, "median"), dtype=pl.Float64)).alias(col)
+            return expr.fill_null(over(expr.median())).alias(col)
+        if strategy == "mode":
+            # Nulls are dropped first so that the mode is never null. Ties are broken by the smallest value.
+            mode = expr.drop_nulls().mode().sort().first()
+            fitted = self._fitted("fill", col, df, [mode]) if not group_by else None
+            if fitted is not None and fitted[0] is not None:
+                return expr.fill_null(pl.lit(fitted[0])).alias(col)
+            return expr.fill_null(over(expr.drop_nulls().mode().sort().first())).alias(col)
+        if strategy == "constant":
+            return expr.fill_null(pl.lit(spec["value"])).alias(col)
+        if strategy == "forward_fill":
+            return over(expr.fill_null(strategy="forward", limit=spec.get("limit"))).alias(col)
+        if strategy == "interpolate":
+            return over(expr.interpolate()).alias(col)
+
+        raise ValueError(f"Strategy {strategy} can not be compiled into an expression")
+
+    def _eligible_strategies(self, df: pl.DataFrame, strategy: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Assign the strategy to all columns of a data type it supports.
+
+        :param df: The DataFrame to fill missing values in.
+        :type df: polars.DataFrame
+        :param strategy: The name of the strategy.
+        :type strategy: str
+
+        :returns: A dictionary mapping column names to their strategy configuration.
+        :rtype: Dict[str, Dict]
+        """
+        dtypes = FILL_STRATEGIES[strategy]
+        return {col: {"strategy": strategy} for col in df.columns if dtypes is None or df[col].dtype in dtypes}
+
+    def _mean_missing(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fill missing values with the mean of the column. In incremental mode the running mean of all rows
+        processed so far is used instead of the mean of the current batch.
 
         :param df: The DataFrame to fill missing values in.
         :type df: polars.DataFrame
@@ -151,22 +390,24 @@ class Cleaner:
         :returns: The DataFrame with missing values filled.
         :rtype: polars.DataFrame
         """
-        clone_df = df.clone()
-        for col in clone_df.columns:
-            # Only Integers and Floats supported
-            if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64:
-                median = clone_df[col].median()
-                median_s = clone_df[col].fill_null(median)
-                clone_df.replace(col, median_s)
+        return self._fill_missing(df, self._eligible_strategies(df, "mean"))
 
-        return clone_df
+    def _median_missing(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fill missing values with the median of the column.
 
+        :param df: The DataFrame to fill missing values in.
+        :type df: polars.DataFrame
+
+        :returns: The DataFrame with missing values filled.
+        :rtype: polars.DataFrame
+        """
+        return self._fill_missing(df, self._eligible_strategies(df, "median"))
 
-    # TODO: Investigate why this randomly fails with:
-    #  Error cleaning data: must specify either a fill 'value' or 'strategy'
     def _mode_missing(self, df: pl.DataFrame) -> pl.DataFrame:
         """
-        Fill missing values with the mode of the column. Only Int64 and Str data types are supported.
+        Fill missing values with the mode of the column. Int64, Utf8, Categorical and Boolean data types
+        are supported.
 
         :param df: The DataFrame to fill missing values in.
         :type df: polars.DataFrame
@@ -174,41 +415,61 @@ class Cleaner:
         :returns: The DataFrame with missing values filled with mode or original null (in case of unsupported data type)
         :rtype: polars.DataFrame
         """
-        clone_df = df.clone()
-        for col in clone_df.columns:
-            # Only Integers and String supported
-            if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Utf8:
-                mode = clone_df[col].mode()
-                mode_s = clone_df[col].fill_null(value=mode[0])
-                clone_df.replace(col, mode_s)
+        return self._fill_missing(df, self._eligible_strategies(df, "mode"))
 
-        return clone_df
-
-    def _knn_impute_missing(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _knn_impute_missing(self, df: pl.DataFrame, columns: Optional[List[str]] = None) -> pl.DataFrame:
         """
-        Fill missing values using KNN imputation.
+        Fill missing values using KNN imputation. With handle_missing_values.knn_workers greater than 1, row
+        ranges are imputed by a pool of processes that share the data through shared memory.
+
         :param df: The DataFrame to fill missing values in.
         :type df: polars.DataFrame
+        :param columns: The columns to impute. The other numeric columns are used as neighbor features only.
+            If not given, all columns are imputed.
+        :type columns: Optional[List[str]]
+
         :returns: The DataFrame with missing values filled.
         :rtype: polars.DataFrame
         """
         clone_df = df.clone()
-        # Convert the DataFrame to numpy array
-        np_df = clone_df.to_numpy()
-
-        # Initialize the KNN Imputer
-        knn_imputer = KNNImputer(n_neighbors=5, weights="uniform")
-        imputed_np_df = knn_imputer.fit_transform(np_df)
-
-        # Convert the imputed numpy array back to polars DataFrame
-        imputed_df = pl.DataFrame(imputed_np_df, schema=clone_df.schema)
-
-        return imputed_df
+        if columns is None or len(columns) == len(clone_df.columns):
+            features_df = clone_df
+        else:
+            features = [
+                col
+                for col in clone_df.columns
+                if col in columns or clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64
+            ]
+            features_df = clone_df.select(features)
+
+        # Neighbors are searched among the reference rows fitted on a sample, if any, instead of among all rows
+        if self.fitting:
+            self.fitted_params["knn"] = features_df
+        reference = self.fitted_params.get("knn")
+        if reference is not None and reference.columns != features_df.columns:
+            reference = None
+
+        workers = (self.config.get("handle_missing_values") or {}).get("knn_workers") or 1
+        if workers > 1 and features_df.shape[0] > workers:
+            # Impute row ranges in parallel. Every worker attaches to the same shared frame, so the data is never
+            # pickled, and neighbors are still searched among all rows.
+            size = math.ceil(features_df.shape[0] / workers)
+            tasks = [(start, size) for start in range(0, features_df.shape[0], size)]
+            impute = partial(_knn_impute_rows, reference=reference)
+            imputed_df = pl.concat(map_shared(impute, features_df, tasks, max_workers=workers))
+        else:
+            imputed_df = _knn_impute_rows(features_df, 0, features_df.shape[0], reference)
+
+        if features_df is clone_df:
+            return imputed_df
+
+        return clone_df.with_columns([imputed_df[col] for col in columns or []])
 
     # Handle outliers with IQR method
     def _handle_outliers(self, df: pl.DataFrame) -> pl.DataFrame:
         """
-        Handle outliers in a polars DataFrame by replacing them with median of the
+        Handle outliers in a polars DataFrame by replacing the values outside of 1.5 IQR with the median of the
+        column. Only Float64 columns are handled.
 
         :param df: The DataFrame to handle outliers in.
         :type df: polars.DataFrame
@@ -217,19 +478,78 @@ class Cleaner:
         :rtype: polars.DataFrame
         """
         clone_df = df.clone()
+        columns = [col for col in clone_df.columns if clone_df[col].dtype == pl.Float64]
+
+        # Get the first and third quartiles and the median of all columns in one aggregation pass,
+        # unless they were fitted on a sample or are known from the profiling stage
+        fitted = self.fitted_params.setdefault("outliers", {})
+        quartiles = {col: fitted[col] for col in columns if col in fitted}
+        quartiles.update(
+            {
+                col: (self.stats.get(col, "q0.25"), self.stats.get(col, "q0.75"), self.stats.get(col, "median"))
+                for col in columns
+                if col not in quartiles and self.stats.has(col, "q0.25", "q0.75", "median")
+            }
+        )
+        missing = [col for col in columns if col not in quartiles]
+        if missing:
+            aggregated = clone_df.select(
+                [pl.col(col).quantile(0.25).alias(f"{col}:q0.25") for col in missing]
+                + [pl.col(col).quantile(0.75).alias(f"{col}:q0.75") for col in missing]
+                + [pl.col(col).median().alias(f"{col}:median") for col in missing]
+            ).row(0, named=True)
+            for col in missing:
+                quartiles[col] = (aggregated[f"{col}:q0.25"], aggregated[f"{col}:q0.75"], aggregated[f"{col}:median"])
+                if self.fitting:
+                    fitted[col] = quartiles[col]
+
+        exprs = []
+        for col in columns:
+            q1, q3, median = quartiles[col]
+            # Empty or all-null columns have no quartiles
+            if q1 is None or q3 is None:
+                continue
+            iqr = q3 - q1
+            # Identify the lower and upper bounds for outliers
+            lower_bound = q1 - 1.5 * iqr
+            upper_bound = q3 + 1.5 * iqr
+            is_outlier = (pl.col(col) < lower_bound) | (pl.col(col) > upper_bound)
+            exprs.append((col, is_outlier, median))
+
+        if len(exprs) == 0:
+            return clone_df
+
+        # Replace outliers with the median value of the series and invalidate the columns that had outliers
+        has_outliers = clone_df.select([is_outlier.any().alias(col) for col, is_outlier, _ in exprs]).row(0)
+        self.stats.invalidate([col for (col, _, _), flag in zip(exprs, has_outliers) if flag])
+
+        return clone_df.with_columns(
+            [pl.when(is_outlier).then(median).otherwise(pl.col(col)).alias(col) for col, is_outlier, median in exprs]
+        )
+
+
+def _knn_impute_rows(
+    df: pl.DataFrame, start: int, length: int, reference: Optional[pl.DataFrame] = None
+) -> pl.DataFrame:
+    """
+    Impute a range of rows with a KNN Imputer fitted on all rows. Defined at module level so that it can run in
+    worker processes.
+
+    :param df: The DataFrame to fit the imputer on.
+    :type df: polars.DataFrame
+    :param start: The first row to impute.
+    :type start: int
+    :param length: The number of rows to impute.
+    :type length: int
+    :param reference: Rows (e.g. a sample) to fit the imputer on instead of all rows.
+    :type reference: Optional[polars.DataFrame]
+    :returns: The imputed rows.
+    :rtype: polars.DataFrame
+    """
+    # Initialize the KNN Imputer
+    knn_imputer = KNNImputer(n_neighbors=5, weights="uniform")
+    knn_imputer.fit((reference if reference is not None else df).to_numpy())
+    imputed_np_df = knn_imputer.transform(df.slice(start, length).to_numpy())
 
-        for col in clone_df.columns:
-            if clone_df[col].dtype == pl.Float64:
-                # Get the first and third quartiles and the IQR
-                q1 = clone_df[col].quantile(0.25)
-                q3 = clone_df[col].quantile(0.75)
-                iqr = q3 - q1
-                # Identify the lower and upper bounds for outliers
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                # Replace outliers with the median value of the series
-                median = clone_df[col].median()
-                serie = clone_df[col].apply(lambda x: median if x < lower_bound or x > upper_bound else x)
-                clone_df.replace(col, serie)
-
-        return clone_df
+    # Convert the imputed numpy array back to polars DataFrame
+    return pl.DataFrame(imputed_np_df, schema=df.schema)
@@ -1,4 +1,6 @@
 import polars as pl
+from proxiflow.utils import generate_trace
+from typing import Callable, Dict, Any, List, Optional, Tuple, cast
 
 
 def check_columns(df: pl.DataFrame, columns: list[str]) -> list[str]:
@@ -18,3 +20,91 @@ def check_columns(df: pl.DataFrame, columns: list[str]) -> list[str]:
             columns.remove(col)
 
     return columns
+
+
+def group_keys(config: Dict[str, Any], df: pl.DataFrame) -> list[str]:
+    # Get the group_by key(s) of a config section as a list. Statistics are then computed per group.
+    group_by = config.get("group_by")
+    if not group_by:
+        return []
+    keys = [group_by] if isinstance(group_by, str) else list(group_by)
+    missing_keys = [key for key in keys if key not in df.columns]
+    if len(missing_keys) > 0:
+        raise ValueError(f"group_by columns are missing in the DataFrame: {', '.join(missing_keys)}")
+    return keys
+
+
+def guarded(func: Callable[[pl.DataFrame], pl.DataFrame], message: str) -> Callable[[pl.DataFrame], pl.DataFrame]:
+    # Wrap a planned operation so that its errors carry the usual "Trying ..." context of the stage
+    def run(df: pl.DataFrame) -> pl.DataFrame:
+        try:
+            return func(df)
+        except Exception as e:
+            trace = generate_trace(e, func)
+            raise Exception(f"{message}: {trace}")
+
+    return run
+
+
+class FittedParamsMixin:
+    """
+    Parameters of a stage fitted on a sample by its ``fit`` method and applied to all rows by the following runs,
+    e.g. fill values or min-max bounds, by transform and column.
+    """
+
+    fitted_params: Dict[str, Dict[str, Any]]
+    fitting: bool
+
+    def _fitted(self, transform: str, col: str, df: pl.DataFrame, exprs: List[pl.Expr]) -> Optional[Tuple[Any, ...]]:
+        """
+        Get the fitted parameters of a column. While fitting, they are computed from the DataFrame and recorded.
+
+        :param transform: The name of the transform, e.g. "min_max".
+        :type transform: str
+        :param col: The column name.
+        :type col: str
+        :param df: The DataFrame to fit on.
+        :type df: polars.DataFrame
+        :param exprs: The expressions computing the parameters.
+        :type exprs: List[polars.Expr]
+        :returns: The parameters or None if the column was not fitted.
+        :rtype: Optional[Tuple]
+        """
+        fitted = self.fitted_params.setdefault(transform, {})
+        if self.fitting and col not in fitted:
+            fitted[col] = df.select([expr.alias(f"param_{i}") for i, expr in enumerate(exprs)]).row(0)
+        return cast(Optional[Tuple[Any, ...]], fitted.get(col))
+
+    def _join_fitted(
+        self, transform: str, col: str, df: pl.DataFrame, exprs: List[pl.Expr], group_by: List[str]
+    ) -> Tuple[pl.DataFrame, Optional[List[pl.Expr]]]:
+        """
+        Join the parameters of a column fitted per group onto the DataFrame. While fitting, they are computed per
+        group from the DataFrame and recorded. Groups missing in the fitted rows get null parameters.
+
+        :param transform: The name of the transform, e.g. "min_max".
+        :type transform: str
+        :param col: The column name.
+        :type col: str
+        :param df: The DataFrame to fit on.
+        :type df: polars.DataFrame
+        :param exprs: The expressions computing the parameters of a group.
+        :type exprs: List[polars.Expr]
+        :param group_by: The group keys.
+        :type group_by: List[str]
+        :returns: The DataFrame with a column per parameter and the expressions selecting them, or the DataFrame and
+            None if the column was not fitted. The parameter columns are named ``__proxiflow_{transform}_{col}_{i}``.
+        :rtype: Tuple[polars.DataFrame, Optional[List[polars.Expr]]]
+        """
+        fitted = self.fitted_params.setdefault(transform, {})
+        if self.fitting and col not in fitted:
+            fitted[col] = df.groupby(group_by).agg([expr.alias(f"param_{i}") for i, expr in enumerate(exprs)])
+        table: Optional[pl.DataFrame] = fitted.get(col)
+        if table is None:
+            return df, None
+        names = [f"__proxiflow_{transform}_{col}_{i}" for i in range(len(exprs))]
+        # Keys are cast to the types of the DataFrame, which may differ from the fitted rows, e.g. between chunks
+        table = table.rename({f"param_{i}": name for i, name in enumerate(names)}).with_columns(
+            [pl.col(key).cast(df[key].dtype) for key in group_by]
+        )
+        return df.join(table, on=group_by, how="left"), [pl.col(name) for name in names]
@@ -0,0 +1,399 @@
+import multiprocessing
+import os
+import secrets
+import select
+import time
+import polars as pl
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.process import BaseProcess
+from proxiflow.config import Config
+from proxiflow.utils import load_data, write_data
+from .pipeline import build_stages, named_stages
+from .planner import ExecutionPlan
+from .profiler import Profiler, StatsIndex
+from .state import ColumnStats, IncrementalState, batch_stats, merge_stats
+from .validator import Validator
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Sections whose statistics are reduced from all partitions, in pipeline order. The running statistics of a
+# section are computed on the output of the preceding stage.
+SECTIONS = ["data_cleaning", "data_normalization", "feature_engineering"]
+
+# Seconds to wait for a local worker process to exit once the run is over
+JOIN_TIMEOUT = 10
+# Seconds to wait for all workers to connect, and between the checks of the local worker processes meanwhile
+ACCEPT_TIMEOUT = 120
+ACCEPT_POLL_INTERVAL = 0.5
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Parse a coordinator address like ``10.0.0.1:7000``.
+
+    :param address: The address as host:port.
+    :type address: str
+    :returns: The host and the port.
+    :rtype: Tuple[str, int]
+
+    :raises ValueError: If the address has no valid port.
+    """
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Invalid address {address}, use host:port")
+    return host or "127.0.0.1", int(port)
+
+
+def partition_path(template: str, name: str) -> str:
+    """
+    Get the file of a partition: the template with ``{partition}`` replaced by the partition name, or with the
+    name appended to the file name if the template has no placeholder.
+
+    :param template: The file path template, e.g. "out/{partition}.csv".
+    :type template: str
+    :param name: The partition name.
+    :type name: str
+    :returns: The file path.
+    :rtype: str
+    """
+    if "{partition}" in template:
+        return template.replace("{partition}", name)
+    root, ext = os.path.splitext(template)
+    return f"{root}-{name}{ext}"
+
+
+class Worker:
+    """
+    A worker of a distributed run.
+
+    It loads its partitions of the input, reports the statistics of every pipeline section to the coordinator,
+    and applies each stage with the statistics the coordinator reduced from all partitions. The partitions stay
+    in the worker's memory between the stages and are written by the worker.
+    """
+
+    def __init__(self, connection: Connection):
+        """
+        Initialize a new Worker object.
+
+        :param connection: The connection to the coordinator.
+        :type connection: multiprocessing.connection.Connection
+        """
+        self.connection = connection
+        self.config: Optional[Config] = None
+        # Name, input file and output file of every partition
+        self.partitions: List[Tuple[str, str, str]] = []
+        self.frames: Dict[str, pl.DataFrame] = {}
+        # Profiles of the loaded partitions, shared by the cleaning and normalization like in a regular run
+        self.profiles: Dict[str, StatsIndex] = {}
+        self.state = IncrementalState()
+
+    def serve(self) -> None:
+        """
+        Handle the commands of the coordinator until it closes the run. Errors are reported to the coordinator.
+        """
+        while True:
+            try:
+                message = self.connection.recv()
+            except EOFError:
+                return
+            if message["command"] == "close":
+                return
+            try:
+                reply = {"status": "ok", **self.handle(message)}
+            except Exception as e:
+                reply = {"status": "error", "message": str(e)}
+            self.connection.send(reply)
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a command of the coordinator.
+
+        :param message: The command and its arguments.
+        :type message: Dict
+        :returns: The reply.
+        :rtype: Dict
+
+        :raises ValueError: If the command is unknown.
+        """
+        command = message["command"]
+        if command == "load":
+            return self.load(message["config"], message["partitions"])
+        if command == "stage":
+            return self.stage(message["section"], message["stats"])
+        if command == "write":
+            return self.write()
+        raise ValueError(f"Unknown command {command}")
+
+    def load(self, config: Config, partitions: List[Tuple[str, str, str]]) -> Dict[str, Any]:
+        """
+        Load and validate the partitions.
+
+        :param config: The configuration of the run.
+        :type config: Config
+        :param partitions: The name, input file and output file of every partition.
+        :type partitions: List[Tuple[str, str, str]]
+        :returns: The statistics of the data cleaning section, the number of loaded rows and the validation
+            violations.
+        :rtype: Dict
+        """
+        self.config, self.partitions = config, partitions
+        rows = 0
+        validator = Validator(config) if config.validation_config else None
+        for name, input_file, _ in partitions:
+            df = load_data(input_file, input_file_format=config.input_format, options=config.input_config)
+            rows += df.shape[0]
+            if validator is not None:
+                df, quarantined = validator.validate(df)
+                quarantine_file = config.validation_config.get("quarantine")
+                if quarantine_file:
+                    quarantine_format = config.validation_config.get("quarantine_format", "csv")
+                    write_data(quarantined, partition_path(quarantine_file, name), output_file_format=quarantine_format)
+            self.frames[name] = df
+            self.profiles[name] = Profiler(config).profile(df)
+        return {
+            "stats": self._stats(),
+            "rows": rows,
+            "violations": validator.violations if validator is not None else {},
+        }
+
+    def stage(self, section: str, stats: Dict[str, ColumnStats]) -> Dict[str, Any]:
+        """
+        Apply a stage to the partitions with the statistics of all partitions.
+
+        :param section: The stage, one of SECTIONS.
+        :type section: str
+        :param stats: The reduced statistics of the section.
+        :type stats: Dict[str, ColumnStats]
+        :returns: The statistics of the stage output, i.e. of the next section.
+        :rtype: Dict
+        """
+        config = self._loaded_config()
+        self.state.freeze(section, stats)
+        for name, df in self.frames.items():
+            if df.shape[0] == 0:
+                continue
+            stage = dict(named_stages(build_stages(config, self.state, self.profiles[name])))[section]
+            self.frames[name] = ExecutionPlan(stage.operations(df)).execute(
+                df, workers=config.execution_config.get("workers")
+            )
+        return {"stats": self._stats()}
+
+    def write(self) -> Dict[str, Any]:
+        """
+        Apply the custom transforms and the feature selection and write the partitions.
+
+        :returns: The number of written rows of every partition.
+        :rtype: Dict
+        """
+        config = self._loaded_config()
+        _, _, _, transformer, selector = build_stages(config)
+        rows = {}
+        for name, _, output_file in self.partitions:
+            df = self.frames.pop(name)
+            if df.shape[0] > 0:
+                plan = ExecutionPlan(transformer.operations(df) + selector.operations(df))
+                df = plan.execute(df, workers=config.execution_config.get("workers"))
+            write_data(df, output_file, output_file_format=config.output_format, options=config.output_config)
+            rows[name] = df.shape[0]
+        return {"rows": rows}
+
+    def _loaded_config(self) -> Config:
+        """
+        Get the configuration of the run.
+
+        :returns: The configuration.
+        :rtype: Config
+
+        :raises ValueError: If the partitions were not loaded yet.
+        """
+        if self.config is None:
+            raise ValueError("The partitions were not loaded yet")
+        return self.config
+
+    def _stats(self) -> Dict[str, ColumnStats]:
+        """
+        Compute the statistics of all partitions of the worker.
+
+        :returns: The merged statistics.
+        :rtype: Dict[str, ColumnStats]
+        """
+        return merge_stats(batch_stats(df) for df in self.frames.values())
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes) -> None:
+    """
+    Connect to a coordinator and serve its commands until the run is over.
+
+    :param address: The host and port of the coordinator.
+    :type address: Tuple[str, int]
+    :param authkey: The shared secret of the run.
+    :type authkey: bytes
+    """
+    with Client(address, authkey=authkey) as connection:
+        Worker(connection).serve()
+
+
+class Coordinator:
+    """
+    The coordinator of a distributed run: a map-reduce over partitions of the input files.
+
+    Every worker loads its partitions and reports mergeable statistics (counts, Welford moments, bounds and
+    vocabularies, see :class:`ColumnStats`). For every stage the coordinator reduces them and sends the result
+    back, the workers apply the stage locally with it and report the statistics of the next section. Fill means,
+    min-max and z-score parameters and one-hot vocabularies are thereby computed from all rows, exactly as in a
+    single run. Other statistics (e.g. medians, quartiles or fitted transforms) are computed per partition.
+
+    Workers are local processes started by the coordinator, or processes on other hosts connecting to its
+    address with :func:`run_worker`. Messages are pickled, the shared authkey authenticates the workers.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        partitions: List[Tuple[str, str, str]],
+        workers: int,
+        address: Optional[Tuple[str, int]] = None,
+        authkey: Optional[bytes] = None,
+        accept_timeout: float = ACCEPT_TIMEOUT,
+    ):
+        """
+        Initialize a new Coordinator object.
+
+        :param config: The configuration of the run.
+        :type config: Config
+        :param partitions: The name, input file and output file of every partition.
+        :type partitions: List[Tuple[str, str, str]]
+        :param workers: The number of workers.
+        :type workers: int
+        :param address: The address to listen on for remote workers. Local worker processes are started if not
+            given.
+        :type address: Optional[Tuple[str, int]]
+        :param authkey: The shared secret of the run, required for remote workers.
+        :type authkey: Optional[bytes]
+        :param accept_timeout: Seconds to wait for all workers to connect.
+        :type accept_timeout: float
+
+        :raises ValueError: If there are no partitions or workers, or remote workers have no authkey.
+        """
+        if len(partitions) == 0 or workers < 1:
+            raise ValueError("A distributed run needs at least one partition and one worker")
+        if address is not None and not authkey:
+            raise ValueError("Remote workers need an authkey")
+        self.config = config
+        self.partitions = partitions
+        # Local workers without partitions would only idle
+        self.workers = workers if address is not None else min(workers, len(partitions))
+        self.address = address
+        self.authkey = authkey or secrets.token_bytes(32)
+        self.accept_timeout = accept_timeout
+        # Input rows and violations of the validation rules summed over all partitions
+        self.input_rows = 0
+        self.violations: Dict[str, int] = {}
+
+    def run(self) -> Dict[str, int]:
+        """
+        Run the pipeline on all partitions.
+
+        :returns: The number of written rows of every partition.
+        :rtype: Dict[str, int]
+
+        :raises RuntimeError: If a worker fails or the workers do not connect.
+        """
+        processes: List[BaseProcess] = []
+        connections: List[Connection] = []
+        try:
+            with Listener(self.address or ("127.0.0.1", 0), authkey=self.authkey) as listener:
+                if self.address is None:
+                    # Spawned, not forked: forking a process running polars threads can deadlock
+                    context = multiprocessing.get_context("spawn")
+                    for _ in range(self.workers):
+                        worker = context.Process(target=run_worker, args=(listener.address, self.authkey), daemon=True)
+                        worker.start()
+                        processes.append(worker)
+                self._accept(listener, processes, connections)
+
+            assignments = [self.partitions[i :: self.workers] for i in range(self.workers)]
+            replies = self._broadcast(
+                connections, [{"command": "load", "config": self.config, "partitions": a} for a in assignments]
+            )
+            for reply in replies:
+                self.input_rows += reply["rows"]
+                for rule, count in reply["violations"].items():
+                    self.violations[rule] = self.violations.get(rule, 0) + count
+
+            for section in SECTIONS:
+                stats = merge_stats(reply["stats"] for reply in replies)
+                message = {"command": "stage", "section": section, "stats": stats}
+                replies = self._broadcast(connections, [message] * self.workers)
+
+            replies = self._broadcast(connections, [{"command": "write"}] * self.workers)
+            return {name: rows for reply in replies for name, rows in reply["rows"].items()}
+        finally:
+            for connection in connections:
+                try:
+                    connection.send({"command": "close"})
+                except OSError:
+                    pass
+                connection.close()
+            for process in processes:
+                process.join(JOIN_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+
+    def _accept(self, listener: Listener, processes: List[BaseProcess], connections: List[Connection]) -> None:
+        """
+        Accept the connections of all workers, failing if a local worker process exits or not all workers
+        connected within the accept timeout.
+
+        :param listener: The listener of the coordinator.
+        :type listener: multiprocessing.connection.Listener
+        :param processes: The local worker processes, empty for remote workers.
+        :type processes: List[multiprocessing.process.BaseProcess]
+        :param connections: The list the connections are added to.
+        :type connections: List[multiprocessing.connection.Connection]
+
+        :raises RuntimeError: If a local worker process exited or the timeout passed.
+        """
+        # Listener.accept has no timeout, wait until its socket has a connection to accept instead
+        sock = listener._listener._socket  # type: ignore[attr-defined]
+        deadline = time.monotonic() + self.accept_timeout
+        while len(connections) < self.workers:
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    raise RuntimeError(f"Worker process {i} exited with code {process.exitcode} before connecting")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(
+                    f"Only {len(connections)} of {self.workers} workers connected within {self.accept_timeout:g} "
+                    "seconds"
+                )
+            readable, _, _ = select.select([sock], [], [], min(remaining, ACCEPT_POLL_INTERVAL))
+            if readable:
+                connections.append(listener.accept())
+
+    @staticmethod
+    def _broadcast(connections: List[Connection], messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send every worker its message and wait for all replies, so the workers run concurrently.
+
+        :param connections: The connections to the workers.
+        :type connections: List[multiprocessing.connection.Connection]
+        :param messages: The message of every worker.
+        :type messages: List[Dict]
+        :returns: The replies in the order of the workers.
+        :rtype: List[Dict]
+
+        :raises RuntimeError: If a worker failed or disconnected.
+        """
+        for connection, message in zip(connections, messages):
+            connection.send(message)
+        replies = []
+        for i, connection in enumerate(connections):
+            try:
+                reply = connection.recv()
+            except EOFError:
+                raise RuntimeError(f"Worker {i} disconnected")
+            if reply["status"] != "ok":
+                raise RuntimeError(f"Worker {i} failed: {reply['message']}")
+            replies.append(reply)
+        return replies
@@ -1,7 +1,35 @@
+import os
+from functools import partial
+import numpy as np
 import polars as pl
 from proxiflow.config import Config
-from .core_utils import check_columns
-from proxiflow.utils import generate_trace
+from .core_utils import check_columns, group_keys, guarded
+from .planner import ExecutionPlan, Operation
+from .reducer import Reducer
+from .sampler import Sampler
+from .state import ColumnStats, IncrementalState, batch_stats
+from .text import TextVectorizer
+
+from typing import Callable, Dict, Any, List, Optional, Union, cast
+
+# Date parts that can be extracted from temporal columns
+DATE_PARTS = ["year", "quarter", "month", "week", "day", "weekday", "ordinal_day", "hour", "minute", "second"]
+# Rolling window statistics and their polars expression methods
+ROLLING_STATS = {
+    "mean": "rolling_mean",
+    "std": "rolling_std",
+    "min": "rolling_min",
+    "max": "rolling_max",
+    "sum": "rolling_sum",
+}
+# Binning methods and outputs
+BIN_METHODS = ["equal_width", "quantile", "custom"]
+BIN_OUTPUTS = ["ordinal", "one_hot"]
+# Bin codes are UInt8 up to this many bins and UInt16 above
+MAX_UINT8_BINS = 256
+MAX_BINS = 65536
+# Quantile edges of larger inputs are fitted on a reservoir sample of this many rows instead of sorting a column
+QUANTILE_SAMPLE_ROWS = 100000
 
 
 class Engineer:
@@ -9,15 +37,29 @@ class Engineer:
     A class for performing feature engineering tasks.
     """
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, state: Optional[IncrementalState] = None):
         """
         Initialize a new Engineer object with the specified configuration.
 
         :param config: A Config object containing the feature engineering configuration values.
         :type config: Config
+        :param state: Running statistics of previous incremental runs. New rows are folded into it.
+        :type state: Optional[IncrementalState]
         """
         self.config = config.feature_engineering_config
-        print(self.config)
+        self.state = state
+        self.workers: Optional[int] = config.execution_config.get("workers")
+        # Category vocabularies fitted on a sample by fit()
+        self.fitted_params: Dict[str, Dict[str, ColumnStats]] = {}
+        # Dimensionality reduction fitted on the first rows it sees, on a sample or loaded from its components file
+        self.reducer: Optional[Reducer] = None
+        # Bin edges of the binned columns, fitted on the first rows they see or on a sample
+        self.bin_edges: Dict[str, List[float]] = {}
+        # Hashed text features of every text column, their IDF weights fitted like the bin edges
+        self.vectorizers: Dict[str, TextVectorizer] = {}
+        self.fitting = False
+        # Draws the reservoir samples quantile edges are fitted on, seeded like the sampling section
+        self.sampler = partial(Sampler, config)
 
     def execute(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -28,33 +70,120 @@ class Engineer:
         :return: The DataFrame with the new features.
         :rtype: polars.DataFrame
         """
-        engineered_df = df.clone()
+        return ExecutionPlan(self.operations(df)).execute(df, self.workers)
+
+    def fit(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fit the text IDF weights, the bin edges, the one-hot encoding vocabularies and the dimensionality reduction
+        on a sample. Following runs vectorize, bin, encode and project all rows with them, categories missing in
+        the sample are encoded as all zeros. The sample is not folded into the incremental state.
+
+        :param df: The sample to fit on.
+        :type df: polars.DataFrame
+        :return: The sample with the new features.
+        :rtype: polars.DataFrame
+        """
+        state = self.state
+        self.state, self.fitting = None, True
+        self.fitted_params, self.bin_edges, self.vectorizers = {}, {}, {}
+        try:
+            return self.execute(df)
+        finally:
+            self.state, self.fitting = state, False
+
+    def operations(self, df: pl.DataFrame) -> List[Operation]:
+        """
+        Split the configured feature engineering into operations for the execution planner. Time-series features
+        sort the rows and text features, binning, one-hot encoding and dimensionality reduction replace columns, so
+        they are barriers.
+        Polynomial features only add columns.
+
+        :param df: The DataFrame to perform feature engineering on.
+        :type df: polars.DataFrame
+        :return: The operations in their configured order.
+        :rtype: List[Operation]
+        """
+        operations = []
+        # The category vocabularies are fitted on the first incremental run and frozen afterwards, so that
+        # every appended batch gets exactly the same output columns
+        if self.state is not None and not self.state.stats("feature_engineering"):
+            operations.append(
+                Operation("feature_engineering.fold_state", self._fold_state, reads=df.columns, barrier=True)
+            )
+
         # Apply feature engineering
 
-        if self.config["one_hot_encoding"]:
+        time_series = self.config.get("time_series")
+        if time_series:
+            # Create lag, lead, rolling window, EWM and date part features in one expression batch
+            func = guarded(lambda frame: self.time_series_features(frame, time_series), "Trying time-series features")
+            operations.append(Operation("feature_engineering.time_series", func, reads=df.columns, barrier=True))
+
+        text_features = self.config.get("text_features")
+        if text_features:
+            # Replace text columns by hashed token counts or TF-IDF weights
+            func = guarded(lambda frame: self.text_features(frame, text_features), "Trying text features")
+            operations.append(
+                Operation("feature_engineering.text_features", func, reads=list(text_features), barrier=True)
+            )
+
+        binning = self.config.get("binning")
+        if binning:
+            # Replace numeric columns by compact bin codes before categorical columns are encoded
+            func = guarded(lambda frame: self.bin_columns(frame, binning), "Trying binning")
+            operations.append(Operation("feature_engineering.binning", func, reads=list(binning), barrier=True))
+
+        one_hot_encoding = self.config["one_hot_encoding"]
+        if one_hot_encoding:
             # Perform feature engineering on the specified columns
-            try:
-                engineered_df = self.one_hot_encode(engineered_df, self.config["one_hot_encoding"])
-            except Exception as e:
-                trace = generate_trace(e, self.one_hot_encode)
-                raise Exception(f"Trying one-hot encoding: {trace}")
+            func = guarded(lambda frame: self.one_hot_encode(frame, one_hot_encoding), "Trying one-hot encoding")
+            operations.append(
+                Operation("feature_engineering.one_hot_encoding", func, reads=one_hot_encoding, barrier=True)
+            )
 
         feature_scaling = self.config["feature_scaling"]
-        if feature_scaling:
+        if feature_scaling and feature_scaling["columns"]:
             # Perform feature scaling on the specified columns
-            try:
-                engineered_df = self.feature_scaling(
-                    engineered_df, feature_scaling["columns"], feature_scaling["degree"]
-                )
-            except Exception as e:
-                trace = generate_trace(e, self.feature_scaling)
-                raise Exception(f"Trying polynomial feature scaling: {trace}")
+            columns: List[str] = feature_scaling["columns"]
+            degree: int = feature_scaling["degree"]
+            writes = [f"{col}_{i}" for col in columns for i in range(2, degree + 1)]
+
+            def scale(frame: pl.DataFrame) -> pl.DataFrame:
+                scaled = self.feature_scaling(frame, list(columns), degree)
+                return scaled.select([col for col in writes if col in scaled.columns])
+
+            func = guarded(scale, "Trying polynomial feature scaling")
+            operations.append(Operation("feature_engineering.feature_scaling", func, reads=columns, writes=writes))
+
+        reduction = self.config.get("dimensionality_reduction")
+        if reduction:
+            # Reduce the numeric features once all of them were created
+            func = guarded(lambda frame: self.reduce_dimensions(frame, reduction), "Trying dimensionality reduction")
+            operations.append(
+                Operation("feature_engineering.dimensionality_reduction", func, reads=df.columns, barrier=True)
+            )
 
-        return engineered_df
+        return operations
+
+    def _fold_state(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fold the rows into the running statistics of the feature engineering section.
+
+        :param df: The new rows.
+        :type df: polars.DataFrame
+        :return: The unchanged DataFrame.
+        :rtype: polars.DataFrame
+        """
+        # Free text has no useful vocabulary, its columns are vectorized by hashing instead
+        text = [col for col in self.config.get("text_features") or {} if col in df.columns]
+        cast(IncrementalState, self.state).update("feature_engineering", df.drop(text))
+        return df
 
     def one_hot_encode(self, df: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
         """
-        One-hot encode the specified columns of the given DataFrame.
+        One-hot encode the specified columns of the given DataFrame. In incremental mode the dummy columns are
+        created from the vocabulary fitted on the first run (or on a sample, see :meth:`fit`), so every batch gets
+        the same set of output columns. Categories unseen in the first run are encoded as all zeros.
 
         :param df: The DataFrame to one-hot encode.
         :type df: polars.DataFrame
@@ -68,7 +197,221 @@ class Engineer:
         if len(columns) == 0:
             return clone_df
 
-        return clone_df.to_dummies(columns=columns)
+        if self.fitting:
+            self.fitted_params["one_hot"] = batch_stats(clone_df.select(columns))
+        running = self.state.stats("feature_engineering") if self.state is not None else {}
+        # Vocabularies of the incremental state take precedence over the ones fitted on a sample
+        running = {**self.fitted_params.get("one_hot", {}), **running}
+        known = [col for col in columns if col in running and running[col].vocabulary is not None]
+        if len(known) == 0:
+            return clone_df.to_dummies(columns=columns)
+
+        # Replace each known column in place by one dummy column per category of the running vocabulary
+        exprs = []
+        for col in clone_df.columns:
+            if col not in known:
+                exprs.append(pl.col(col))
+                continue
+            if running[col].null_count > 0:
+                exprs.append(pl.col(col).is_null().cast(pl.UInt8).alias(f"{col}_null"))
+            for value in cast(List[str], running[col].vocabulary):
+                exprs.append((pl.col(col) == value).fill_null(False).cast(pl.UInt8).alias(f"{col}_{value}"))
+        clone_df = clone_df.select(exprs)
+
+        # Columns without a vocabulary (e.g. integer categories) are encoded as usual
+        rest = [col for col in columns if col not in known]
+        if len(rest) > 0:
+            clone_df = clone_df.to_dummies(columns=rest)
+
+        return clone_df
+
+    def text_features(self, df: pl.DataFrame, config: Dict[str, Dict[str, Any]]) -> pl.DataFrame:
+        """
+        Replace text columns by hashed token counts or TF-IDF weights (see :class:`TextVectorizer`).
+
+        The IDF weights are fitted on the first DataFrame they see (or on a sample, see :meth:`fit`) and persisted
+        to the IDF file, if configured. An existing IDF file is loaded instead of fitting, so chunks and incremental
+        batches are weighted alike. Token counts need no fitting.
+
+        Example configuration::
+
+            text_features:
+              Description:
+                n_features: 1024          # not mandatory, hash buckets
+                idf: true                 # not mandatory, TF-IDF weights instead of counts
+                norm: l2                  # not mandatory, l1|l2, defaults to l2 with idf
+                lowercase: true           # not mandatory
+                token_pattern: '\\w\\w+'    # not mandatory, regex of the tokens
+                output: dense             # not mandatory, dense (one column per bucket)|sparse (list columns)
+                batch_size: 10000         # not mandatory, rows tokenized at a time
+                keep: false               # not mandatory, keep the text column next to its features
+                idf_file: idf.npy         # not mandatory, persisted IDF weights
+
+        :param df: The DataFrame with the text columns.
+        :type df: polars.DataFrame
+        :param config: The text feature configuration of every column.
+        :type config: Dict
+        :return: The DataFrame with the features in place of the text columns.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If a column is missing or not a string column, or the configuration is invalid.
+        """
+        invalid = [col for col in config if col not in df.columns or df[col].dtype not in (pl.Utf8, pl.Categorical)]
+        if len(invalid) > 0:
+            raise ValueError(f"Columns for text features are missing or not text: {', '.join(invalid)}")
+
+        features: Dict[str, List[pl.Series]] = {}
+        for col, spec in config.items():
+            spec = spec or {}
+            if col not in self.vectorizers:
+                vectorizer = TextVectorizer(col, spec)
+                idf_file = spec.get("idf_file")
+                if spec.get("idf") and idf_file and os.path.exists(idf_file):
+                    vectorizer.load(idf_file)
+                elif spec.get("idf"):
+                    vectorizer.fit(df[col])
+                    if idf_file:
+                        vectorizer.save(idf_file)
+                self.vectorizers[col] = vectorizer
+            kept = [df[col]] if spec.get("keep") else []
+            features[col] = kept + self.vectorizers[col].transform(df[col]).get_columns()
+
+        # Replace each text column in place by its features
+        return pl.DataFrame([series for col in df.columns for series in features.get(col, [df[col]])])
+
+    def bin_columns(self, df: pl.DataFrame, config: Dict[str, Dict[str, Any]]) -> pl.DataFrame:
+        """
+        Discretize numeric columns into bins by equal-width, quantile or custom edges.
+
+        The edges are fitted on the first DataFrame they see (or on a sample, see :meth:`fit`) and reused for all
+        following rows, so chunks get the same bins. In incremental runs equal-width edges span the minimum and
+        maximum of the frozen feature engineering statistics, and quantile edges are fitted on the first run and
+        kept in the incremental state for the following runs. The bins are assigned with a vectorized sorted
+        search; values below the first or above the last edge fall into the outer bins and nulls stay null. Bin
+        codes are UInt8, or UInt16 for more than 256 bins.
+
+        Example configuration::
+
+            binning:
+              Price: {method: quantile, bins: 10}                    # edges at the deciles
+              Age: {method: equal_width, bins: 5, output: one_hot}   # one UInt8 column per bin, e.g. "Age_bin_0"
+              Score: {edges: [0, 50, 80, 100], keep: true}           # custom edges, codes in "Score_bin"
+
+        :param df: The DataFrame to bin.
+        :type df: polars.DataFrame
+        :param config: The binning of every column: method (equal_width|quantile|custom), bins, edges, output
+            (ordinal|one_hot) and keep (keep the column next to its codes).
+        :type config: Dict
+        :return: The DataFrame with the bin codes in place of the binned columns.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If a column is missing or not numeric, or a method, output or number of bins is invalid.
+        """
+        invalid = [col for col in config if col not in df.columns or df[col].dtype not in pl.NUMERIC_DTYPES]
+        if len(invalid) > 0:
+            raise ValueError(f"Columns for binning are missing or not numeric: {', '.join(invalid)}")
+        running = self.state.stats("feature_engineering") if self.state is not None else {}
+        # Edges of the incremental state take precedence over the ones fitted on a sample
+        for col in config:
+            stats = running.get(col)
+            if stats is not None and stats.edges is not None:
+                self.bin_edges[col] = stats.edges
+        unfitted = {col: spec for col, spec in config.items() if col not in self.bin_edges}
+        if len(unfitted) > 0:
+            self.bin_edges.update(self._fit_bins(df, unfitted))
+        if self.state is not None:
+            # Quantiles depend on the rows seen, the following runs reuse the edges of the first run
+            for col, spec in config.items():
+                if _bin_method(spec) == "quantile" and (col not in running or running[col].edges is None):
+                    self.state.set_edges("feature_engineering", col, self.bin_edges[col])
+
+        binned: Dict[str, List[pl.Expr]] = {}
+        for col, spec in config.items():
+            output = (spec or {}).get("output", "ordinal")
+            if output not in BIN_OUTPUTS:
+                raise ValueError(f"Unknown binning output {output}. Supported: {', '.join(BIN_OUTPUTS)}")
+            edges = self.bin_edges[col]
+            bins = max(len(edges) - 1, 1)
+            inner = pl.lit(pl.Series(edges[1:-1], dtype=pl.Float64))
+            code = inner.search_sorted(pl.col(col).cast(pl.Float64), side="right")
+            code = pl.when(pl.col(col).is_null()).then(None).otherwise(code)
+            code = code.cast(pl.UInt8 if bins <= MAX_UINT8_BINS else pl.UInt16)
+            keep = (spec or {}).get("keep", False)
+            exprs = [pl.col(col)] if keep else []
+            if output == "one_hot":
+                exprs += [(code == i).fill_null(False).cast(pl.UInt8).alias(f"{col}_bin_{i}") for i in range(bins)]
+            else:
+                exprs.append(code.alias(f"{col}_bin" if keep else col))
+            binned[col] = exprs
+
+        # Replace each binned column in place by its codes
+        return df.select([expr for col in df.columns for expr in binned.get(col, [pl.col(col)])])
+
+    def _fit_bins(self, df: pl.DataFrame, config: Dict[str, Dict[str, Any]]) -> Dict[str, List[float]]:
+        """
+        Fit the bin edges of several columns: the bounds of all equal-width columns in one aggregation pass and the
+        quantiles of a column from one sort of its values. Above QUANTILE_SAMPLE_ROWS rows, the quantiles are
+        computed on a uniform reservoir sample of that many rows, drawn in one pass.
+
+        :param df: The DataFrame to fit on.
+        :type df: polars.DataFrame
+        :param config: The binning of every column.
+        :type config: Dict
+        :return: The sorted, distinct edges of every column.
+        :rtype: Dict[str, List[float]]
+
+        :raises ValueError: If a method or number of bins is invalid, custom edges are missing or a column has no
+            values.
+        """
+        running = self.state.stats("feature_engineering") if self.state is not None else {}
+        edges: Dict[str, List[float]] = {}
+        quantiles = [col for col, spec in config.items() if _bin_method(spec) == "quantile"]
+        quantile_df = df.select(quantiles)
+        if quantile_df.shape[0] > QUANTILE_SAMPLE_ROWS:
+            quantile_df = self.sampler(size=QUANTILE_SAMPLE_ROWS, stratify_by=[]).sample(quantile_df)
+        # The aggregations of all columns to fit, and the equal-width bins of the columns aggregating min and max
+        exprs: List[pl.Expr] = []
+        aggregated: Dict[str, slice] = {}
+        equal_width: Dict[str, int] = {}
+        for col, spec in config.items():
+            spec = spec or {}
+            method = _bin_method(spec)
+            if method not in BIN_METHODS:
+                raise ValueError(f"Unknown binning method {method}. Supported: {', '.join(BIN_METHODS)}")
+            if method == "custom":
+                if not spec.get("edges") or len(spec["edges"]) < 2:
+                    raise ValueError(f"Custom binning of {col} needs at least two edges")
+                edges[col] = [float(edge) for edge in spec["edges"]]
+                continue
+            bins = int(spec.get("bins") or 10)
+            if not 1 <= bins <= MAX_BINS:
+                raise ValueError(f"Binning of {col} needs between 1 and {MAX_BINS} bins, got {bins}")
+            if method == "quantile":
+                # One sort of the values serves all edges, the interpolation is linear like in polars
+                column = quantile_df[col].drop_nulls().cast(pl.Float64).to_numpy()
+                edges[col] = list(np.quantile(column, np.linspace(0.0, 1.0, bins + 1))) if len(column) > 0 else []
+                continue
+            stats = running.get(col)
+            if stats is not None and stats.count > 0 and stats.min is not None and stats.max is not None:
+                edges[col] = list(np.linspace(stats.min, stats.max, bins + 1))
+                continue
+            expr = pl.col(col).cast(pl.Float64)
+            aggregated[col] = slice(len(exprs), len(exprs) + 2)
+            exprs += [expr.min(), expr.max()]
+            equal_width[col] = bins
+
+        values = df.select([expr.alias(f"edge_{i}") for i, expr in enumerate(exprs)]).row(0) if exprs else ()
+        for col, rows in aggregated.items():
+            points = [value for value in values[rows] if value is not None]
+            if len(points) == 2:
+                points = list(np.linspace(points[0], points[1], equal_width[col] + 1))
+            edges[col] = points
+        for col, points in edges.items():
+            if len(points) == 0:
+                raise ValueError(f"Column {col} has no values to fit bins on")
+            # Skewed columns can have equal quantiles, the duplicate edges are merged into one bin
+            edges[col] = sorted(set(float(point) for point in points))
+        return edges
 
     def feature_scaling(self, df: pl.DataFrame, columns: list[str], degree: int) -> pl.DataFrame:
         """
@@ -101,3 +444,191 @@ class Engineer:
                 clone_df = clone_df.with_columns(*new_cols)
 
         return clone_df
+
+    def reduce_dimensions(self, df: pl.DataFrame, config: Dict[str, Any]) -> pl.DataFrame:
+        """
+        Replace the numeric feature columns by their incremental PCA or sparse random projection components.
+
+        The reduction is fitted on the first DataFrame it sees (or on a sample, see :meth:`fit`) and persisted to
+        the components file, if configured. An existing components file is loaded instead of fitting, so
+        transform-only runs, chunks and incremental batches are all projected onto the same components.
+
+        Example configuration::
+
+            dimensionality_reduction:
+              method: pca                   # pca|random_projection
+              n_components: 32
+              columns: [Price, Area]        # not mandatory, defaults to all numeric columns
+              exclude: [Target]             # not mandatory, numeric columns that are kept as they are
+              batch_size: 10000             # not mandatory, rows converted to float32 and fitted at a time
+              density: auto                 # not mandatory, random_projection: share of non-zero entries
+              seed: 0                       # not mandatory, random_projection
+              keep_columns: false           # not mandatory, keep the input columns next to the components
+              components_file: pca.npz      # not mandatory, persisted components
+
+        :param df: The DataFrame to reduce.
+        :type df: polars.DataFrame
+        :param config: The dimensionality reduction configuration.
+        :type config: Dict
+        :return: The DataFrame with the Float32 component columns, e.g. "pca_0", instead of the input columns.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If the configuration is invalid or the DataFrame lacks the fitted columns.
+        """
+        if self.reducer is None:
+            reducer = Reducer(config)
+            components_file = config.get("components_file")
+            if components_file and os.path.exists(components_file):
+                reducer.load(components_file)
+            else:
+                reducer.fit(df)
+                if components_file:
+                    reducer.save(components_file)
+            self.reducer = reducer
+
+        components = self.reducer.transform(df)
+        columns = cast(List[str], self.reducer.columns)
+        kept = df if config.get("keep_columns") else df.drop(columns)
+        return kept.hstack(components.get_columns())
+
+    def time_series_features(self, df: pl.DataFrame, config: Dict[str, Any]) -> pl.DataFrame:
+        """
+        Create time-series features: lags, leads, rolling window statistics, exponentially weighted moving
+        averages and date parts.
+
+        All features are built as expressions and computed in a single ``with_columns`` pass. If group keys are
+        given, lags, leads and windows are computed per group and never cross group boundaries. If an order
+        column is given, the rows are sorted by the group keys and the order column first.
+
+        Example configuration::
+
+            time_series:
+              order_by: Date          # not mandatory, required for duration windows
+              group_by: Sensor        # not mandatory
+              lags: {Price: [1, 7]}
+              leads: {Price: [1]}
+              rolling: {Price: {window: 3, stats: [mean, std]}}  # window as rows or duration, e.g. "7d"
+              ewm: {Price: [0.5]}     # smoothing factors (alpha)
+              date_parts: {Date: [year, month, weekday]}
+
+        :param df: The DataFrame to create features for.
+        :type df: polars.DataFrame
+        :param config: The time-series configuration.
+        :type config: Dict
+        :return: The DataFrame with the new features.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If a column, date part or rolling statistic is unknown, or a duration window is
+            used without an order column.
+        """
+        clone_df = df.clone()
+        group_by = group_keys(config, clone_df)
+        order_by = config.get("order_by")
+        if order_by is not None and order_by not in clone_df.columns:
+            raise ValueError(f"Column {order_by} specified in order_by is missing in the DataFrame.")
+
+        rolling = config.get("rolling") or {}
+        specs = {col: spec if isinstance(spec, list) else [spec] for col, spec in rolling.items()}
+        has_durations = any(isinstance(spec.get("window"), str) for col in specs for spec in specs[col])
+        if has_durations:
+            if order_by is None:
+                raise ValueError("Rolling windows given as durations require an order_by column.")
+            if clone_df[order_by].dtype == pl.Utf8:
+                clone_df = clone_df.with_columns(pl.col(order_by).str.strptime(pl.Datetime))
+
+        if order_by is not None:
+            clone_df = clone_df.sort(group_by + [order_by])
+
+        def over(expr: pl.Expr) -> pl.Expr:
+            # Compute the feature per group if group keys are configured
+            return expr.over(group_by) if group_by else expr
+
+        exprs = []
+        for col, periods in (config.get("lags") or {}).items():
+            self._check_column(clone_df, col)
+            exprs += [over(pl.col(col).shift(period)).alias(f"{col}_lag_{period}") for period in periods]
+
+        for col, periods in (config.get("leads") or {}).items():
+            self._check_column(clone_df, col)
+            exprs += [over(pl.col(col).shift(-period)).alias(f"{col}_lead_{period}") for period in periods]
+
+        for col, col_specs in specs.items():
+            self._check_column(clone_df, col)
+            for spec in col_specs:
+                exprs += self._rolling_expressions(col, spec, order_by, over)
+
+        for col, alphas in (config.get("ewm") or {}).items():
+            self._check_column(clone_df, col)
+            alphas = alphas if isinstance(alphas, list) else [alphas]
+            for alpha in alphas:
+                exprs.append(over(pl.col(col).ewm_mean(alpha=alpha, adjust=False)).alias(f"{col}_ewm_{alpha}"))
+
+        for col, parts in (config.get("date_parts") or {}).items():
+            self._check_column(clone_df, col)
+            temporal = pl.col(col).str.strptime(pl.Datetime) if clone_df[col].dtype == pl.Utf8 else pl.col(col)
+            for part in parts:
+                if part not in DATE_PARTS:
+                    raise ValueError(f"Unknown date part {part}. Supported parts: {', '.join(DATE_PARTS)}")
+                exprs.append(getattr(temporal.dt, part)().alias(f"{col}_{part}"))
+
+        if len(exprs) == 0:
+            return clone_df
+
+        return clone_df.with_columns(exprs)
+
+    def _rolling_expressions(
+        self, col: str, spec: Dict[str, Any], order_by: Optional[str], over: Callable[[pl.Expr], pl.Expr]
+    ) -> List[pl.Expr]:
+        """
+        Build the rolling window expressions of a single column.
+
+        :param col: The column to compute the rolling statistics of.
+        :type col: str
+        :param spec: The window configuration with the keys window, stats (default [mean]) and min_periods.
+        :type spec: Dict
+        :param order_by: The column durations are measured on.
+        :type order_by: Optional[str]
+        :param over: A function applying the group window to an expression.
+        :type over: Callable
+        :return: The rolling window expressions.
+        :rtype: List[polars.Expr]
+        """
+        window: Union[int, str] = spec["window"]
+        exprs = []
+        for stat in spec.get("stats", ["mean"]):
+            if stat not in ROLLING_STATS:
+                raise ValueError(f"Unknown rolling statistic {stat}. Supported: {', '.join(ROLLING_STATS)}")
+            method = getattr(pl.col(col), ROLLING_STATS[stat])
+            if isinstance(window, str):
+                expr = method(window, by=order_by, closed="right", min_periods=spec.get("min_periods", 1))
+            else:
+                expr = method(window, min_periods=spec.get("min_periods", window))
+            exprs.append(over(expr).alias(f"{col}_rolling_{stat}_{window}"))
+        return exprs
+
+    def _check_column(self, df: pl.DataFrame, col: str) -> None:
+        """
+        Check that a column configured for a time-series feature exists.
+
+        :param df: The DataFrame to check.
+        :type df: polars.DataFrame
+        :param col: The column name.
+        :type col: str
+
+        :raises ValueError: If the column does not exist.
+        """
+        if col not in df.columns:
+            raise ValueError(f"Column {col} specified for time-series features is missing in the DataFrame.")
+
+
+def _bin_method(spec: Optional[Dict[str, Any]]) -> str:
+    """
+    Get the binning method of a column: custom if edges are given, quantile otherwise, unless configured.
+
+    :param spec: The binning of the column.
+    :type spec: Optional[Dict]
+    :return: The binning method.
+    :rtype: str
+    """
+    spec = spec or {}
+    return cast(str, spec.get("method", "custom" if spec.get("edges") else "quantile"))
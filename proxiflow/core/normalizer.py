@@ -1,25 +1,50 @@
+import numpy as np
 import polars as pl
+import scipy.special as special
 import scipy.stats as stats
 from proxiflow.config import Config
 from proxiflow.utils import generate_trace
-from .core_utils import check_columns
+from .core_utils import FittedParamsMixin, check_columns, group_keys, guarded
+from .planner import ExecutionPlan, Operation
+from .profiler import StatsIndex
+from .state import IncrementalState
 
-from typing import Dict, Any, List, Union, cast
+from typing import Callable, Dict, Any, List, Optional, cast
 
+# Default number of values a power transform or quantile table is fitted on
+DEFAULT_SAMPLE_SIZE = 100_000
+# Lambdas closer than this to a singular point use the logarithmic form of the transform
+LAMBDA_EPS = 1e-8
 
-class Normalizer:
+
+class Normalizer(FittedParamsMixin):
     """
     A class for performing data normalizing tasks.
     """
 
-    def __init__(self, config: Config):
+    def __init__(
+        self, config: Config, state: Optional[IncrementalState] = None, stats: Optional[StatsIndex] = None
+    ):
         """
         Initialize a new Normalizer object with the specified configuration.
 
         :param config: A Config object containing the normalization configuration values.
         :type config: Config
+        :param state: Running statistics of previous incremental runs. New rows are folded into it.
+        :type state: Optional[IncrementalState]
+        :param stats: Column statistics of the profiling stage. They are used instead of rescanning the columns
+            and invalidated for the columns the normalization transforms.
+        :type stats: Optional[StatsIndex]
         """
         self.config: Dict[str, Any] = config.normalization_config
+        self.state = state
+        self.stats = stats if stats is not None else StatsIndex()
+        # Fitted transform parameters (lambdas, quantile tables) by transform and column. Columns that were
+        # already fitted are transformed with the same parameters again. Min-max bounds and z-score moments are
+        # only fitted by fit().
+        self.fitted_params: Dict[str, Dict[str, Any]] = {}
+        self.fitting = False
+        self.workers: Optional[int] = config.execution_config.get("workers")
 
     def normalize(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -30,42 +55,115 @@ class Normalizer:
         :return: The normalized DataFrame.
         :rtype: polars.DataFrame
         """
-        normalized_df = df.clone()
-        # Apply min-max normalization
-        min_max_cols: List[str] = self.config["min_max"]
-        if min_max_cols:
-            # Normalize the specified columns
-            try:
-                normalized_df = self._min_max_normalize(normalized_df, min_max_cols)
-            except Exception as e:
-                trace: str = generate_trace(e, self._min_max_normalize)
-                raise Exception(f"Trying min-max normalization: {trace}")
+        return ExecutionPlan(self.operations(df)).execute(df, self.workers)
 
-        # Apply z-score normalization
-        z_score_cols: List[str] = self.config["z_score"]
-        if z_score_cols:
-            # Normalize the specified columns
-            try:
-                normalized_df = self._z_score_normalize(normalized_df, z_score_cols)
-            except Exception as e:
-                trace = generate_trace(e, self._z_score_normalize)
-                raise Exception(f"Trying z-score normalization: {trace}")
+    def fit(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fit the transform parameters on a sample. Following runs apply them to all rows. Statistics computed per
+        group are fitted per group of the sample. The sample is neither folded into the incremental state nor
+        described by the profiled statistics.
+
+        :param df: The sample to fit on.
+        :type df: polars.DataFrame
+        :returns: The normalized sample, to fit the next stage on.
+        :rtype: polars.DataFrame
+        """
+        state, stats = self.state, self.stats
+        self.state, self.stats, self.fitting = None, StatsIndex(), True
+        self.fitted_params = {}
+        try:
+            return self.normalize(df)
+        finally:
+            self.state, self.stats, self.fitting = state, stats, False
 
-        # Apply log normalization
-        log_cols: List[str] = self.config["log"]
-        if log_cols:
-            # Normalize the specified columns
+    def operations(self, df: pl.DataFrame) -> List[Operation]:
+        """
+        Split the configured normalization into operations for the execution planner. Min-max, z-score and log
+        normalization are one expression batch per transform. The fitted transforms (Box-Cox, Yeo-Johnson and
+        quantile) fit every column separately, so they get one operation per column and the fits run
+        concurrently. Transforms of the same column keep their configured order.
+
+        :param df: The DataFrame to normalize.
+        :type df: polars.DataFrame
+        :returns: The operations in their configured order.
+        :rtype: List[Operation]
+        """
+        operations = []
+        # Fold the new rows into the running statistics so that min-max and z-score use all rows seen so far
+        if self.state is not None:
+            operations.append(
+                Operation("data_normalization.fold_state", self._fold_state, reads=df.columns, barrier=True)
+            )
+
+        quantile: Dict[str, Any] = self.config.get("quantile") or {}
+        transforms = [
+            ("min_max", "min-max", self.config["min_max"], self._min_max_normalize, False),
+            ("z_score", "z-score", self.config["z_score"], self._z_score_normalize, False),
+            ("log", "log", self.config["log"], self._log_normalize, False),
+            ("box_cox", "box-cox", self.config.get("box_cox") or [], self._box_cox_normalize, True),
+            ("yeo_johnson", "yeo-johnson", self.config.get("yeo_johnson") or [], self._yeo_johnson_normalize, True),
+            (
+                "quantile",
+                "quantile",
+                quantile.get("columns") or [],
+                lambda frame, columns: self._quantile_normalize(frame, {**quantile, "columns": columns}),
+                True,
+            ),
+        ]
+        for name, label, columns, method, per_column in transforms:
+            if not columns:
+                continue
+            message = f"Trying {label} normalization"
             try:
-                normalized_df = self._log_normalize(normalized_df, log_cols)
+                columns = check_columns(df, list(columns))
+                group_by = group_keys(self.config, df) if name in ("min_max", "z_score") else []
             except Exception as e:
-                trace = generate_trace(e, self._log_normalize)
-                raise Exception(f"Trying log normalization: {trace}")
+                trace = generate_trace(e, method)
+                raise Exception(f"{message}: {trace}")
+            batches = [[col] for col in columns] if per_column else [columns]
+            for batch in batches:
+                writes = [col for col in batch if col not in group_by]
+                func = guarded(self._transform(method, batch, writes), message)
+                name_columns = ", ".join(batch)
+                operations.append(
+                    Operation(f"data_normalization.{name}({name_columns})", func, reads=batch + group_by, writes=writes)
+                )
 
-        return normalized_df
+        return operations
+
+    def _transform(
+        self, method: Callable[[pl.DataFrame, List[str]], pl.DataFrame], columns: List[str], writes: List[str]
+    ) -> Callable[[pl.DataFrame], pl.DataFrame]:
+        """
+        Bind a transform to its columns for the execution planner.
+
+        :param method: The transform method.
+        :type method: Callable
+        :param columns: The columns to transform.
+        :type columns: List[str]
+        :param writes: The columns the transform modifies (the columns without the group keys).
+        :type writes: List[str]
+        :returns: A function returning the transformed columns.
+        :rtype: Callable[[polars.DataFrame], polars.DataFrame]
+        """
+        return lambda df: method(df, list(columns)).select(writes)
+
+    def _fold_state(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fold the rows into the running statistics of the data normalization section.
+
+        :param df: The new rows.
+        :type df: polars.DataFrame
+        :returns: The unchanged DataFrame.
+        :rtype: polars.DataFrame
+        """
+        cast(IncrementalState, self.state).update("data_normalization", df)
+        return df
 
     def _min_max_normalize(self, df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
         """
-        Applies min-max normalization to the specified columns of the given DataFrame.
+        Applies min-max normalization to the specified columns of the given DataFrame. If a group_by key is
+        configured, the min and max values are computed per group.
 
         :param df: The DataFrame to normalize.
         :type df: polars.DataFrame
@@ -79,26 +177,56 @@ class Normalizer:
         # If no columns exist, return the original DataFrame
         if len(columns) == 0:
             return clone_df
-        # Select the specified columns
-        selected_df = clone_df.select(columns)
+        # We can not subtract strings, so we only normalize numeric columns (group keys are left as they are)
+        group_by = group_keys(self.config, clone_df)
+        columns = [
+            col
+            for col in columns
+            if (clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64) and col not in group_by
+        ]
+        running = self.state.stats("data_normalization") if self.state is not None and not group_by else {}
 
-        for col in selected_df.columns:
-            # We can not subtract strings, so we only normalize numeric columns
-            if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64:
-                # Get the min and max values of the column
-                min_val = cast(Union[int, float], selected_df[col].min())
-                max_val = cast(Union[int, float], selected_df[col].max())
-                if max_val - min_val == 0:
+        # Get the min and max values of all columns (per group) in one aggregation pass
+        bounds = []
+        width = clone_df.width
+        for col in columns:
+            extremes = [pl.col(col).min(), pl.col(col).max()]
+            fitted = None if group_by else self._fitted("min_max", col, clone_df, extremes)
+            group_fitted = None
+            if group_by:
+                # Bounds fitted per group are joined onto the rows
+                clone_df, group_fitted = self._join_fitted("min_max", col, clone_df, extremes, group_by)
+            if col in running and running[col].count > 0:
+                min_val, max_val = pl.lit(running[col].min), pl.lit(running[col].max)
+            elif group_fitted is not None:
+                min_val, max_val = group_fitted
+            elif not group_by and fitted is not None:
+                min_val, max_val = pl.lit(fitted[0]), pl.lit(fitted[1])
+            elif not group_by and self.stats.has(col, "min", "max"):
+                min_val, max_val = pl.lit(self.stats.get(col, "min")), pl.lit(self.stats.get(col, "max"))
+            elif group_by:
+                min_val, max_val = pl.col(col).min().over(group_by), pl.col(col).max().over(group_by)
+            else:
+                min_val, max_val = pl.col(col).min(), pl.col(col).max()
+            bounds.append((col, min_val, max_val))
+
+        # Check all ranges at once before normalizing. Constant groups are mapped to 0 instead.
+        if not group_by:
+            ranges = clone_df.select([(max_val - min_val).min().alias(col) for col, min_val, max_val in bounds])
+            for col in columns:
+                if ranges[col][0] == 0:
                     raise ValueError(f"Error normalizing min-max column {col}: division by zero")
-                # Normalize the column
-                min_max = (df[col] - min_val) / (max_val - min_val)
-                clone_df.replace(col, min_max)
 
-        return clone_df
+        # Normalize the columns
+        self.stats.invalidate(columns)
+        return clone_df.with_columns(
+            [_scale(pl.col(col) - min_val, max_val - min_val).alias(col) for col, min_val, max_val in bounds]
+        ).select(clone_df.columns[:width])
 
     def _z_score_normalize(self, df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
         """
-        Applies z-score normalization to the specified columns of the given DataFrame.
+        Applies z-score normalization to the specified columns of the given DataFrame. If a group_by key is
+        configured, the mean and standard deviation are computed per group.
 
         :param df: The DataFrame to normalize.
         :type df: polars.DataFrame
@@ -113,16 +241,53 @@ class Normalizer:
         if len(columns) == 0:
             return clone_df
 
-        selected_df = clone_df.select(columns)
+        group_by = group_keys(self.config, clone_df)
+        columns = [
+            col
+            for col in columns
+            if (clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64) and col not in group_by
+        ]
+        running = self.state.stats("data_normalization") if self.state is not None and not group_by else {}
 
-        for col in selected_df.columns:
-            if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64:
-                # Get the values of the column. Filter out None values
-                values = list(filter(lambda x: x is not None, clone_df[col].to_list()))
-                z_score = stats.zscore(values)
-                clone_df.replace(col, pl.Series(z_score))
+        scales = []
+        width = clone_df.width
+        for col in columns:
+            moments = [pl.col(col).mean(), pl.col(col).std(ddof=0)]
+            fitted = None if group_by else self._fitted("z_score", col, clone_df, moments)
+            group_fitted = None
+            if group_by:
+                # Moments fitted per group are joined onto the rows
+                clone_df, group_fitted = self._join_fitted("z_score", col, clone_df, moments, group_by)
+            if col in running and running[col].count > 0:
+                # Standardize with the running mean and population std of all rows seen so far
+                std = running[col].std
+                if std == 0:
+                    raise ValueError(f"Error normalizing z-score column {col}: division by zero")
+                mean_val, std_val = pl.lit(running[col].mean), pl.lit(std)
+            elif group_fitted is not None:
+                mean_val, std_val = group_fitted
+            elif not group_by and fitted is not None:
+                mean_val, std_val = pl.lit(fitted[0]), pl.lit(fitted[1])
+            elif not group_by and self.stats.has(col, "mean", "std"):
+                mean_val, std_val = pl.lit(self.stats.get(col, "mean")), pl.lit(self.stats.get(col, "std"))
+            elif group_by:
+                mean_val, std_val = pl.col(col).mean().over(group_by), pl.col(col).std(ddof=0).over(group_by)
+            else:
+                mean_val, std_val = pl.col(col).mean(), pl.col(col).std(ddof=0)
+            scales.append((col, mean_val, std_val))
 
-        return clone_df
+        # Check all standard deviations at once before normalizing. Constant groups are mapped to 0 instead.
+        if not group_by:
+            stds = clone_df.select([std_val.min().alias(col) for col, _, std_val in scales])
+            for col in columns:
+                if stds[col][0] == 0:
+                    raise ValueError(f"Error normalizing z-score column {col}: division by zero")
+
+        # Population standard deviation, nulls are ignored and kept in place
+        self.stats.invalidate(columns)
+        return clone_df.with_columns(
+            [_scale(pl.col(col) - mean_val, std_val).alias(col) for col, mean_val, std_val in scales]
+        ).select(clone_df.columns[:width])
 
     def _log_normalize(self, df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
         """
@@ -145,8 +310,217 @@ class Normalizer:
 
         for col in selected_df.columns:
             if clone_df[col].dtype == pl.Int64 or clone_df[col].dtype == pl.Float64:
+                # log((1 + x) / 2) is only defined for x > -1
+                min_val = self._min(clone_df, col)
+                if min_val is not None and min_val <= -1:
+                    raise ValueError(
+                        f"Error normalizing log column {col}: values must be greater than -1, use yeo_johnson instead"
+                    )
                 norm = (1 + clone_df[col]) / 2
                 log = norm.log()
                 clone_df.replace(col, log)
+                self.stats.invalidate([col])
 
         return clone_df
+
+    def _min(self, df: pl.DataFrame, col: str) -> Optional[float]:
+        """
+        Get the minimum of a numeric column, from the profiled statistics if they have it.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :param col: The column.
+        :type col: str
+        :return: The minimum or None if the column has no values.
+        :rtype: Optional[float]
+        """
+        if self.stats.has(col, "min"):
+            return cast(Optional[float], self.stats.get(col, "min"))
+        return cast(Optional[float], df[col].min())
+
+    def _sample(self, df: pl.DataFrame, col: str) -> np.ndarray:
+        """
+        Get the non-null values of a column to fit a transform on. If a sample_size is configured and the column
+        is larger, a reproducible random sample of that size is drawn instead of using all values.
+
+        :param df: The DataFrame to sample from.
+        :type df: polars.DataFrame
+        :param col: The column to sample.
+        :type col: str
+        :return: The sampled values.
+        :rtype: numpy.ndarray
+        """
+        values = df[col].drop_nulls().cast(pl.Float64)
+        sample_size = self.config.get("sample_size") or DEFAULT_SAMPLE_SIZE
+        if len(values) > sample_size:
+            values = values.sample(n=sample_size, seed=self.config.get("seed", 0))
+        return values.to_numpy()
+
+    def _numeric_columns(self, df: pl.DataFrame, columns: List[str]) -> List[str]:
+        """
+        Get the existing Int64 and Float64 columns out of the specified columns.
+
+        :param df: The DataFrame to check.
+        :type df: polars.DataFrame
+        :param columns: The columns to check.
+        :type columns: List[str]
+        :return: The numeric columns.
+        :rtype: List[str]
+        """
+        columns = check_columns(df, columns)
+        return [col for col in columns if df[col].dtype == pl.Int64 or df[col].dtype == pl.Float64]
+
+    def _box_cox_normalize(self, df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
+        """
+        Applies the Box-Cox power transform to the specified columns of the given DataFrame. The lambda of each
+        column is fitted by maximum likelihood on a sample of the column. Only positive values are supported.
+
+        :param df: The DataFrame to normalize.
+        :type df: polars.DataFrame
+        :param columns: The columns to normalize.
+        :type columns: List[str]
+        :return: The normalized DataFrame.
+        :rtype: polars.DataFrame
+        """
+        clone_df = df.clone()
+        columns = self._numeric_columns(clone_df, columns)
+        fitted = self.fitted_params.setdefault("box_cox", {})
+
+        exprs = []
+        for col in columns:
+            min_val = self._min(clone_df, col)
+            if min_val is not None and min_val <= 0:
+                raise ValueError(f"Error normalizing box-cox column {col}: values must be positive")
+            if col not in fitted:
+                fitted[col] = float(stats.boxcox_normmax(self._sample(clone_df, col), method="mle"))
+            lmbda = fitted[col]
+
+            x = pl.col(col).cast(pl.Float64)
+            expr = x.log() if abs(lmbda) < LAMBDA_EPS else (x.pow(lmbda) - 1) / lmbda
+            exprs.append(expr.alias(col))
+
+        self.stats.invalidate(columns)
+        return clone_df.with_columns(exprs)
+
+    def _yeo_johnson_normalize(self, df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
+        """
+        Applies the Yeo-Johnson power transform to the specified columns of the given DataFrame. The lambda of
+        each column is fitted by maximum likelihood on a sample of the column. Unlike Box-Cox, zero and negative
+        values are supported.
+
+        :param df: The DataFrame to normalize.
+        :type df: polars.DataFrame
+        :param columns: The columns to normalize.
+        :type columns: List[str]
+        :return: The normalized DataFrame.
+        :rtype: polars.DataFrame
+        """
+        clone_df = df.clone()
+        columns = self._numeric_columns(clone_df, columns)
+        fitted = self.fitted_params.setdefault("yeo_johnson", {})
+
+        exprs = []
+        for col in columns:
+            if col not in fitted:
+                fitted[col] = float(stats.yeojohnson_normmax(self._sample(clone_df, col)))
+            lmbda = fitted[col]
+
+            x = pl.col(col).cast(pl.Float64)
+            # Positive branch
+            if abs(lmbda) < LAMBDA_EPS:
+                positive = (x + 1).log()
+            else:
+                positive = ((x + 1).pow(lmbda) - 1) / lmbda
+            # Negative branch
+            if abs(lmbda - 2) < LAMBDA_EPS:
+                negative = -(1 - x).log()
+            else:
+                negative = -((1 - x).pow(2 - lmbda) - 1) / (2 - lmbda)
+            exprs.append(pl.when(x >= 0).then(positive).otherwise(negative).alias(col))
+
+        self.stats.invalidate(columns)
+        return clone_df.with_columns(exprs)
+
+    def _quantile_normalize(self, df: pl.DataFrame, config: Dict[str, Any]) -> pl.DataFrame:
+        """
+        Maps the specified columns of the given DataFrame to a uniform or normal distribution through their
+        quantiles. The quantile table of each column (n_quantiles values, 100 by default) is fitted on a sample
+        of the column and values are linearly interpolated between its entries.
+
+        :param df: The DataFrame to normalize.
+        :type df: polars.DataFrame
+        :param config: The quantile configuration with the keys columns, output_distribution (uniform or normal)
+            and n_quantiles.
+        :type config: Dict
+        :return: The normalized DataFrame.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If the output distribution is unknown.
+        """
+        clone_df = df.clone()
+        columns = self._numeric_columns(clone_df, config.get("columns") or [])
+        distribution = config.get("output_distribution", "uniform")
+        if distribution not in ("uniform", "normal"):
+            raise ValueError(f"Unknown quantile output distribution {distribution}, use uniform or normal")
+        n_quantiles = config.get("n_quantiles", 100)
+        references = np.linspace(0, 1, n_quantiles)
+        fitted = self.fitted_params.setdefault("quantile", {})
+
+        exprs = []
+        for col in columns:
+            if col not in fitted:
+                sample = self._sample(clone_df, col)
+                fitted[col] = np.quantile(sample, references).tolist() if len(sample) > 0 else []
+            if len(fitted[col]) == 0:
+                continue
+            uniform = _interpolate(pl.col(col).cast(pl.Float64), fitted[col])
+            if distribution == "normal":
+                # The inverse normal CDF is a numpy ufunc applied to the whole column, clipped to keep the extremes
+                # finite
+                uniform = special.ndtri(uniform.clip(1e-7, 1 - 1e-7))
+            exprs.append(uniform.fill_nan(None).alias(col))
+
+        if len(exprs) == 0:
+            return clone_df
+
+        self.stats.invalidate(columns)
+        return clone_df.with_columns(exprs)
+
+
+def _scale(offset: pl.Expr, scale: pl.Expr) -> pl.Expr:
+    """
+    Divide the offsets of the values by a range or standard deviation. A zero scale (a constant or single-row
+    group) maps the values to 0, nulls stay null.
+
+    :param offset: The values minus the min or mean.
+    :type offset: polars.Expr
+    :param scale: The range or standard deviation.
+    :type scale: polars.Expr
+    :returns: The scaled values.
+    :rtype: polars.Expr
+    """
+    return pl.when(scale == 0).then(offset * 0.0).otherwise(offset / scale)
+
+
+def _interpolate(values: pl.Expr, table: List[float]) -> pl.Expr:
+    """
+    Map values to their position in a sorted quantile table of evenly spaced quantiles, interpolating linearly
+    between the two surrounding quantiles like ``numpy.interp``. Values outside of the table are clipped to 0 and 1.
+
+    :param values: The values.
+    :type values: polars.Expr
+    :param table: The quantiles, sorted ascending.
+    :type table: List[float]
+    :returns: The positions between 0 and 1.
+    :rtype: polars.Expr
+    """
+    if len(table) == 1:
+        return values * 0.0
+    quantiles = pl.lit(pl.Series(table, dtype=pl.Float64))
+    # The last quantile not greater than the value, so the value lies between the quantiles i and i + 1
+    i = (quantiles.search_sorted(values, side="right").cast(pl.Int64) - 1).clip(0, len(table) - 2)
+    low, high = quantiles.take(i), quantiles.take(i + 1)
+    # Equal quantiles (repeated values) are a step
+    step = (values >= high).cast(pl.Float64)
+    fraction = pl.when(high == low).then(step).otherwise(((values - low) / (high - low)).clip(0.0, 1.0))
+    return (i + fraction) / (len(table) - 1)
@@ -0,0 +1,87 @@
+import polars as pl
+from proxiflow.config import Config
+from .cleaner import Cleaner
+from .engineer import Engineer
+from .normalizer import Normalizer
+from .planner import ExecutionPlan
+from .profiler import StatsIndex
+from .selector import Selector
+from .state import IncrementalState
+from .transformer import Transformer
+
+from typing import List, Optional, Tuple, Union, cast
+
+# Names of the stages (their config sections) in pipeline order, e.g. the checkpoint names of their outputs
+STAGES = ["data_cleaning", "data_normalization", "feature_engineering", "custom_transforms", "feature_selection"]
+# The stages of a run in pipeline order
+Stages = Tuple[Cleaner, Normalizer, Engineer, Transformer, Selector]
+Stage = Union[Cleaner, Normalizer, Engineer, Transformer, Selector]
+
+
+def build_stages(
+    config: Config, state: Optional[IncrementalState] = None, stats: Optional[StatsIndex] = None
+) -> Stages:
+    """
+    Create the stages of a run. Every run mode builds its stages here, so a new stage is wired into all of them.
+
+    :param config: The configuration.
+    :type config: Config
+    :param state: Running statistics of previous incremental runs, if incremental.
+    :type state: Optional[IncrementalState]
+    :param stats: The profiled statistics of the input, reused by cleaning and normalization.
+    :type stats: Optional[StatsIndex]
+    :returns: The stages in pipeline order.
+    :rtype: Stages
+
+    :raises ValueError: If the persisted feature selection can not be parsed.
+    """
+    return (
+        Cleaner(config, state, stats),
+        Normalizer(config, state, stats),
+        Engineer(config, state),
+        Transformer(config),
+        Selector(config),
+    )
+
+
+def named_stages(stages: Stages) -> List[Tuple[str, Stage]]:
+    """
+    Pair the stages with their names.
+
+    :param stages: The stages of the run.
+    :type stages: Stages
+    :returns: The name and the stage of every stage, in pipeline order.
+    :rtype: List[Tuple[str, Stage]]
+    """
+    return list(zip(STAGES, cast(Tuple[Stage, ...], stages)))
+
+
+def fit_on_sample(sample: pl.DataFrame, stages: Stages) -> None:
+    """
+    Fit the stage parameters on a sample, each stage on the output of the preceding ones. A persisted feature
+    selection is kept.
+
+    :param sample: The sample.
+    :type sample: polars.DataFrame
+    :param stages: The stages of the run.
+    :type stages: Stages
+    """
+    cleaner, normalizer, engineer, transformer, selector = stages
+    engineered = engineer.fit(normalizer.fit(cleaner.fit(sample)))
+    if selector.config and selector.columns is None:
+        selector.fit(transformer.execute(engineered))
+
+
+def build_plan(df: pl.DataFrame, stages: Stages) -> ExecutionPlan:
+    """
+    Plan the operations of all stages as one column-dependency DAG, so that independent operations of all stages
+    run concurrently.
+
+    :param df: The DataFrame to process.
+    :type df: polars.DataFrame
+    :param stages: The stages of the run.
+    :type stages: Stages
+    :returns: The execution plan.
+    :rtype: ExecutionPlan
+    """
+    return ExecutionPlan([operation for stage in stages for operation in stage.operations(df)])
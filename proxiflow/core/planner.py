@@ -0,0 +1,137 @@
+import os
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import Callable, Iterable, List, Optional, cast
+
+
+class Operation:
+    """
+    A single configured transform together with the columns it reads and writes.
+
+    A regular operation returns a DataFrame holding only the columns it writes, with the same number of rows as its
+    input. An expression operation gives polars expressions instead of a function; the expressions of all such
+    operations of a layer are fused into one ``with_columns``. A barrier operation (e.g. dropping rows or sorting)
+    returns the whole new DataFrame and runs alone.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None,
+        reads: Iterable[str] = (),
+        writes: Iterable[str] = (),
+        barrier: bool = False,
+        exprs: Optional[List[pl.Expr]] = None,
+    ):
+        """
+        Initialize a new Operation object.
+
+        :param name: The name shown in the plan, e.g. "data_normalization.min_max(Age)".
+        :type name: str
+        :param func: The function computing the written columns (or the new DataFrame for a barrier).
+        :type func: Optional[Callable[[polars.DataFrame], polars.DataFrame]]
+        :param reads: The columns the operation reads.
+        :type reads: Iterable[str]
+        :param writes: The columns the operation creates or replaces.
+        :type writes: Iterable[str]
+        :param barrier: Whether the operation changes the rows or the column layout of the DataFrame.
+        :type barrier: bool
+        :param exprs: Expressions computing the written columns, used instead of a function.
+        :type exprs: Optional[List[polars.Expr]]
+
+        :raises ValueError: If neither a function nor expressions are given.
+        """
+        if func is None and exprs is None:
+            raise ValueError(f"Operation {name} needs a function or expressions")
+        self.name = name
+        self.func = func
+        self.reads = set(reads)
+        self.writes = set(writes)
+        self.barrier = barrier
+        self.exprs = exprs
+
+
+class ExecutionPlan:
+    """
+    A column-dependency DAG of operations, scheduled in layers of independent operations.
+
+    An operation depends on an earlier one if it reads or writes a column the earlier one writes, or if either of
+    them is a barrier. All operations of a layer run on the same input DataFrame on a thread pool and their
+    output columns are combined in one ``with_columns``. An operation that only overwrites a column an earlier
+    operation reads can therefore share its layer.
+    """
+
+    def __init__(self, operations: List[Operation]):
+        """
+        Initialize a new ExecutionPlan object and schedule the operations.
+
+        :param operations: The operations in their configured order.
+        :type operations: List[Operation]
+        """
+        self.operations = operations
+        self.layers: List[List[Operation]] = []
+
+        levels: List[int] = []
+        for j, op in enumerate(operations):
+            level = 0
+            for i in range(j):
+                earlier = operations[i]
+                if earlier.barrier or op.barrier or earlier.writes & (op.reads | op.writes):
+                    level = max(level, levels[i] + 1)
+                elif earlier.reads & op.writes:
+                    # Write after read: the earlier operation must see the old values, the same layer suffices
+                    level = max(level, levels[i])
+            levels.append(level)
+            if level == len(self.layers):
+                self.layers.append([])
+            self.layers[level].append(op)
+
+    def execute(self, df: pl.DataFrame, workers: Optional[int] = None) -> pl.DataFrame:
+        """
+        Run the operations layer by layer.
+
+        :param df: The DataFrame to transform.
+        :type df: polars.DataFrame
+        :param workers: The number of threads running the operations of a layer (default: number of CPUs).
+        :type workers: Optional[int]
+        :returns: The transformed DataFrame.
+        :rtype: polars.DataFrame
+        """
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for layer in self.layers:
+                if layer[0].barrier:
+                    df = cast(Callable[[pl.DataFrame], pl.DataFrame], layer[0].func)(df)
+                    continue
+                exprs = [expr for op in layer if op.exprs is not None for expr in op.exprs]
+                funcs = [cast(Callable[[pl.DataFrame], pl.DataFrame], op.func) for op in layer if op.exprs is None]
+                if len(funcs) <= 1 or workers == 1:
+                    outputs = [func(df) for func in funcs]
+                else:
+                    snapshot = df
+                    outputs = list(executor.map(lambda func: func(snapshot), funcs))
+                if exprs:
+                    outputs.append(df.select(exprs))
+                df = df.with_columns([series for output in outputs for series in output])
+        return df
+
+    def explain(self) -> str:
+        """
+        Describe the schedule: the layers and the columns every operation reads and writes.
+
+        :returns: The plan as text.
+        :rtype: str
+        """
+        lines = [f"Execution plan: {len(self.operations)} operations in {len(self.layers)} layers"]
+        for level, layer in enumerate(self.layers):
+            if layer[0].barrier:
+                kind = "barrier"
+            else:
+                kind = "1 operation" if len(layer) == 1 else f"{len(layer)} concurrent operations"
+            lines.append(f"layer {level} ({kind}):")
+            for op in layer:
+                reads = ", ".join(sorted(op.reads)) or "-"
+                writes = ", ".join(sorted(op.writes)) or "-"
+                lines.append(f"  {op.name}  reads [{reads}]  writes [{writes}]")
+        return "\n".join(lines)
@@ -0,0 +1,174 @@
+import json
+import polars as pl
+from proxiflow.config import Config
+
+from typing import Dict, Any, List, Optional, Tuple
+
+# Quantiles read by the outlier handling
+DEFAULT_QUANTILES = [0.25, 0.5, 0.75]
+
+
+class StatsIndex:
+    """
+    Per-column statistics shared by the pipeline stages.
+
+    The index is filled by a single profiling pass. Stages read their statistics from it instead of rescanning
+    the columns and invalidate the columns they modify, so stale statistics are never used.
+    """
+
+    def __init__(self, stats: Optional[Dict[str, Dict[str, Any]]] = None, rows: int = 0):
+        """
+        Initialize a new StatsIndex object.
+
+        :param stats: A dictionary mapping column names to dictionaries of statistic names and values.
+        :type stats: Optional[Dict[str, Dict]]
+        :param rows: The number of rows the statistics were computed on.
+        :type rows: int
+        """
+        self.stats: Dict[str, Dict[str, Any]] = stats or {}
+        self.rows = rows
+
+    def get(self, col: str, stat: str) -> Optional[Any]:
+        """
+        Get a statistic of a column.
+
+        :param col: The column name.
+        :type col: str
+        :param stat: The statistic name, e.g. "mean" or "q0.25".
+        :type stat: str
+        :returns: The value of the statistic or None if it is unknown or was invalidated.
+        :rtype: Optional[Any]
+        """
+        return self.stats.get(col, {}).get(stat)
+
+    def has(self, col: str, *stats: str) -> bool:
+        """
+        Check that all the given statistics of a column are known.
+
+        :param col: The column name.
+        :type col: str
+        :param stats: The statistic names.
+        :type stats: str
+        :returns: True if every statistic is known.
+        :rtype: bool
+        """
+        return all(self.get(col, stat) is not None for stat in stats)
+
+    def invalidate(self, columns: Optional[List[str]] = None) -> None:
+        """
+        Drop the statistics of modified columns.
+
+        :param columns: The modified columns. If not given, all statistics are dropped.
+        :type columns: Optional[List[str]]
+        """
+        if columns is None:
+            self.stats = {}
+            return
+        for col in columns:
+            self.stats.pop(col, None)
+
+    def copy(self) -> "StatsIndex":
+        """
+        Copy the index, e.g. for stages invalidating statistics independently of each other.
+
+        :returns: The copy.
+        :rtype: StatsIndex
+        """
+        return StatsIndex({col: dict(stats) for col, stats in self.stats.items()}, self.rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the index as a JSON compatible dictionary.
+
+        :returns: The number of rows and the per-column statistics.
+        :rtype: Dict
+        """
+        return {"rows": self.rows, "columns": self.stats}
+
+    def write(self, file_path: str) -> None:
+        """
+        Write the index as a JSON profile report.
+
+        :param file_path: The path to the report file.
+        :type file_path: str
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+
+class Profiler:
+    """
+    A class for profiling the columns of a DataFrame in a single aggregation pass.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize a new Profiler object with the specified configuration.
+
+        :param config: A Config object containing the profiling configuration values.
+        :type config: Config
+        """
+        self.config = config.profiling_config
+        self.cleaning_config: Dict[str, Any] = config.config.get("data_cleaning") or {}
+
+    def profile(self, df: pl.DataFrame) -> StatsIndex:
+        """
+        Compute the statistics of all columns in one ``select``.
+
+        All columns get their null count and an estimate of their distinct values. Int64 and Float64 columns also
+        get min, max, mean, population variance and standard deviation, and the sort-based statistics of
+        :meth:`sort_statistics`.
+
+        :param df: The DataFrame to profile.
+        :type df: polars.DataFrame
+        :returns: The statistics index.
+        :rtype: StatsIndex
+        """
+        median, quantiles = self.sort_statistics()
+
+        exprs = []
+        for col in df.columns:
+            exprs += [
+                pl.col(col).null_count().alias(f"{col}:null_count"),
+                pl.col(col).approx_unique().alias(f"{col}:distinct"),
+            ]
+            if df[col].dtype == pl.Int64 or df[col].dtype == pl.Float64:
+                exprs += [
+                    pl.col(col).min().alias(f"{col}:min"),
+                    pl.col(col).max().alias(f"{col}:max"),
+                    pl.col(col).mean().alias(f"{col}:mean"),
+                    pl.col(col).var(ddof=0).alias(f"{col}:var"),
+                    pl.col(col).std(ddof=0).alias(f"{col}:std"),
+                ]
+                if median:
+                    exprs.append(pl.col(col).median().alias(f"{col}:median"))
+                # Nearest interpolation matches the default of Series.quantile used by the stages
+                exprs += [pl.col(col).quantile(q).alias(f"{col}:q{q}") for q in quantiles]
+
+        stats: Dict[str, Dict[str, Any]] = {col: {"dtype": str(df[col].dtype)} for col in df.columns}
+        if len(exprs) > 0:
+            for name, value in df.select(exprs).row(0, named=True).items():
+                col, stat = name.rsplit(":", 1)
+                stats[col][stat] = value
+
+        return StatsIndex(stats, rows=df.shape[0])
+
+    def sort_statistics(self) -> Tuple[bool, List[float]]:
+        """
+        Get the statistics that sort the columns and are only computed when used: the median of median filling,
+        the quartiles and median of the outlier handling and the quantiles listed under profiling.quantiles. A
+        profile report gets all of them.
+
+        :returns: Whether to compute the median and the quantiles to compute.
+        :rtype: Tuple[bool, List[float]]
+        """
+        report = bool(self.config.get("report"))
+        missing_values = self.cleaning_config.get("handle_missing_values") or {}
+        strategies = [
+            spec if isinstance(spec, str) else (spec or {}).get("strategy")
+            for spec in (missing_values.get("columns") or {}).values()
+        ]
+        outliers = report or bool(self.cleaning_config.get("handle_outliers"))
+        median = outliers or bool(missing_values.get("median")) or "median" in strategies
+        quantiles = DEFAULT_QUANTILES if outliers else []
+        return median, sorted(set(quantiles + list(self.config.get("quantiles") or [])))
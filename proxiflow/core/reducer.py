@@ -0,0 +1,202 @@
+import numpy as np
+import polars as pl
+from scipy import sparse
+from sklearn.decomposition import IncrementalPCA
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.utils import gen_batches
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Supported dimensionality reduction methods
+METHODS = ["pca", "random_projection"]
+# Rows converted to a dense float32 matrix at a time
+DEFAULT_BATCH_SIZE = 10000
+
+
+class Reducer:
+    """
+    Dimensionality reduction of numeric feature columns in float32: incremental PCA or sparse random projection.
+
+    The columns are converted to dense float32 matrices batch by batch, so wide feature sets (e.g. one-hot
+    encodings) never exist as a whole as a dense matrix. PCA is fitted with one partial fit per batch. The fitted
+    fill values, mean and components can be persisted and loaded by transform-only runs.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize a new Reducer object.
+
+        :param config: The dimensionality reduction configuration.
+        :type config: Dict
+
+        :raises ValueError: If the method is unknown or n_components is not a positive number.
+        """
+        self.method: str = config.get("method", "pca")
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown dimensionality reduction method {self.method}. Supported: {', '.join(METHODS)}")
+        self.n_components = int(config.get("n_components") or 0)
+        if self.n_components <= 0:
+            raise ValueError("dimensionality_reduction.n_components must be a positive number")
+        self.config = config
+        self.batch_size: int = config.get("batch_size") or DEFAULT_BATCH_SIZE
+        # Fitted input columns, their fill values for nulls, the PCA mean and the components (n_components x columns)
+        self.columns: Optional[List[str]] = None
+        self.fill: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        # A numpy.ndarray or a scipy.sparse.csr_matrix, scipy has no type information
+        self.components: Any = None
+
+    @property
+    def output_columns(self) -> List[str]:
+        """
+        Get the names of the component columns, e.g. "pca_0".
+
+        :returns: The column names.
+        :rtype: List[str]
+        """
+        prefix = self.config.get("prefix") or self.method
+        return [f"{prefix}_{i}" for i in range(self.n_components)]
+
+    def input_columns(self, df: pl.DataFrame) -> List[str]:
+        """
+        Get the columns to reduce: the configured columns or all numeric columns except the excluded ones.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :returns: The columns.
+        :rtype: List[str]
+
+        :raises ValueError: If a configured column is missing or not numeric.
+        """
+        columns = self.config.get("columns")
+        if not columns:
+            exclude = set(self.config.get("exclude") or [])
+            return [col for col in df.columns if df[col].dtype in pl.NUMERIC_DTYPES and col not in exclude]
+        invalid = [col for col in columns if col not in df.columns or df[col].dtype not in pl.NUMERIC_DTYPES]
+        if len(invalid) > 0:
+            raise ValueError(f"Columns for dimensionality reduction are missing or not numeric: {', '.join(invalid)}")
+        return list(columns)
+
+    def fit(self, df: pl.DataFrame) -> None:
+        """
+        Fit the reduction on the rows of a DataFrame, batch by batch.
+
+        :param df: The DataFrame to fit on.
+        :type df: polars.DataFrame
+
+        :raises ValueError: If there are fewer rows or columns than components for PCA.
+        """
+        columns = self.input_columns(df)
+        if len(columns) == 0:
+            raise ValueError("No numeric columns for dimensionality reduction")
+        means = df.select([pl.col(col).cast(pl.Float64).mean() for col in columns]).row(0)
+        self.columns = columns
+        self.fill = np.array([mean if mean is not None else 0.0 for mean in means], dtype=np.float32)
+
+        if self.method == "pca":
+            if self.n_components > min(df.shape[0], len(columns)):
+                raise ValueError(
+                    f"PCA with {self.n_components} components needs at least as many rows and columns, got "
+                    f"{df.shape[0]} rows and {len(columns)} columns"
+                )
+            pca = IncrementalPCA(n_components=self.n_components)
+            for _, batch in self._batches(df, min_batch_size=self.n_components):
+                pca.partial_fit(batch)
+            self.mean = pca.mean_.astype(np.float32)
+            self.components = pca.components_.astype(np.float32)
+        else:
+            density = self.config.get("density", "auto")
+            projection = SparseRandomProjection(
+                n_components=self.n_components, density=density, random_state=self.config.get("seed", 0)
+            )
+            # Only the number of features is needed to draw the projection matrix
+            projection.fit(np.zeros((1, len(columns)), dtype=np.float32))
+            self.components = sparse.csr_matrix(projection.components_, dtype=np.float32)
+
+    def transform(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Project the rows of a DataFrame onto the fitted components, batch by batch.
+
+        :param df: The DataFrame to transform.
+        :type df: polars.DataFrame
+        :returns: The Float32 component columns.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If the reduction is not fitted or a fitted column is missing.
+        """
+        if self.components is None or self.columns is None:
+            raise ValueError("The dimensionality reduction is not fitted")
+        missing = [col for col in self.columns if col not in df.columns]
+        if len(missing) > 0:
+            raise ValueError(f"Columns for dimensionality reduction are missing in the DataFrame: {', '.join(missing)}")
+
+        projected = np.empty((df.shape[0], self.n_components), dtype=np.float32)
+        for rows, batch in self._batches(df):
+            if self.mean is not None:
+                batch -= self.mean
+            # Sparse components multiply without densifying the projection matrix
+            projected[rows] = np.asarray(self.components @ batch.T).T
+        return pl.DataFrame(
+            [pl.Series(name, projected[:, i]) for i, name in enumerate(self.output_columns)]
+        )
+
+    def _batches(self, df: pl.DataFrame, min_batch_size: int = 0) -> Iterator[Tuple[slice, np.ndarray]]:
+        """
+        Convert the fitted columns to dense float32 matrices batch by batch, nulls filled with the fitted means.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :param min_batch_size: The minimum rows of a batch, a smaller last batch is merged into the one before.
+        :type min_batch_size: int
+        :returns: The row slices and their matrices.
+        :rtype: Iterator[Tuple[slice, numpy.ndarray]]
+        """
+        columns, fill = self.columns or [], self.fill if self.fill is not None else np.empty(0)
+        exprs = [pl.col(col).cast(pl.Float32).fill_null(float(value)) for col, value in zip(columns, fill)]
+        for rows in gen_batches(df.shape[0], self.batch_size, min_batch_size=min_batch_size):
+            batch = df[rows].select(exprs).to_numpy()
+            yield rows, np.ascontiguousarray(batch, dtype=np.float32)
+
+    def save(self, file_path: str) -> None:
+        """
+        Persist the fitted reduction as a NumPy npz archive.
+
+        :param file_path: The path to the components file.
+        :type file_path: str
+        """
+        arrays: Dict[str, Any] = {"method": self.method, "columns": np.array(self.columns), "fill": self.fill}
+        if isinstance(self.components, sparse.csr_matrix):
+            arrays.update(
+                data=self.components.data,
+                indices=self.components.indices,
+                indptr=self.components.indptr,
+                shape=np.array(self.components.shape),
+            )
+        else:
+            arrays.update(mean=self.mean, components=self.components)
+        with open(file_path, "wb") as f:
+            np.savez(f, **arrays)
+
+    def load(self, file_path: str) -> None:
+        """
+        Load a persisted reduction.
+
+        :param file_path: The path to the components file.
+        :type file_path: str
+
+        :raises ValueError: If the file was written for another method or number of components.
+        """
+        with np.load(file_path, allow_pickle=False) as archive:
+            if str(archive["method"]) != self.method:
+                raise ValueError(f"Components file {file_path} was fitted with method {archive['method']}")
+            columns = [str(col) for col in archive["columns"]]
+            fill = archive["fill"]
+            if "components" in archive:
+                mean, components = archive["mean"], archive["components"]
+            else:
+                mean = None
+                shape = tuple(archive["shape"])
+                components = sparse.csr_matrix((archive["data"], archive["indices"], archive["indptr"]), shape=shape)
+        if components.shape[0] != self.n_components:
+            raise ValueError(f"Components file {file_path} has {components.shape[0]} components")
+        self.columns, self.fill, self.mean, self.components = columns, fill, mean, components
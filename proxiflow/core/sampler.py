@@ -0,0 +1,142 @@
+import numpy as np
+import polars as pl
+from proxiflow.config import Config
+
+from typing import List, Optional, cast
+
+# Helper columns of the reservoir: the random priority and the position of the row in the input
+PRIORITY_COLUMN = "__proxiflow_priority"
+ROW_COLUMN = "__proxiflow_row"
+
+
+class Sampler:
+    """
+    A class for drawing a reproducible reservoir sample from one or more batches of rows.
+
+    Every row gets a random priority from a generator with a fixed seed and the reservoir keeps the rows with the
+    highest priorities, which is a uniform sample without replacement. Batches are folded in one by one, so the
+    rows are only passed over once and never have to be in memory at the same time. With stratify_by the reservoir
+    is kept per stratum and the sample is allocated proportionally to the stratum sizes, with at least one row per
+    stratum.
+    """
+
+    def __init__(self, config: Config, size: Optional[int] = None, stratify_by: Optional[List[str]] = None):
+        """
+        Initialize a new Sampler object with the specified configuration.
+
+        :param config: A Config object containing the sampling configuration values.
+        :type config: Config
+        :param size: The sample size, used instead of sampling.size (e.g. the rows that fit the memory budget).
+        :type size: Optional[int]
+        :param stratify_by: The strata, used instead of sampling.stratify_by (an empty list for a uniform sample).
+        :type stratify_by: Optional[List[str]]
+
+        :raises ValueError: If no sample size is configured.
+        """
+        self.config = config.sampling_config
+        if not size and not self.config.get("size"):
+            raise ValueError("sampling.size is required to fit on a sample")
+        self.size: int = size or self.config["size"]
+        if stratify_by is None:
+            stratify_by = self.config.get("stratify_by") or []
+        self.stratify_by: List[str] = [stratify_by] if isinstance(stratify_by, str) else list(stratify_by)
+        self.rng = np.random.default_rng(self.config.get("seed", 0))
+        self.rows = 0
+        self.reservoir: Optional[pl.DataFrame] = None
+        # Number of rows seen per stratum
+        self.counts: Optional[pl.DataFrame] = None
+
+    def add(self, df: pl.DataFrame) -> None:
+        """
+        Fold a batch of rows into the reservoir.
+
+        :param df: The batch.
+        :type df: polars.DataFrame
+
+        :raises ValueError: If a stratify_by column is missing.
+        """
+        missing = [col for col in self.stratify_by if col not in df.columns]
+        if len(missing) > 0:
+            raise ValueError(f"stratify_by columns are missing in the DataFrame: {', '.join(missing)}")
+
+        priorities = self.rng.random(df.shape[0])
+        offset = self.rows
+        self.rows += df.shape[0]
+
+        if self.stratify_by:
+            counts = df.groupby(self.stratify_by).count().with_columns(pl.col("count").cast(pl.Int64))
+            if self.counts is not None:
+                counts = pl.concat([self.counts, counts]).groupby(self.stratify_by).agg(pl.col("count").sum())
+            self.counts = counts
+            # Keep up to size rows per stratum, the final allocation needs the sizes of all strata. Rows that are
+            # not kept within their batch can not be kept overall.
+            keep = pl.col(PRIORITY_COLUMN).rank("ordinal", descending=True).over(self.stratify_by) <= self.size
+            batch = df.with_row_count(ROW_COLUMN, offset=offset).with_columns(pl.Series(PRIORITY_COLUMN, priorities))
+            batch = batch.filter(keep)
+            self.reservoir = batch if self.reservoir is None else pl.concat([self.reservoir, batch]).filter(keep)
+            return
+
+        # Pick the rows by their priorities before copying any of them. Once the reservoir is full only rows above
+        # its lowest priority can enter it.
+        rows = np.arange(df.shape[0])
+        if self.reservoir is not None and self.reservoir.shape[0] >= self.size:
+            rows = np.flatnonzero(priorities > cast(float, self.reservoir[PRIORITY_COLUMN].min()))
+        rows = _top(priorities, rows, self.size)
+        batch = df[rows].with_columns(
+            [
+                pl.Series(ROW_COLUMN, rows + offset, dtype=pl.UInt32),
+                pl.Series(PRIORITY_COLUMN, priorities[rows]),
+            ]
+        )
+        if self.reservoir is not None:
+            merged = np.concatenate([self.reservoir[PRIORITY_COLUMN].to_numpy(), priorities[rows]])
+            picked = _top(merged, np.arange(merged.shape[0]), self.size)
+            kept = self.reservoir.shape[0]
+            batch = pl.concat([self.reservoir[picked[picked < kept]], batch[picked[picked >= kept] - kept]])
+        self.reservoir = batch
+
+    def sample(self, df: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+        """
+        Get the sample in the original row order.
+
+        :param df: A batch to fold in first. Sampling a single DataFrame is ``Sampler(config).sample(df)``.
+        :type df: Optional[polars.DataFrame]
+        :returns: The sampled rows.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If no rows were added.
+        """
+        if df is not None:
+            self.add(df)
+        if self.reservoir is None:
+            raise ValueError("No rows were added to the sample")
+
+        sample = self.reservoir
+        if self.stratify_by and self.counts is not None:
+            # Proportional allocation over the strata of all rows seen, at least one row per stratum
+            quota = (pl.col("count") * self.size / self.rows).round(0).clip_min(1).cast(pl.UInt32).alias("quota")
+            rank = pl.col(PRIORITY_COLUMN).rank("ordinal", descending=True).over(self.stratify_by)
+            sample = (
+                sample.join(self.counts.select(self.stratify_by + [quota]), on=self.stratify_by, how="left")
+                .filter(rank <= pl.col("quota"))
+                .drop("quota")
+            )
+        return sample.sort(ROW_COLUMN).drop([ROW_COLUMN, PRIORITY_COLUMN])
+
+
+def _top(priorities: np.ndarray, rows: np.ndarray, size: int) -> np.ndarray:
+    """
+    Select the rows with the highest priorities.
+
+    :param priorities: The priorities of all rows.
+    :type priorities: numpy.ndarray
+    :param rows: The indices of the candidate rows.
+    :type rows: numpy.ndarray
+    :param size: The number of rows to select.
+    :type size: int
+    :returns: The sorted indices of at most size rows, as UInt32 like the polars row indices.
+    :rtype: numpy.ndarray
+    """
+    if rows.shape[0] > size:
+        rows = rows[np.argpartition(-priorities[rows], size - 1)[:size]]
+    return np.sort(rows).astype(np.uint32)
@@ -0,0 +1,293 @@
+import json
+import os
+import numpy as np
+import polars as pl
+from proxiflow.config import Config
+from .core_utils import guarded
+from .planner import Operation
+
+from typing import Dict, List, Optional, Set, Tuple
+
+# Columns per block of the correlation matrix
+DEFAULT_BLOCK_SIZE = 256
+# Rows the correlation matrix is computed on
+DEFAULT_CORRELATION_SAMPLE = 100000
+
+# Standardized columns and where their values are not null (None without nulls)
+Block = Tuple[np.ndarray, Optional[np.ndarray]]
+
+
+class Selector:
+    """
+    A class for selecting features by null ratio, variance and pairwise correlation.
+
+    The selection runs after the feature engineering and custom transforms. It is computed once, on the first
+    DataFrame it sees or on a sample (see :meth:`fit`), and then applied as is, so every batch of an incremental or
+    chunked run gets the same columns. The selected columns can be persisted and reused by later runs.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize a new Selector object with the specified configuration. A persisted selection is loaded.
+
+        :param config: A Config object containing the feature selection configuration values.
+        :type config: Config
+
+        :raises ValueError: If the persisted selection can not be parsed.
+        """
+        self.config = config.feature_selection_config
+        # The selected columns, None until fitted
+        self.columns: Optional[List[str]] = None
+        # The dropped columns and why they were dropped
+        self.dropped: Dict[str, str] = {}
+        columns_file = self.config.get("columns_file")
+        if columns_file and os.path.exists(columns_file):
+            self.load(columns_file)
+
+    def execute(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Select the features of the specified DataFrame, fitting the selection first if needed.
+
+        :param df: The DataFrame to select features from.
+        :type df: polars.DataFrame
+        :return: The DataFrame with the selected columns.
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If a selected column is missing in the DataFrame.
+        """
+        if self.columns is None:
+            return self.fit(df)
+        missing = [col for col in self.columns if col not in df.columns]
+        if len(missing) > 0:
+            raise ValueError(f"Selected feature columns are missing in the DataFrame: {', '.join(missing)}")
+        return df.select(self.columns)
+
+    def fit(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Fit the selection, e.g. on a sample, and persist it if a columns_file is configured. Following runs select
+        the same columns from all rows.
+
+        :param df: The DataFrame to fit on.
+        :type df: polars.DataFrame
+        :return: The DataFrame with the selected columns.
+        :rtype: polars.DataFrame
+        """
+        self.columns = self.select(df)
+        columns_file = self.config.get("columns_file")
+        if columns_file:
+            self.save(columns_file)
+        return df.select(self.columns)
+
+    def operations(self, df: pl.DataFrame) -> List[Operation]:
+        """
+        Build the selection operation for the execution planner. Dropping columns changes the column layout, so
+        it is a barrier.
+
+        Example configuration::
+
+            feature_selection:
+              max_null_ratio: 0.5            # drop columns with a larger share of nulls
+              min_variance: 0.0              # drop numeric columns with a variance of at most this
+              max_correlation: 0.95          # drop the later column of each pair with a larger absolute correlation
+              block_size: 256                # not mandatory, columns per block of the correlation matrix
+              correlation_sample: 100000     # not mandatory, rows the correlations are computed on
+              keep: [Target]                 # not mandatory, never dropped
+              columns_file: features.json    # not mandatory, persisted selection reused by later runs
+
+        :param df: The DataFrame to select features from.
+        :type df: polars.DataFrame
+        :return: The selection operation, none if feature selection is not configured.
+        :rtype: List[Operation]
+        """
+        if not self.config:
+            return []
+        func = guarded(self.execute, "Trying feature selection")
+        return [Operation("feature_selection.select", func, reads=df.columns, barrier=True)]
+
+    def select(self, df: pl.DataFrame) -> List[str]:
+        """
+        Compute the selected columns. Null ratios and variances are computed in one aggregation pass; the
+        correlations of the remaining numeric columns are computed block by block.
+
+        :param df: The DataFrame to select features from.
+        :type df: polars.DataFrame
+        :return: The selected columns in their original order.
+        :rtype: List[str]
+
+        :raises ValueError: If a threshold is invalid or a kept column is missing.
+        """
+        keep = set(self.config.get("keep") or [])
+        missing = sorted(keep - set(df.columns))
+        if len(missing) > 0:
+            raise ValueError(f"Columns to keep are missing in the DataFrame: {', '.join(missing)}")
+        max_null_ratio = self.config.get("max_null_ratio")
+        min_variance = self.config.get("min_variance")
+        max_correlation = self.config.get("max_correlation")
+        if max_correlation is not None and not 0 <= max_correlation <= 1:
+            raise ValueError(f"max_correlation must be between 0 and 1, got {max_correlation}")
+
+        self.dropped = {}
+        numeric = [col for col in df.columns if df[col].dtype in pl.NUMERIC_DTYPES]
+        if df.shape[0] > 0 and (max_null_ratio is not None or min_variance is not None):
+            exprs = [(pl.col(col).null_count() / df.shape[0]).alias(f"null_ratio:{col}") for col in df.columns]
+            exprs += [pl.col(col).cast(pl.Float64).var().alias(f"variance:{col}") for col in numeric]
+            stats = df.select(exprs).row(0, named=True)
+            for col in df.columns:
+                if col in keep:
+                    continue
+                if max_null_ratio is not None and stats[f"null_ratio:{col}"] > max_null_ratio:
+                    self.dropped[col] = f"null ratio {stats[f'null_ratio:{col}']:.3g}"
+                elif min_variance is not None and col in numeric:
+                    # A column with less than two values has no variance
+                    variance = stats[f"variance:{col}"]
+                    if variance is None or variance <= min_variance:
+                        self.dropped[col] = f"variance {variance or 0.0:.3g}"
+
+        if max_correlation is not None:
+            candidates = [col for col in numeric if col not in self.dropped]
+            self.dropped.update(self._correlated(df, candidates, max_correlation, keep))
+        return [col for col in df.columns if col not in self.dropped]
+
+    def _correlated(self, df: pl.DataFrame, columns: List[str], threshold: float, keep: Set[str]) -> Dict[str, str]:
+        """
+        Prune correlated columns greedily in column order: a column is dropped if its absolute correlation with an
+        earlier kept column exceeds the threshold. Kept columns of the keep list are never dropped.
+
+        The columns are standardized block by block, and the correlations of a block with the kept columns are
+        one matrix product per block of kept columns, so the full correlation matrix is never held in memory.
+        Columns with nulls are correlated on the rows where both columns have values (pairwise complete), with a
+        few more matrix products per block.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :param columns: The numeric candidate columns in order.
+        :type columns: List[str]
+        :param threshold: The maximum absolute correlation.
+        :type threshold: float
+        :param keep: The columns that are never dropped.
+        :type keep: Set[str]
+        :return: The dropped columns and why they were dropped.
+        :rtype: Dict[str, str]
+        """
+        rows = self.config.get("correlation_sample") or DEFAULT_CORRELATION_SAMPLE
+        if df.shape[0] > rows:
+            df = df.sample(n=rows, seed=self.config.get("seed", 0))
+        if df.shape[0] < 2:
+            return {}
+        block_size = self.config.get("block_size") or DEFAULT_BLOCK_SIZE
+
+        dropped: Dict[str, str] = {}
+        # Standardized blocks of the kept columns and their names
+        kept: List[Block] = []
+        kept_names: List[List[str]] = []
+        for start in range(0, len(columns), block_size):
+            names = columns[start : start + block_size]
+            block = self._standardize(df, names)
+            # Correlations with the kept columns of earlier blocks and within the block
+            earlier = [(self._correlate(block, other), other_names) for other, other_names in zip(kept, kept_names)]
+            within = self._correlate(block, block)
+
+            keep_mask = np.zeros(len(names), dtype=bool)
+            for i, col in enumerate(names):
+                partner = None
+                for corr, other_names in earlier:
+                    above = np.flatnonzero(np.abs(corr[i]) > threshold)
+                    if len(above) > 0:
+                        partner = (other_names[above[0]], corr[i, above[0]])
+                        break
+                if partner is None:
+                    above = np.flatnonzero(keep_mask[:i] & (np.abs(within[i, :i]) > threshold))
+                    if len(above) > 0:
+                        partner = (names[above[0]], within[i, above[0]])
+                if partner is None or col in keep:
+                    keep_mask[i] = True
+                else:
+                    dropped[col] = f"correlation {partner[1]:.3g} with {partner[0]}"
+            if keep_mask.any():
+                values, present = block
+                present = np.ascontiguousarray(present[:, keep_mask]) if present is not None else None
+                kept.append((np.ascontiguousarray(values[:, keep_mask]), present))
+                kept_names.append([col for col, flag in zip(names, keep_mask) if flag])
+        return dropped
+
+    @staticmethod
+    def _standardize(df: pl.DataFrame, columns: List[str]) -> Block:
+        """
+        Center the columns and scale them to unit norm, so that the dot product of two columns without nulls is
+        their correlation. Nulls become zeros and constant columns all zeros.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :param columns: The numeric columns.
+        :type columns: List[str]
+        :return: The standardized columns as a rows x columns float32 matrix, and a matrix of the same shape that
+            is 1 where the values are not null, or None if there are no nulls.
+        :rtype: Tuple[numpy.ndarray, Optional[numpy.ndarray]]
+        """
+        exprs = [pl.col(col).cast(pl.Float64) for col in columns]
+        present = None
+        if any(df[col].null_count() > 0 for col in columns):
+            present = df.select([expr.is_not_null() for expr in exprs]).to_numpy().astype(np.float32)
+        block = df.select([(expr - expr.mean()).fill_null(0.0) for expr in exprs]).to_numpy()
+        norms = np.linalg.norm(block, axis=0)
+        norms[norms == 0] = 1.0
+        values: np.ndarray = (block / norms).astype(np.float32)
+        return values, present
+
+    @staticmethod
+    def _correlate(a: Block, b: Block) -> np.ndarray:
+        """
+        Correlate the columns of two standardized blocks. Pairs of columns with nulls are correlated on the rows
+        where both have values, pairs with fewer than two such rows or a constant column have correlation 0.
+
+        :param a: A standardized block, see :meth:`_standardize`.
+        :type a: Tuple[numpy.ndarray, Optional[numpy.ndarray]]
+        :param b: Another standardized block.
+        :type b: Tuple[numpy.ndarray, Optional[numpy.ndarray]]
+        :return: The correlations, columns of a x columns of b.
+        :rtype: numpy.ndarray
+        """
+        (x, x_present), (y, y_present) = a, b
+        products: np.ndarray = x.T @ y
+        if x_present is None and y_present is None:
+            return products
+        x_present = x_present if x_present is not None else np.ones_like(x)
+        y_present = y_present if y_present is not None else np.ones_like(y)
+        # Sums over the rows where both columns have values, nulls are zeros in the values
+        n = (x_present.T @ y_present).astype(np.float64)
+        x_sum = (x.T @ y_present).astype(np.float64)
+        y_sum = (x_present.T @ y).astype(np.float64)
+        x_squares = ((x * x).T @ y_present).astype(np.float64)
+        y_squares = (x_present.T @ (y * y)).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = products - x_sum * y_sum / n
+            variance = (x_squares - x_sum**2 / n) * (y_squares - y_sum**2 / n)
+            correlations: np.ndarray = np.where((n >= 2) & (variance > 1e-12), covariance / np.sqrt(variance), 0.0)
+        return correlations
+
+    def load(self, file_path: str) -> None:
+        """
+        Load a persisted selection.
+
+        :param file_path: The path to the JSON columns file.
+        :type file_path: str
+
+        :raises ValueError: If the file can not be parsed.
+        """
+        try:
+            with open(file_path, "r") as f:
+                selection = json.load(f)
+            self.columns = [str(col) for col in selection["columns"]]
+            self.dropped = dict(selection.get("dropped") or {})
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Error parsing feature selection file {file_path}: {str(e)}")
+
+    def save(self, file_path: str) -> None:
+        """
+        Persist the selection as JSON: the selected columns and the dropped columns with the reason.
+
+        :param file_path: The path to the JSON columns file.
+        :type file_path: str
+        """
+        with open(file_path, "w") as f:
+            json.dump({"columns": self.columns, "dropped": self.dropped}, f, indent=2)
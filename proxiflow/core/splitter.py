@@ -0,0 +1,163 @@
+import numpy as np
+import polars as pl
+from proxiflow.config import Config
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Supported split methods
+METHODS = ["holdout", "kfold"]
+# Helper column of the split assignment
+SPLIT_COLUMN = "__proxiflow_split"
+
+
+class Splitter:
+    """
+    A class for splitting rows into train/validation/test sets or k folds in one pass.
+
+    Every row is assigned by a seeded hash of its key columns (or of its position), so the assignment is
+    reproducible and a row with the same key always lands in the same split. With group_by all rows of a group
+    share one split; with stratify_by the rows of every stratum are ranked by their hash and distributed in the
+    configured proportions, so every split gets its share of every stratum.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize a new Splitter object with the specified configuration.
+
+        :param config: A Config object containing the split configuration values.
+        :type config: Config
+
+        :raises ValueError: If the method, the fractions or the number of folds are invalid, or stratify_by and
+            group_by are both configured.
+        """
+        self.config = config.split_config
+        self.method: str = self.config.get("method", "holdout")
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown split method {self.method}. Supported: {', '.join(METHODS)}")
+        self.fractions: Dict[str, float] = dict(self.config.get("fractions") or {"train": 0.8, "val": 0.1, "test": 0.1})
+        if self.method == "holdout":
+            if len(self.fractions) < 2 or any(f <= 0 for f in self.fractions.values()):
+                raise ValueError("split.fractions needs at least two positive fractions")
+            if abs(sum(self.fractions.values()) - 1.0) > 1e-9:
+                raise ValueError(f"split.fractions must sum to 1, got {sum(self.fractions.values())}")
+        self.folds = int(self.config.get("folds") or 5)
+        if self.method == "kfold" and self.folds < 2:
+            raise ValueError("split.folds must be at least 2")
+        self.seed = int(self.config.get("seed", 0))
+        self.stratify_by = _columns(self.config.get("stratify_by"))
+        self.group_by = _columns(self.config.get("group_by"))
+        self.key = _columns(self.config.get("key"))
+        if self.stratify_by and self.group_by:
+            raise ValueError("split.stratify_by and split.group_by can not be combined")
+        self.fit_on: str = self.config.get("fit_on") or self.names[0]
+        if self.method == "holdout" and self.fit_on not in self.names:
+            raise ValueError(f"split.fit_on {self.fit_on} is not one of the splits {', '.join(self.names)}")
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Get the names of the parts rows are assigned to: the fractions of a holdout split or the folds.
+
+        :returns: The part names.
+        :rtype: List[str]
+        """
+        if self.method == "kfold":
+            return [f"fold{i}" for i in range(self.folds)]
+        return list(self.fractions)
+
+    def assign(self, df: pl.DataFrame) -> pl.Series:
+        """
+        Assign every row to a part.
+
+        :param df: The DataFrame.
+        :type df: polars.DataFrame
+        :returns: The index of the part of every row, in the order of :attr:`names`.
+        :rtype: polars.Series
+
+        :raises ValueError: If a key, group_by or stratify_by column is missing.
+        """
+        columns = self.group_by or self.key
+        missing = [col for col in columns + self.stratify_by if col not in df.columns]
+        if len(missing) > 0:
+            raise ValueError(f"Split columns are missing in the DataFrame: {', '.join(missing)}")
+
+        if columns:
+            hashes = df.select(pl.struct(columns).hash(self.seed)).to_series().to_numpy()
+        else:
+            hashes = np.arange(df.shape[0], dtype=np.uint64)
+        hashes = _mix(hashes, self.seed)
+
+        if self.stratify_by:
+            # The position of the row within its stratum, so every stratum is split in the exact proportions
+            rank = pl.col(SPLIT_COLUMN).rank("ordinal").over(self.stratify_by).cast(pl.Float64)
+            position = df.select(self.stratify_by).with_columns(pl.Series(SPLIT_COLUMN, hashes)).select(
+                ((rank - 0.5) / pl.count().over(self.stratify_by)).alias(SPLIT_COLUMN)
+            )
+            unit = position.to_series().to_numpy()
+        else:
+            unit = hashes.astype(np.float64) / 2.0**64
+
+        if self.method == "kfold":
+            parts = np.minimum((unit * self.folds).astype(np.int64), self.folds - 1)
+        else:
+            bounds = np.cumsum(list(self.fractions.values()))[:-1]
+            parts = np.searchsorted(bounds, unit, side="right")
+        return pl.Series(SPLIT_COLUMN, parts, dtype=pl.UInt8 if len(self.names) <= 255 else pl.UInt32)
+
+    def split(self, df: pl.DataFrame) -> Iterator[Tuple[str, Dict[str, pl.DataFrame]]]:
+        """
+        Split the rows. A holdout split is one run fitted on its first part (or split.fit_on) and applied to all
+        parts. A k-fold split is one run per fold, fitted on the other folds and applied to them ("fold0-train")
+        and to the fold ("fold0-val"). The training rows of a fold are only gathered when its run is reached.
+
+        :param df: The DataFrame to split.
+        :type df: polars.DataFrame
+        :returns: The runs, each the name of the split to fit on and the splits by name.
+        :rtype: Iterator[Tuple[str, Dict[str, polars.DataFrame]]]
+        """
+        assigned = df.with_columns(self.assign(df))
+        partitions = assigned.partition_by(SPLIT_COLUMN, maintain_order=True, as_dict=True)
+        empty = df.clear()
+        parts = [
+            partitions[i].drop(SPLIT_COLUMN) if i in partitions else empty for i in range(len(self.names))
+        ]
+
+        if self.method == "holdout":
+            yield self.fit_on, dict(zip(self.names, parts))
+            return
+        for i, name in enumerate(self.names):
+            train = pl.concat([part for j, part in enumerate(parts) if j != i], rechunk=False)
+            yield f"{name}-train", {f"{name}-train": train, f"{name}-val": parts[i]}
+
+
+def _columns(value: Optional[Union[str, List[str]]]) -> List[str]:
+    """
+    Normalize a column setting that is a single column or a list of columns.
+
+    :param value: The setting.
+    :type value: Optional[Union[str, List[str]]]
+    :returns: The columns.
+    :rtype: List[str]
+    """
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """
+    Scramble hashes with the seed (the splitmix64 finalizer). Integer hashes of polars are a plain multiplication
+    and ignore the seed, so row positions and integer keys would otherwise be split in a regular pattern.
+
+    :param hashes: The unsigned 64 bit hashes.
+    :type hashes: numpy.ndarray
+    :param seed: The seed.
+    :type seed: int
+    :returns: The scrambled hashes.
+    :rtype: numpy.ndarray
+    """
+    with np.errstate(over="ignore"):
+        x = hashes.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) % 2**64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
@@ -0,0 +1,367 @@
+import json
+import os
+import polars as pl
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Set
+
+
+class ColumnStats:
+    """
+    Mergeable running statistics of a single column.
+
+    Mean and variance are kept in Welford form (count, mean, sum of squared deviations) so that the statistics
+    of a new batch can be folded in without revisiting the rows that were already processed.
+    """
+
+    def __init__(
+        self,
+        count: int = 0,
+        null_count: int = 0,
+        mean: float = 0.0,
+        m2: float = 0.0,
+        min: Optional[float] = None,
+        max: Optional[float] = None,
+        vocabulary: Optional[List[str]] = None,
+        edges: Optional[List[float]] = None,
+    ):
+        """
+        Initialize a new ColumnStats object.
+
+        :param count: The number of non-null values seen so far.
+        :type count: int
+        :param null_count: The number of null values seen so far.
+        :type null_count: int
+        :param mean: The running mean of the non-null values.
+        :type mean: float
+        :param m2: The running sum of squared deviations from the mean.
+        :type m2: float
+        :param min: The smallest value seen so far.
+        :type min: Optional[float]
+        :param max: The largest value seen so far.
+        :type max: Optional[float]
+        :param vocabulary: The sorted distinct values of a string column.
+        :type vocabulary: Optional[List[str]]
+        :param edges: The quantile bin edges of a numeric column, fitted on the first run.
+        :type edges: Optional[List[float]]
+        """
+        self.count = count
+        self.null_count = null_count
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+        self.vocabulary = vocabulary
+        self.edges = edges
+
+    @property
+    def variance(self) -> float:
+        """
+        Get the population variance of the values seen so far.
+
+        :returns: The population variance (0.0 if no values were seen).
+        :rtype: float
+        """
+        if self.count == 0:
+            return 0.0
+        return self.m2 / self.count
+
+    @property
+    def std(self) -> float:
+        """
+        Get the population standard deviation of the values seen so far.
+
+        :returns: The population standard deviation.
+        :rtype: float
+        """
+        return float(self.variance**0.5)
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        """
+        Merge the statistics of another batch into a new ColumnStats object.
+
+        Uses the parallel variant of Welford's algorithm (Chan et al.), so merging is associative and the
+        result does not depend on how the rows were split into batches.
+
+        :param other: The statistics to merge with.
+        :type other: ColumnStats
+        :returns: The merged statistics.
+        :rtype: ColumnStats
+        """
+        count = self.count + other.count
+        if count == 0:
+            mean = 0.0
+            m2 = 0.0
+        else:
+            delta = other.mean - self.mean
+            mean = self.mean + delta * other.count / count
+            m2 = self.m2 + other.m2 + delta**2 * self.count * other.count / count
+
+        vocabulary = None
+        if self.vocabulary is not None or other.vocabulary is not None:
+            vocabulary = sorted(set(self.vocabulary or []) | set(other.vocabulary or []))
+
+        return ColumnStats(
+            count=count,
+            null_count=self.null_count + other.null_count,
+            mean=mean,
+            m2=m2,
+            min=_merge_bound(self.min, other.min, min),
+            max=_merge_bound(self.max, other.max, max),
+            vocabulary=vocabulary,
+            # Bin edges are fitted once and never merged
+            edges=self.edges if self.edges is not None else other.edges,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the statistics into a JSON compatible dictionary.
+
+        :returns: The statistics as a dictionary.
+        :rtype: Dict
+        """
+        return {
+            "count": self.count,
+            "null_count": self.null_count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "vocabulary": self.vocabulary,
+            "edges": self.edges,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnStats":
+        """
+        Create a ColumnStats object from a dictionary created by :meth:`to_dict`.
+
+        :param data: The serialized statistics.
+        :type data: Dict
+        :returns: The deserialized statistics.
+        :rtype: ColumnStats
+        """
+        return cls(**data)
+
+
+def _merge_bound(a: Optional[float], b: Optional[float], pick: Callable[[float, float], float]) -> Optional[float]:
+    # min/max of two optional bounds
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return pick(a, b)
+
+
+def batch_stats(df: pl.DataFrame) -> Dict[str, ColumnStats]:
+    """
+    Compute the statistics of a batch of rows in a single aggregation pass.
+
+    Only Int64, Float64 (moments and bounds) and Utf8 (vocabulary) columns are handled.
+
+    :param df: The batch to compute statistics for.
+    :type df: polars.DataFrame
+    :returns: A dictionary mapping column names to their batch statistics.
+    :rtype: Dict[str, ColumnStats]
+    """
+    numeric = [col for col in df.columns if df[col].dtype == pl.Int64 or df[col].dtype == pl.Float64]
+    strings = [col for col in df.columns if df[col].dtype == pl.Utf8]
+
+    exprs = []
+    for col in numeric:
+        exprs += [
+            pl.col(col).null_count().alias(f"{col}:null_count"),
+            pl.col(col).mean().alias(f"{col}:mean"),
+            pl.col(col).var(ddof=0).alias(f"{col}:var"),
+            pl.col(col).min().cast(pl.Float64).alias(f"{col}:min"),
+            pl.col(col).max().cast(pl.Float64).alias(f"{col}:max"),
+        ]
+    for col in strings:
+        exprs += [
+            pl.col(col).null_count().alias(f"{col}:null_count"),
+            pl.col(col).drop_nulls().unique().sort().implode().alias(f"{col}:vocabulary"),
+        ]
+    if not exprs:
+        return {}
+
+    row = df.select(exprs).row(0, named=True)
+    height = df.shape[0]
+
+    stats = {}
+    for col in numeric:
+        null_count = int(row[f"{col}:null_count"])
+        count = height - null_count
+        stats[col] = ColumnStats(
+            count=count,
+            null_count=null_count,
+            mean=float(row[f"{col}:mean"] or 0.0),
+            m2=float(row[f"{col}:var"] or 0.0) * count,
+            min=row[f"{col}:min"],
+            max=row[f"{col}:max"],
+        )
+    for col in strings:
+        null_count = int(row[f"{col}:null_count"])
+        stats[col] = ColumnStats(
+            count=height - null_count,
+            null_count=null_count,
+            vocabulary=list(row[f"{col}:vocabulary"]),
+        )
+
+    return stats
+
+
+def merge_stats(partials: Iterable[Dict[str, ColumnStats]]) -> Dict[str, ColumnStats]:
+    """
+    Merge the statistics of several batches, e.g. the partitions of a distributed run, column by column.
+
+    :param partials: The statistics of every batch.
+    :type partials: Iterable[Dict[str, ColumnStats]]
+    :returns: The merged statistics.
+    :rtype: Dict[str, ColumnStats]
+    """
+    merged: Dict[str, ColumnStats] = {}
+    for partial in partials:
+        for col, stats in partial.items():
+            merged[col] = merged[col].merge(stats) if col in merged else stats
+    return merged
+
+
+class IncrementalState:
+    """
+    Persistent state of incremental (append) runs.
+
+    Remembers how many rows of each input file were already processed and keeps mergeable running statistics
+    for every pipeline section, so that the next run only has to read and transform the appended rows.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize a new, empty IncrementalState object.
+        """
+        self.sources: Dict[str, int] = {}
+        self.sections: Dict[str, Dict[str, ColumnStats]] = {}
+        # Sections that already hold the statistics of all rows, e.g. reduced from the partitions of a distributed
+        # run. Folding rows into them is a no-op.
+        self.frozen: Set[str] = set()
+
+    @classmethod
+    def load(cls, file_path: str) -> "IncrementalState":
+        """
+        Load the state from a JSON file. A missing file yields an empty state.
+
+        :param file_path: The path to the state file.
+        :type file_path: str
+        :returns: The loaded state.
+        :rtype: IncrementalState
+
+        :raises ValueError: If the state file cannot be parsed.
+        """
+        state = cls()
+        if not os.path.exists(file_path):
+            return state
+
+        try:
+            with open(file_path, "r") as f:
+                data = json.load(f)
+            state.sources = {k: int(v) for k, v in data["sources"].items()}
+            state.sections = {
+                section: {col: ColumnStats.from_dict(s) for col, s in columns.items()}
+                for section, columns in data["sections"].items()
+            }
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Error parsing state file {file_path}: {str(e)}")
+        return state
+
+    def save(self, file_path: str) -> None:
+        """
+        Write the state to a JSON file.
+
+        :param file_path: The path to the state file.
+        :type file_path: str
+        """
+        data = {
+            "sources": self.sources,
+            "sections": {
+                section: {col: s.to_dict() for col, s in columns.items()} for section, columns in self.sections.items()
+            },
+        }
+        # Write to a temporary file first so a crash never leaves a truncated state behind
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, file_path)
+
+    def rows_processed(self, source: str) -> int:
+        """
+        Get the number of rows of the given input file processed by previous runs.
+
+        :param source: The path to the input file.
+        :type source: str
+        :returns: The number of already processed rows.
+        :rtype: int
+        """
+        return self.sources.get(os.path.abspath(source), 0)
+
+    def mark_processed(self, source: str, rows: int) -> None:
+        """
+        Record the total number of processed rows of the given input file.
+
+        :param source: The path to the input file.
+        :type source: str
+        :param rows: The total number of processed rows.
+        :type rows: int
+        """
+        self.sources[os.path.abspath(source)] = rows
+
+    def stats(self, section: str) -> Dict[str, ColumnStats]:
+        """
+        Get the running statistics of a pipeline section.
+
+        :param section: The name of the section (e.g. "data_cleaning").
+        :type section: str
+        :returns: A dictionary mapping column names to their running statistics.
+        :rtype: Dict[str, ColumnStats]
+        """
+        return self.sections.get(section, {})
+
+    def update(self, section: str, df: pl.DataFrame) -> Dict[str, ColumnStats]:
+        """
+        Fold a batch of new rows into the running statistics of a pipeline section.
+
+        :param section: The name of the section (e.g. "data_cleaning").
+        :type section: str
+        :param df: The new rows.
+        :type df: polars.DataFrame
+        :returns: The updated statistics of the section.
+        :rtype: Dict[str, ColumnStats]
+        """
+        if section in self.frozen:
+            return self.stats(section)
+        current = self.sections.setdefault(section, {})
+        for col, stats in batch_stats(df).items():
+            current[col] = current[col].merge(stats) if col in current else stats
+        return current
+
+    def set_edges(self, section: str, col: str, edges: List[float]) -> None:
+        """
+        Keep the bin edges of a column, so that the following runs bin alike.
+
+        :param section: The name of the section (e.g. "feature_engineering").
+        :type section: str
+        :param col: The column name.
+        :type col: str
+        :param edges: The sorted bin edges.
+        :type edges: List[float]
+        """
+        self.sections.setdefault(section, {}).setdefault(col, ColumnStats()).edges = edges
+
+    def freeze(self, section: str, stats: Dict[str, ColumnStats]) -> None:
+        """
+        Set the final statistics of a section. Rows folded in afterwards are not counted again.
+
+        :param section: The name of the section (e.g. "data_cleaning").
+        :type section: str
+        :param stats: The statistics of all rows.
+        :type stats: Dict[str, ColumnStats]
+        """
+        self.sections[section] = stats
+        self.frozen.add(section)
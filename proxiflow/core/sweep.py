@@ -0,0 +1,272 @@
+import copy
+import heapq
+import itertools
+import json
+import os
+import polars as pl
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from proxiflow.config import Config
+from .cleaner import Cleaner
+from .engineer import Engineer
+from .normalizer import Normalizer
+from .planner import ExecutionPlan
+from .profiler import Profiler, StatsIndex
+from .sampler import Sampler
+from .selector import Selector
+from .transformer import Transformer
+from .validator import Validator
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Configuration sections in pipeline order. Variants whose sections agree up to a level share its result.
+LEVELS = [
+    "validation",
+    "profiling",
+    "sampling",
+    "data_cleaning",
+    "data_normalization",
+    "feature_engineering",
+    "custom_transforms",
+    "feature_selection",
+]
+
+# Settings every variant must share, as the input is only loaded once
+INPUT_KEYS = ["input_format", "input"]
+
+
+class _Node:
+    """
+    The result of a level shared by a group of variants: the data, the fitted sample and the statistics that are
+    still valid.
+    """
+
+    def __init__(self, data: pl.DataFrame, sample: Optional[pl.DataFrame] = None, stats: Optional[StatsIndex] = None):
+        self.data = data
+        self.sample = sample
+        self.stats = stats
+
+
+class Sweep:
+    """
+    Run several variants of a configuration over the same input.
+
+    The input is loaded once. The variants form a prefix tree over the pipeline levels: variants whose
+    validation, profiling, sampling and stage configurations agree up to a level share the result of that level,
+    so e.g. twenty normalization variants clean the data once. The groups of a level run concurrently.
+    """
+
+    def __init__(self, variants: Dict[str, Config]):
+        """
+        Initialize a new Sweep object.
+
+        :param variants: The configurations by variant name.
+        :type variants: Dict[str, Config]
+
+        :raises ValueError: If there are no variants or they read the input differently.
+        """
+        if len(variants) == 0:
+            raise ValueError("A sweep needs at least one variant")
+        inputs = {json.dumps([c.config.get(key) for key in INPUT_KEYS], default=str) for c in variants.values()}
+        if len(inputs) > 1:
+            raise ValueError(f"All variants of a sweep must have the same {' and '.join(INPUT_KEYS)} settings")
+        self.variants = variants
+        # The quarantined rows and the profile of every variant, filled while running
+        self.quarantined: Dict[str, pl.DataFrame] = {}
+        self.profiles: Dict[str, StatsIndex] = {}
+
+    def key(self, name: str, level: str) -> str:
+        """
+        Get the key of a variant's result at a level: its configuration of this and all preceding levels.
+
+        :param name: The variant name.
+        :type name: str
+        :param level: The level, one of LEVELS.
+        :type level: str
+        :returns: The key.
+        :rtype: str
+        """
+        config = self.variants[name].config
+        sections = [config.get(section) for section in LEVELS[: LEVELS.index(level) + 1]]
+        return json.dumps(sections, sort_keys=True, default=str)
+
+    def groups(self, level: str) -> Dict[str, List[str]]:
+        """
+        Group the variants sharing the result of a level.
+
+        :param level: The level, one of LEVELS.
+        :type level: str
+        :returns: The variant names by key, in the order of the variants.
+        :rtype: Dict[str, List[str]]
+        """
+        groups: Dict[str, List[str]] = {}
+        for name in self.variants:
+            groups.setdefault(self.key(name, level), []).append(name)
+        return groups
+
+    def explain(self) -> str:
+        """
+        Describe which variants share the runs of every level.
+
+        :returns: The sweep plan as text.
+        :rtype: str
+        """
+        lines = [f"Sweep plan: {len(self.variants)} variants"]
+        for level in LEVELS:
+            groups = list(self.groups(level).values())
+            lines.append(f"{level}: {len(groups)} run{'s' if len(groups) != 1 else ''}")
+            if len(groups) > 1:
+                lines.extend(f"  [{', '.join(names)}]" for names in groups)
+        return "\n".join(lines)
+
+    def run(self, df: pl.DataFrame, workers: Optional[int] = None) -> Iterator[Tuple[str, pl.DataFrame]]:
+        """
+        Run all variants over the prefix tree of their levels.
+
+        The groups run on a pool of ``workers`` threads, deepest level first, so a variant is yielded as soon as
+        its last level completed, while the other groups keep running. A group's result is only referenced by the
+        groups of the next level computed from it, so it is released once they completed.
+
+        :param df: The loaded input.
+        :type df: polars.DataFrame
+        :param workers: The number of groups run concurrently (default: number of CPUs).
+        :type workers: Optional[int]
+        :returns: The variant names and their results, in the order the variants complete.
+        :rtype: Iterator[Tuple[str, polars.DataFrame]]
+
+        :raises ValueError: If a stage fails, naming the level and the variants.
+        """
+        # The groups of every level by the key of their group at the preceding level
+        children: List[Dict[str, List[Tuple[str, List[str]]]]] = []
+        for depth, level in enumerate(LEVELS):
+            by_parent: Dict[str, List[Tuple[str, List[str]]]] = {}
+            for key, names in self.groups(level).items():
+                parent_key = self.key(names[0], LEVELS[depth - 1]) if depth > 0 else ""
+                by_parent.setdefault(parent_key, []).append((key, names))
+            children.append(by_parent)
+
+        def compute(depth: int, names: List[str], parent: _Node) -> _Node:
+            try:
+                return self._run_level(LEVELS[depth], names, parent)
+            except Exception as e:
+                raise ValueError(f"Error in {LEVELS[depth]} of variants {', '.join(names)}: {str(e)}") from e
+
+        # Groups ready to run with their parent result, deepest level first and in variant order within a level
+        pending: List[Tuple[int, int, str, List[str], _Node]] = []
+        order = itertools.count()
+        root = _Node(df)
+        for key, names in children[0][""]:
+            heapq.heappush(pending, (0, next(order), key, names, root))
+        del root
+        running: Dict[Future, Tuple[int, str, List[str]]] = {}
+        parent: Optional[_Node] = None
+        node: Optional[_Node] = None
+        max_workers = workers or os.cpu_count() or 1
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while pending or running:
+                while pending and len(running) < max_workers:
+                    negated_depth, _, key, names, parent = heapq.heappop(pending)
+                    running[executor.submit(compute, -negated_depth, names, parent)] = (-negated_depth, key, names)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth, key, names = running.pop(future)
+                    node = future.result()
+                    if depth == len(LEVELS) - 1:
+                        for name in names:
+                            yield name, node.data
+                    else:
+                        for child_key, child_names in children[depth + 1][key]:
+                            heapq.heappush(pending, (-(depth + 1), next(order), child_key, child_names, node))
+                # The pending groups and the running tasks hold the only references to the results
+                parent = node = None
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run_level(self, level: str, names: List[str], parent: _Node) -> _Node:
+        """
+        Compute the result of a level for a group of variants.
+
+        :param level: The level.
+        :type level: str
+        :param names: The variants sharing the result.
+        :type names: List[str]
+        :param parent: The result of the preceding level.
+        :type parent: _Node
+        :returns: The result.
+        :rtype: _Node
+        """
+        config = self.variants[names[0]]
+        if level == "validation":
+            if not config.validation_config:
+                return parent
+            valid, quarantined = Validator(config).validate(parent.data)
+            self.quarantined.update({name: quarantined for name in names})
+            return _Node(valid)
+        if level == "profiling":
+            stats = Profiler(config).profile(parent.data)
+            self.profiles.update({name: stats for name in names})
+            return _Node(parent.data, stats=stats)
+        if level == "sampling":
+            sample = Sampler(config).sample(parent.data) if config.sampling_config else None
+            return _Node(parent.data, sample, parent.stats)
+
+        # Stages invalidate the statistics of the columns they modify, every group gets its own copy
+        stats = parent.stats.copy() if parent.stats is not None else StatsIndex()
+        if level == "data_cleaning":
+            stage: Any = Cleaner(config, stats=stats)
+        elif level == "data_normalization":
+            stage = Normalizer(config, stats=stats)
+        elif level == "feature_engineering":
+            stage = Engineer(config)
+        elif level == "custom_transforms":
+            stage = Transformer(config)
+        else:
+            stage = Selector(config)
+        sample = parent.sample
+        if sample is not None:
+            # Custom transforms are not fitted, but the fitted feature selection needs their output
+            sample = stage.fit(sample) if hasattr(stage, "fit") else stage.execute(sample)
+        data = ExecutionPlan(stage.operations(parent.data)).execute(
+            parent.data, workers=config.execution_config.get("workers")
+        )
+        return _Node(data, sample, stats)
+
+
+def expand_grid(config: Config, grid: Dict[str, List[Any]]) -> List[Tuple[Config, Dict[str, Any]]]:
+    """
+    Expand a parameter grid into configurations, one per combination of the values.
+
+    Example grid, keys are dotted paths into the configuration::
+
+        data_normalization.z_score: [[Age], [Age, Income]]
+        feature_engineering.polynomial_features.degree: [2, 3]
+
+    :param config: The base configuration. It is not modified.
+    :type config: Config
+    :param grid: The values of every parameter.
+    :type grid: Dict[str, List[Any]]
+    :returns: The configurations and the parameter values they were built from.
+    :rtype: List[Tuple[Config, Dict[str, Any]]]
+
+    :raises ValueError: If a parameter has no values or its path runs through a value that is not a mapping.
+    """
+    for path, values in grid.items():
+        if not isinstance(values, list) or len(values) == 0:
+            raise ValueError(f"Grid parameter {path} needs a non-empty list of values")
+
+    variants = []
+    for combination in itertools.product(*grid.values()):
+        variant = copy.deepcopy(config)
+        params = dict(zip(grid, combination))
+        for path, value in params.items():
+            section = variant.config
+            *parents, leaf = path.split(".")
+            for part in parents:
+                if section.get(part) is None:
+                    section[part] = {}
+                section = section[part]
+                if not isinstance(section, dict):
+                    raise ValueError(f"Grid parameter {path} does not point into a mapping")
+            section[leaf] = copy.deepcopy(value)
+        variants.append((variant, params))
+    return variants
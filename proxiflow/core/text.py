@@ -0,0 +1,226 @@
+import numpy as np
+import polars as pl
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Row normalizations of the features
+NORMS = ["l1", "l2"]
+# Output layouts: one column per hash bucket, or bucket indices and values as list columns
+OUTPUTS = ["dense", "sparse"]
+# Tokens of at least two word characters, as in scikit-learn
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+DEFAULT_N_FEATURES = 1024
+# Rows tokenized at a time
+DEFAULT_BATCH_SIZE = 10000
+# Helper columns of the (row, bucket, count) triples
+ROW_COLUMN = "__proxiflow_row"
+TOKEN_COLUMN = "__proxiflow_token"
+BUCKET_COLUMN = "__proxiflow_bucket"
+
+
+class TextVectorizer:
+    """
+    Hashed token counts or TF-IDF weights of a text column.
+
+    Text is tokenized with polars string expressions (lowercasing and a regex) and every token is hashed into one
+    of n_features buckets, so there is no vocabulary to fit or hold in memory. The rows are processed in batches;
+    a batch only exists as (row, bucket, count) triples of its non-zero entries until it is written to the output,
+    dense output is allocated batch by batch.
+    The IDF weights are the only fitted parameters: one document frequency count per bucket, computed in one pass.
+    """
+
+    def __init__(self, column: str, config: Dict[str, Any]):
+        """
+        Initialize a new TextVectorizer object.
+
+        :param column: The text column.
+        :type column: str
+        :param config: The text feature configuration of the column.
+        :type config: Dict
+
+        :raises ValueError: If n_features is not positive or the output or norm is unknown.
+        """
+        self.column = column
+        self.config = config
+        self.n_features = int(config.get("n_features") or DEFAULT_N_FEATURES)
+        if self.n_features <= 0:
+            raise ValueError("text_features.n_features must be a positive number")
+        self.output: str = config.get("output", "dense")
+        if self.output not in OUTPUTS:
+            raise ValueError(f"Unknown text features output {self.output}. Supported: {', '.join(OUTPUTS)}")
+        self.batch_size: int = config.get("batch_size") or DEFAULT_BATCH_SIZE
+        self.seed: int = config.get("seed", 0)
+        self.norm: Optional[str] = config.get("norm", "l2" if config.get("idf") else None)
+        if self.norm is not None and self.norm not in NORMS:
+            raise ValueError(f"Unknown text features norm {self.norm}. Supported: {', '.join(NORMS)}")
+        # Inverse document frequency of every bucket, None if only counting
+        self.idf: Optional[np.ndarray] = None
+
+    @property
+    def fitted(self) -> bool:
+        """
+        Check whether the vectorizer is ready to transform: counts need no fitting, TF-IDF needs the IDF weights.
+
+        :returns: Whether the vectorizer is fitted.
+        :rtype: bool
+        """
+        return not self.config.get("idf") or self.idf is not None
+
+    def fit(self, series: pl.Series) -> None:
+        """
+        Fit the IDF weights with the smoothed formula ``ln((1 + n) / (1 + df)) + 1`` of scikit-learn, where df is
+        the number of rows containing a token of the bucket.
+
+        :param series: The text column to fit on.
+        :type series: polars.Series
+        """
+        frequencies = np.zeros(self.n_features, dtype=np.int64)
+        for rows in self._batches(series.len()):
+            # The triples hold one entry per row and bucket, so counting the entries of a bucket counts its rows
+            buckets = self._triples(series[rows])[BUCKET_COLUMN].to_numpy().astype(np.int64)
+            frequencies += np.bincount(buckets, minlength=self.n_features)
+        self.idf = (np.log((1 + series.len()) / (1 + frequencies)) + 1).astype(np.float32)
+
+    def transform(self, series: pl.Series) -> pl.DataFrame:
+        """
+        Compute the features of a text column, batch by batch.
+
+        :param series: The text column.
+        :type series: polars.Series
+        :returns: The dense Float32 (or UInt32 counts) columns "{column}_hash_{i}", or the sparse list columns
+            "{column}_indices" and "{column}_values".
+        :rtype: polars.DataFrame
+
+        :raises ValueError: If the IDF weights are not fitted.
+        """
+        if not self.fitted:
+            raise ValueError(f"The IDF weights of text column {self.column} are not fitted")
+        weighted = self.idf is not None or self.norm is not None
+        dtype = np.float32 if weighted else np.uint32
+
+        if self.output == "dense":
+            names = [f"{self.column}_hash_{i}" for i in range(self.n_features)]
+            # Only one batch is dense at a time, the output holds the batches as chunks of its columns
+            frames = []
+            for rows in self._batches(series.len()):
+                row, bucket, value = self._weighted(series[rows])
+                dense = np.zeros((rows.stop - rows.start, self.n_features), dtype=dtype, order="F")
+                dense[row, bucket] = value
+                frames.append(pl.DataFrame([pl.Series(name, dense[:, i]) for i, name in enumerate(names)]))
+            if len(frames) == 0:
+                return pl.DataFrame([pl.Series(name, np.zeros(0, dtype=dtype)) for name in names])
+            return pl.concat(frames, rechunk=False)
+
+        indices, values = f"{self.column}_indices", f"{self.column}_values"
+        list_types = {indices: pl.List(pl.UInt32), values: pl.List(pl.Float32 if weighted else pl.UInt32)}
+        if series.len() == 0:
+            return pl.DataFrame([pl.Series(name, [], dtype=list_type) for name, list_type in list_types.items()])
+        batches = []
+        for rows in self._batches(series.len()):
+            row, bucket, value = self._weighted(series[rows])
+            entries = pl.DataFrame(
+                {
+                    ROW_COLUMN: pl.Series(row + rows.start, dtype=pl.UInt32),
+                    "indices": pl.Series(bucket, dtype=pl.UInt32),
+                    "values": pl.Series(value.astype(dtype)),
+                }
+            )
+            batches.append(entries.groupby(ROW_COLUMN, maintain_order=True).agg([pl.col("indices"), pl.col("values")]))
+        positions = pl.DataFrame({ROW_COLUMN: pl.arange(0, series.len(), eager=True).cast(pl.UInt32)})
+        lists = positions.join(pl.concat(batches), on=ROW_COLUMN, how="left")
+        # Rows without tokens have empty lists
+        return lists.select(
+            [
+                pl.col(column).cast(list_type).fill_null(pl.lit(pl.Series([[]], dtype=list_type))).alias(name)
+                for column, (name, list_type) in zip(["indices", "values"], list_types.items())
+            ]
+        )
+
+    def _batches(self, rows: int) -> Iterator[slice]:
+        """
+        Split the rows into batches of batch_size rows.
+
+        :param rows: The number of rows.
+        :type rows: int
+        :returns: The row slices.
+        :rtype: Iterator[slice]
+        """
+        for start in range(0, rows, self.batch_size):
+            yield slice(start, min(start + self.batch_size, rows))
+
+    def _weighted(self, series: pl.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the non-zero entries of a batch, sorted by row and bucket, weighted by the IDF and normalized.
+
+        :param series: The batch of the text column.
+        :type series: polars.Series
+        :returns: The row, bucket and value of every entry as numpy arrays.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        triples = self._triples(series).sort([ROW_COLUMN, BUCKET_COLUMN])
+        row = triples[ROW_COLUMN].to_numpy().astype(np.int64)
+        bucket = triples[BUCKET_COLUMN].to_numpy().astype(np.int64)
+        value = triples["count"].to_numpy()
+        if self.idf is not None:
+            value = value * self.idf[bucket]
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(row, weights=np.square(value, dtype=np.float64), minlength=series.len()))
+            value = value / norms[row]
+        elif self.norm == "l1":
+            norms = np.bincount(row, weights=np.abs(value), minlength=series.len())
+            value = value / norms[row]
+        return row, bucket, value
+
+    def _triples(self, series: pl.Series) -> pl.DataFrame:
+        """
+        Tokenize a batch and count the tokens per row and hash bucket.
+
+        :param series: The batch of the text column.
+        :type series: polars.Series
+        :returns: The row, bucket and count of every non-zero entry.
+        :rtype: polars.DataFrame
+        """
+        text = pl.col(self.column).cast(pl.Utf8)
+        if self.config.get("lowercase", True):
+            text = text.str.to_lowercase()
+        tokens = text.str.extract_all(self.config.get("token_pattern") or DEFAULT_TOKEN_PATTERN)
+        bucket = (pl.col(TOKEN_COLUMN).hash(self.seed) % self.n_features).cast(pl.UInt32)
+        return (
+            series.alias(self.column)
+            .to_frame()
+            .with_row_count(ROW_COLUMN)
+            .select([pl.col(ROW_COLUMN), tokens.alias(TOKEN_COLUMN)])
+            .explode(TOKEN_COLUMN)
+            .drop_nulls(TOKEN_COLUMN)
+            .select([pl.col(ROW_COLUMN), bucket.alias(BUCKET_COLUMN)])
+            .groupby([ROW_COLUMN, BUCKET_COLUMN])
+            .count()
+        )
+
+    def save(self, file_path: str) -> None:
+        """
+        Persist the IDF weights as a NumPy npy file.
+
+        :param file_path: The path to the IDF file.
+        :type file_path: str
+
+        :raises ValueError: If no IDF weights were fitted.
+        """
+        if self.idf is None:
+            raise ValueError("No IDF weights fitted to save")
+        with open(file_path, "wb") as f:
+            np.save(f, self.idf)
+
+    def load(self, file_path: str) -> None:
+        """
+        Load persisted IDF weights.
+
+        :param file_path: The path to the IDF file.
+        :type file_path: str
+
+        :raises ValueError: If the file was written for another number of features.
+        """
+        idf = np.load(file_path, allow_pickle=False)
+        if idf.shape != (self.n_features,):
+            raise ValueError(f"IDF file {file_path} has {idf.shape[0]} features, expected {self.n_features}")
+        self.idf = idf.astype(np.float32)
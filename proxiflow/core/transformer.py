@@ -0,0 +1,144 @@
+import importlib
+import polars as pl
+from importlib.metadata import entry_points
+from proxiflow.config import Config
+from .planner import ExecutionPlan, Operation
+
+from typing import Any, Callable, Dict, List, Optional
+
+# Entry point group other packages register their transforms in
+ENTRY_POINT_GROUP = "proxiflow.transforms"
+
+# Transforms registered with register_transform by name
+_REGISTRY: Dict[str, Callable[..., pl.Expr]] = {}
+
+
+def register_transform(
+    name: Optional[str] = None,
+) -> Callable[[Callable[..., pl.Expr]], Callable[..., pl.Expr]]:
+    """
+    Register a function as a custom transform. The function gets one polars expression per configured input
+    column and the configured params as keyword arguments, and returns a polars expression::
+
+        @register_transform("ratio")
+        def ratio(numerator: pl.Expr, denominator: pl.Expr) -> pl.Expr:
+            return numerator / denominator
+
+    :param name: The name the transform is configured with. Defaults to the function name.
+    :type name: Optional[str]
+    :returns: The decorator registering the function.
+    :rtype: Callable
+    """
+
+    def decorator(func: Callable[..., pl.Expr]) -> Callable[..., pl.Expr]:
+        _REGISTRY[name or func.__name__] = func
+        return func
+
+    return decorator
+
+
+def get_transform(name: str) -> Callable[..., pl.Expr]:
+    """
+    Look up a custom transform. Registered transforms are found first, then transforms of installed packages
+    advertised in the "proxiflow.transforms" entry point group, then functions given by their import path
+    (``package.module:function``).
+
+    :param name: The transform name or import path.
+    :type name: str
+    :returns: The transform function.
+    :rtype: Callable[..., polars.Expr]
+
+    :raises ValueError: If the transform can not be found.
+    """
+    if name in _REGISTRY:
+        return _REGISTRY[name]
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name == name:
+            _REGISTRY[name] = entry_point.load()
+            return _REGISTRY[name]
+
+    module_name, _, attribute = name.rpartition(":") if ":" in name else name.rpartition(".")
+    if module_name:
+        try:
+            func = getattr(importlib.import_module(module_name), attribute)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Custom transform {name} can not be imported: {str(e)}")
+        _REGISTRY[name] = func
+        return _REGISTRY[name]
+
+    raise ValueError(f"Unknown custom transform {name}")
+
+
+class Transformer:
+    """
+    A class for applying custom, expression-based transforms.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize a new Transformer object with the specified configuration.
+
+        :param config: A Config object containing the custom transforms configuration values.
+        :type config: Config
+        """
+        self.config: List[Dict[str, Any]] = config.custom_transforms_config
+        self.workers: Optional[int] = config.execution_config.get("workers")
+
+    def execute(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Apply the configured custom transforms to the specified DataFrame.
+
+        :param df: The DataFrame to transform.
+        :type df: polars.DataFrame
+        :return: The transformed DataFrame.
+        :rtype: polars.DataFrame
+        """
+        return ExecutionPlan(self.operations(df)).execute(df, self.workers)
+
+    def operations(self, df: pl.DataFrame) -> List[Operation]:
+        """
+        Build one expression operation per configured transform. Independent transforms are fused into a single
+        ``with_columns`` by the execution planner, together with the expression operations of the other stages.
+
+        Example configuration::
+
+            custom_transforms:
+              - transform: ratio              # registered name, entry point name or module:function
+                columns: [Price, Area]        # passed to the transform as expressions
+                output: Price_per_Area        # not mandatory, defaults to the first column (in place)
+                params: {}                    # not mandatory, passed as keyword arguments
+
+        :param df: The DataFrame to transform.
+        :type df: polars.DataFrame
+        :return: The operations in their configured order.
+        :rtype: List[Operation]
+
+        :raises ValueError: If a transform is unknown, has neither columns nor an output, or does not return an
+            expression.
+        """
+        operations = []
+        for spec in self.config:
+            name: str = spec["transform"]
+            func = get_transform(name)
+            columns = spec.get("columns") or []
+            columns = [columns] if isinstance(columns, str) else list(columns)
+            output = spec.get("output") or (columns[0] if columns else None)
+            if output is None:
+                raise ValueError(f"Custom transform {name} needs input columns or an output column")
+
+            expr = func(*[pl.col(col) for col in columns], **(spec.get("params") or {}))
+            if not isinstance(expr, pl.Expr):
+                raise ValueError(f"Custom transform {name} must return a polars expression")
+            # The transform may reference more columns than its inputs, e.g. through its params. Wildcards and
+            # regex or dtype selections have no root names and may read any column.
+            roots = df.columns if expr.meta.has_multiple_outputs() else expr.meta.root_names()
+            operations.append(
+                Operation(
+                    f"custom_transforms.{name}({', '.join(columns)})",
+                    reads=list(dict.fromkeys(columns + roots)),
+                    writes=[output],
+                    exprs=[expr.alias(output)],
+                )
+            )
+        return operations
@@ -0,0 +1,161 @@
+import operator
+import polars as pl
+from functools import reduce
+from proxiflow.config import Config
+
+from typing import Any, Dict, List, Tuple
+
+# Column of the quarantined rows listing the rules they violate, e.g. "range(Age); not_null(Name)"
+VIOLATIONS_COLUMN = "violations"
+
+# Type names of the schema rule besides the polars names (Int64, Float64, Utf8, ...)
+DTYPE_ALIASES: Dict[str, pl.PolarsDataType] = {
+    "int": pl.Int64,
+    "float": pl.Float64,
+    "str": pl.Utf8,
+    "string": pl.Utf8,
+    "bool": pl.Boolean,
+    "date": pl.Date,
+    "datetime": pl.Datetime,
+}
+
+
+class Validator:
+    """
+    A class for validating rows against data-quality rules before they are cleaned.
+
+    All rules are evaluated as one batch of vectorized expressions. Rows violating any rule are split off into a
+    quarantine instead of failing the run, together with the names of the rules they violate.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize a new Validator object with the specified configuration.
+
+        :param config: A Config object containing the validation configuration values.
+        :type config: Config
+        """
+        self.config = config.validation_config
+        # Number of violations per rule over all validated batches
+        self.violations: Dict[str, int] = {}
+
+    def schema(self) -> Dict[str, pl.PolarsDataType]:
+        """
+        Get the data types of the schema rule.
+
+        :returns: The data type of every column with a schema rule.
+        :rtype: Dict[str, polars.PolarsDataType]
+
+        :raises ValueError: If a type is unknown.
+        """
+        return {col: _dtype(name) for col, name in (self.config.get("schema") or {}).items()}
+
+    def rules(self, df: pl.DataFrame) -> List[Tuple[str, pl.Expr]]:
+        """
+        Build one expression per configured rule that is true for the rows violating it.
+
+        Example configuration::
+
+            validation:
+              schema: {Age: Int64, Date: date}   # values that can not be cast to the type
+              not_null: [Name]
+              range: {Age: {min: 0, max: 120}}   # inclusive, min or max can be left out
+              unique: [Id, [Name, Date]]         # columns or column combinations, the first occurrence is valid
+              regex: {Email: "^[^@]+@[^@]+$"}
+              quarantine: quarantine.csv         # not mandatory, violating rows are dropped otherwise
+
+        Range and regex rules of a column with a schema type check the cast values.
+
+        :param df: The DataFrame to validate.
+        :type df: polars.DataFrame
+        :returns: The rule names, e.g. "range(Age)", and their expressions.
+        :rtype: List[Tuple[str, polars.Expr]]
+
+        :raises ValueError: If a rule refers to a missing column, has an unknown type or an invalid range.
+        """
+        schema = self.schema()
+        unique = [[key] if isinstance(key, str) else list(key) for key in self.config.get("unique") or []]
+        columns = (
+            list(schema)
+            + list(self.config.get("not_null") or [])
+            + list(self.config.get("range") or {})
+            + [col for key in unique for col in key]
+            + list(self.config.get("regex") or {})
+        )
+        missing = sorted({col for col in columns if col not in df.columns})
+        if len(missing) > 0:
+            raise ValueError(f"Columns specified for validation are missing in the DataFrame: {', '.join(missing)}")
+
+        def value(col: str) -> pl.Expr:
+            return pl.col(col).cast(schema[col], strict=False) if col in schema else pl.col(col)
+
+        rules = []
+        for col in schema:
+            # Values that turn into nulls do not have the type
+            rules.append((f"schema({col})", pl.col(col).is_not_null() & value(col).is_null()))
+        for col in self.config.get("not_null") or []:
+            rules.append((f"not_null({col})", pl.col(col).is_null()))
+        for col, bounds in (self.config.get("range") or {}).items():
+            if not isinstance(bounds, dict) or not ({"min", "max"} & set(bounds)):
+                raise ValueError(f"The range of column {col} needs a min or a max")
+            outside = [value(col) < bounds["min"]] if bounds.get("min") is not None else []
+            outside += [value(col) > bounds["max"]] if bounds.get("max") is not None else []
+            rules.append((f"range({col})", reduce(operator.or_, outside)))
+        for key in unique:
+            # Position of the row among the rows with the same key
+            rules.append((f"unique({', '.join(key)})", pl.col(key[0]).cumcount().over(key) > 0))
+        for col, pattern in (self.config.get("regex") or {}).items():
+            rules.append((f"regex({col})", ~value(col).cast(pl.Utf8).str.contains(pattern)))
+        return rules
+
+    def validate(self, df: pl.DataFrame) -> Tuple[pl.DataFrame, pl.DataFrame]:
+        """
+        Split a DataFrame into the valid and the quarantined rows. The columns with a schema type are cast in the
+        valid rows.
+
+        :param df: The DataFrame to validate.
+        :type df: polars.DataFrame
+        :returns: The valid rows and the quarantined rows with their violated rules in the "violations" column.
+        :rtype: Tuple[polars.DataFrame, polars.DataFrame]
+
+        :raises ValueError: If a rule is invalid, see :meth:`rules`.
+        """
+        rules = self.rules(df)
+        if len(rules) == 0:
+            return df, df.head(0).with_columns(pl.lit("").alias(VIOLATIONS_COLUMN))
+
+        # Flag the violations of all rules in one pass
+        flags = [(f"__proxiflow_rule_{i}", name) for i, (name, _) in enumerate(rules)]
+        flagged = df.with_columns([expr.fill_null(False).alias(flag) for (flag, _), (_, expr) in zip(flags, rules)])
+        counts = flagged.select([pl.col(flag).sum() for flag, _ in flags]).row(0)
+        for (_, name), count in zip(flags, counts):
+            self.violations[name] = self.violations.get(name, 0) + int(count or 0)
+
+        invalid = reduce(operator.or_, [pl.col(flag) for flag, _ in flags])
+        schema = self.schema()
+        valid = flagged.filter(~invalid).select(
+            [pl.col(col).cast(schema[col], strict=False) if col in schema else pl.col(col) for col in df.columns]
+        )
+        violations = pl.concat_str(
+            [pl.when(pl.col(flag)).then(pl.lit(f"{name}; ")).otherwise(pl.lit("")) for flag, name in flags]
+        )
+        violations = violations.str.rstrip("; ").alias(VIOLATIONS_COLUMN)
+        quarantined = flagged.filter(invalid).select(df.columns + [violations])
+        return valid, quarantined
+
+
+def _dtype(name: Any) -> pl.PolarsDataType:
+    """
+    Get the polars data type of a schema rule.
+
+    :param name: The type name, e.g. "Int64" or "int".
+    :type name: Any
+    :returns: The data type.
+    :rtype: polars.PolarsDataType
+
+    :raises ValueError: If the type is unknown.
+    """
+    dtype = DTYPE_ALIASES.get(str(name).lower(), getattr(pl, str(name), None))
+    if dtype is None or not isinstance(dtype, type) or not issubclass(dtype, pl.DataType):
+        raise ValueError(f"Unknown data type {name} in the validation schema")
+    return dtype
@@ -1,5 +1,47 @@
 from .logger import get_logger
-from .data import load_data, write_data
+from .data import (
+    load_data,
+    count_rows,
+    iter_data,
+    write_data,
+    write_chunks,
+    write_parquet_dataset,
+    open_stream,
+    to_feature_matrix,
+    write_feature_matrix,
+    to_arrow,
+    SharedFrame,
+    share_frame,
+    attach_frame,
+    map_shared,
+)
+from .sql import ConnectionPool, load_sql, write_sql
 from .errors import generate_trace
+from .memory import MemoryGovernor, parse_size, row_footprint
+from .perf import RunProfiler
 
-__all__ = ["get_logger", "load_data", "write_data", "generate_trace"]
+__all__ = [
+    "get_logger",
+    "load_data",
+    "count_rows",
+    "iter_data",
+    "write_data",
+    "write_chunks",
+    "generate_trace",
+    "write_parquet_dataset",
+    "open_stream",
+    "ConnectionPool",
+    "load_sql",
+    "write_sql",
+    "to_feature_matrix",
+    "write_feature_matrix",
+    "to_arrow",
+    "SharedFrame",
+    "share_frame",
+    "attach_frame",
+    "map_shared",
+    "MemoryGovernor",
+    "parse_size",
+    "row_footprint",
+    "RunProfiler",
+]
@@ -1,48 +1,845 @@
+import os
+import io
+import bz2
+import glob
+import gzip
+import itertools
+import json
+import tempfile
+import uuid
+import multiprocessing
+import numpy as np
 import polars as pl
-from typing import Optional
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import quote
+from .sql import concat_frames, count_sql, iter_sql, load_sql, write_sql
+from typing import IO, Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Tuple, cast
 
+# Shared memory is a tmpfs on Linux. Elsewhere the page cache of a temporary file serves the same purpose.
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+# Directory name used by Hive for missing partition values
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Stream compressions of csv and ndjson files and the file extensions they are inferred from
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".bz2": "bz2", ".zst": "zstd", ".zstd": "zstd"}
+# Bytes read at a time when counting the lines of a file
+READ_BLOCK_SIZE = 1 << 20
+# Decompressed bytes parsed at a time when loading a compressed file
+LOAD_BLOCK_SIZE = 16 << 20
 
-def load_data(data_file: str, input_file_format: str) -> Optional[pl.DataFrame]:
+
+def load_data(
+    data_file: str, input_file_format: str, skip_rows: int = 0, options: Optional[Dict[str, Any]] = None
+) -> pl.DataFrame:
     """
-    Load a CSV file and return a polars DataFrame.
+    Load a CSV or NDJSON file or a SQLite query (see :func:`load_sql`) and return a polars DataFrame.
+
+    Files compressed with gzip, bz2 or zstd are decompressed as a stream and parsed in blocks of
+    LOAD_BLOCK_SIZE bytes cut at line breaks, so the decompressed file is never held in memory and no temporary
+    file is written. The compression is inferred from the file extension (e.g. ``data.csv.gz``) unless it is configured.
 
-    :param data_file: The path to the CSV file to load.
+    :param data_file: The path to the file to load. For sql input the path to the SQLite database.
     :type data_file: str
+    :param input_file_format: The input file format, csv, ndjson or sql.
+    :type input_file_format: str
+    :param skip_rows: The number of data rows (after the header) to skip, e.g. rows processed by a previous
+        incremental run. If all rows are skipped an empty DataFrame is returned.
+    :type skip_rows: int
+    :param options: The input configuration, e.g. the compression (infer, none, gzip, bz2 or zstd) or the query
+        of sql input.
+    :type options: Optional[Dict]
 
-    :returns: The DataFrame containing the CSV data.
+    :returns: The DataFrame containing the data.
     :rtype: polars.DataFrame
 
     :raises FileNotFoundError: If the specified file path does not exist.
-    :raises ValueError: If the specified file is empty or cannot be parsed as a CSV file.
+    :raises ValueError: If the format is not supported or the specified file is empty or cannot be parsed.
     """
     try:
-        if input_file_format == "csv":
-            df = pl.read_csv(data_file)
-            if df.shape[0] == 0:
+        if input_file_format == "sql":
+            if not os.path.exists(data_file):
+                raise FileNotFoundError(data_file)
+            df = load_sql(data_file, options or {}, skip_rows=skip_rows)
+            if skip_rows == 0 and df.shape[0] == 0:
                 raise ValueError("Data file is empty")
             return df
-        return None
+        if input_file_format not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported input format {input_file_format}")
+        compression = _compression(data_file, (options or {}).get("compression"))
+        if compression is not None:
+            with open_stream(data_file, "rb", compression) as f:
+                header = f.readline() if input_file_format == "csv" else b""
+                for _ in itertools.islice(f, skip_rows):
+                    pass
+                chunks = list(_parse_chunks(_line_blocks(f), header, input_file_format, align=False))
+            if len(chunks) == 0 and skip_rows > 0:
+                # No new rows since the last run, keep the csv columns
+                return pl.read_csv(io.BytesIO(header)) if header.strip() else pl.DataFrame()
+            # The chunks are not copied into contiguous columns, that would hold the data twice
+            df = concat_frames(chunks)
+        elif input_file_format == "ndjson":
+            df = pl.read_ndjson(data_file)
+            if skip_rows > 0:
+                return df.slice(skip_rows)
+        else:
+            if skip_rows > 0:
+                try:
+                    return pl.read_csv(data_file, skip_rows_after_header=skip_rows)
+                except pl.NoDataError:
+                    # No new rows since the last run, keep the schema
+                    return pl.read_csv(data_file, n_rows=0)
+            df = pl.read_csv(data_file)
+        if df.shape[0] == 0:
+            raise ValueError("Data file is empty")
+        return df
     except FileNotFoundError:
         raise FileNotFoundError("Data file not found")
     except Exception as e:
         raise ValueError(f"Error loading data file: {str(e)}")
 
 
-def write_data(data: pl.DataFrame, output_file: str, output_file_format: str) -> None:
+def count_rows(
+    data_file: str, input_file_format: str, skip_rows: int = 0, options: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Count the data rows of an input without loading it. csv and ndjson files are scanned for line breaks block
+    by block (decompressing on the fly), sql input is counted by the database.
+
+    :param data_file: The path to the file. For sql input the path to the SQLite database.
+    :type data_file: str
+    :param input_file_format: The input file format, csv, ndjson or sql.
+    :type input_file_format: str
+    :param skip_rows: The number of data rows that will be skipped.
+    :type skip_rows: int
+    :param options: The input configuration.
+    :type options: Optional[Dict]
+    :returns: The number of rows after skip_rows. Quoted line breaks in csv fields are counted as rows.
+    :rtype: int
+    """
+    options = options or {}
+    if input_file_format == "sql":
+        return count_sql(data_file, options, skip_rows=skip_rows)
+
+    compression = _compression(data_file, options.get("compression"))
+    lines = 0
+    last = b"\n"
+    with open_stream(data_file, "rb", compression) if compression else open(data_file, "rb") as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    # The last line may not end with a line break
+    if last != b"\n":
+        lines += 1
+    header = 1 if input_file_format == "csv" else 0
+    return max(0, lines - header - skip_rows)
+
+
+def iter_data(
+    data_file: str,
+    input_file_format: str,
+    chunk_rows: int,
+    skip_rows: int = 0,
+    options: Optional[Dict[str, Any]] = None,
+) -> Generator[pl.DataFrame, None, None]:
+    """
+    Read a csv or ndjson file or a SQLite query (see :func:`iter_sql`) in chunks of rows, so only one chunk is in
+    memory at a time.
+
+    Uncompressed csv files are read by the batched csv reader, whose chunks hold about chunk_rows rows.
+    Compressed files and ndjson are decompressed as a stream and parsed chunk_rows lines at a time. Every chunk
+    has the schema of the first one.
+
+    :param data_file: The path to the file to load. For sql input the path to the SQLite database.
+    :type data_file: str
+    :param input_file_format: The input file format, csv, ndjson or sql.
+    :type input_file_format: str
+    :param chunk_rows: The number of rows per chunk.
+    :type chunk_rows: int
+    :param skip_rows: The number of data rows (after the header) to skip.
+    :type skip_rows: int
+    :param options: The input configuration, see :func:`load_data`.
+    :type options: Optional[Dict]
+    :returns: An iterator over the chunks.
+    :rtype: Generator[polars.DataFrame, None, None]
+
+    :raises ValueError: If the format can not be read in chunks.
+    """
+    options = options or {}
+    if input_file_format == "sql":
+        yield from iter_sql(data_file, options, chunk_rows, skip_rows=skip_rows)
+        return
+    if input_file_format not in ("csv", "ndjson"):
+        raise ValueError(f"Reading {input_file_format} input in chunks is not supported")
+
+    compression = _compression(data_file, options.get("compression"))
+    if input_file_format == "csv" and compression is None:
+        reader = pl.read_csv_batched(data_file, batch_size=chunk_rows, skip_rows_after_header=skip_rows)
+        while True:
+            batches = reader.next_batches(1)
+            if not batches:
+                return
+            yield batches[0]
+
+    with open_stream(data_file, "rb", compression) if compression else open(data_file, "rb") as f:
+        header = f.readline() if input_file_format == "csv" else b""
+        for _ in itertools.islice(f, skip_rows):
+            pass
+        blocks = iter(lambda: b"".join(itertools.islice(f, chunk_rows)), b"")
+        yield from _parse_chunks(blocks, header, input_file_format)
+
+
+def _line_blocks(f: IO[bytes], block_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Read a stream in blocks of whole lines.
+
+    :param f: The binary stream.
+    :type f: IO[bytes]
+    :param block_size: The bytes read at a time (default: LOAD_BLOCK_SIZE).
+    :type block_size: Optional[int]
+    :returns: The blocks, each ending at a line break except possibly the last one.
+    :rtype: Iterator[bytes]
+    """
+    rest = b""
+    while True:
+        block = f.read(block_size or LOAD_BLOCK_SIZE)
+        if not block:
+            break
+        block = rest + block
+        end = block.rfind(b"\n") + 1
+        rest = block[end:]
+        if end > 0:
+            yield block[:end]
+    if rest:
+        yield rest
+
+
+def _parse_chunks(
+    blocks: Iterable[bytes], header: bytes, input_file_format: str, align: bool = True
+) -> Iterator[pl.DataFrame]:
+    """
+    Parse blocks of csv or ndjson lines.
+
+    :param blocks: The blocks of whole lines.
+    :type blocks: Iterable[bytes]
+    :param header: The csv header line, prepended to every block.
+    :type header: bytes
+    :param input_file_format: The input file format, csv or ndjson.
+    :type input_file_format: str
+    :param align: Give every chunk the schema of the first one. Otherwise every chunk has its own inferred schema.
+    :type align: bool
+    :returns: The parsed chunks.
+    :rtype: Iterator[polars.DataFrame]
+    """
+    schema: Optional[Dict[str, Any]] = None
+    for lines in blocks:
+        if not lines.strip():
+            return
+        if input_file_format == "csv":
+            chunk = pl.read_csv(io.BytesIO(header + lines), dtypes=schema)
+        else:
+            chunk = pl.read_ndjson(io.BytesIO(lines))
+            if schema is not None:
+                chunk = chunk.select(
+                    [
+                        (pl.col(col) if col in chunk.columns else pl.lit(None)).cast(dtype).alias(col)
+                        for col, dtype in schema.items()
+                    ]
+                )
+        if align:
+            schema = schema or dict(chunk.schema)
+        yield chunk
+
+
+def open_stream(file_path: str, mode: str, compression: str, options: Optional[Dict[str, Any]] = None) -> IO[bytes]:
+    """
+    Open a compressed binary file stream.
+
+    zstd needs the optional zstandard package. Compression runs on ``compression_threads`` threads (default: all
+    CPUs); the zstd format only allows single-threaded decompression.
+
+    :param file_path: The path of the file.
+    :type file_path: str
+    :param mode: The binary file mode, "rb", "wb" or "ab". Appending adds a new compressed frame, which readers
+        of all supported formats decompress as one stream.
+    :type mode: str
+    :param compression: gzip, bz2 or zstd.
+    :type compression: str
+    :param options: The compression_level and compression_threads settings.
+    :type options: Optional[Dict]
+    :returns: The file object.
+    :rtype: IO[bytes]
+
+    :raises ValueError: If the compression is not supported.
+    :raises ImportError: If zstd is used and zstandard is not installed.
+    """
+    options = options or {}
+    level = options.get("compression_level")
+    if compression == "gzip":
+        return cast(IO[bytes], gzip.open(file_path, mode, compresslevel=level if level is not None else 9))
+    if compression == "bz2":
+        return cast(IO[bytes], bz2.open(file_path, mode, compresslevel=level if level is not None else 9))
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required for zstd files, install it with: pip install proxiflow[zstd]")
+        threads = options.get("compression_threads", -1)
+        cctx = zstandard.ZstdCompressor(level=level if level is not None else 3, threads=threads)
+        stream = zstandard.open(file_path, mode, cctx=cctx)
+        # The zstandard reader does not read lines, buffering makes it iterable like the other streams
+        return cast(IO[bytes], io.BufferedReader(stream) if "r" in mode else stream)
+    raise ValueError(f"Unsupported compression {compression}, use gzip, bz2 or zstd")
+
+
+def _compression(file_path: str, compression: Optional[str]) -> Optional[str]:
+    """
+    Get the stream compression of a csv or ndjson file.
+
+    :param file_path: The path of the file.
+    :type file_path: str
+    :param compression: The configured compression. None or "infer" infers it from the file extension.
+    :type compression: Optional[str]
+    :returns: gzip, bz2, zstd or None for uncompressed files.
+    :rtype: Optional[str]
     """
-    Writes a given DataFrame to a CSV file.
+    if compression is None or compression == "infer":
+        return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    return None if compression in ("none", "uncompressed") else compression
+
+
+def write_data(
+    data: pl.DataFrame,
+    output_file: str,
+    output_file_format: str,
+    append: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Writes a given DataFrame to a file. Supported formats are csv, ndjson, sql (a SQLite table, see
+    :func:`write_sql`), npy (numeric feature matrix, see
+    :func:`write_feature_matrix`), ipc (uncompressed Arrow IPC, readable without copying) and parquet (see
+    :func:`write_parquet_dataset`). csv and ndjson files are compressed while writing if output.compression is
+    gzip, bz2 or zstd, or if it is inferred from the file extension.
 
     :param data: The DataFrame to be written.
     :type data: polars.DataFrame
     :param output_file: The file path to save the data.
     :type output_file: str
+    :param output_file_format: The output file format.
+    :type output_file_format: str
+    :param append: Append the rows to an existing file instead of overwriting it. The header is only written
+        if the file does not exist yet. Only supported for csv, ndjson, sql and partitioned parquet output.
+    :type append: bool
+    :param options: The output configuration, e.g. dtype and order of the npy feature matrix or the
+        partitioning of the parquet output.
+    :type options: Optional[Dict]
 
     :returns: None
 
     :raises Exception: If there is an error while writing the data.
     """
     try:
-        if output_file_format == "csv":
-            data.write_csv(file=output_file)
+        if output_file_format in ("csv", "ndjson"):
+            options = options or {}
+            compression = _compression(output_file, options.get("compression"))
+            mode = "ab" if append else "wb"
+            has_header = not append or not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+            with open_stream(output_file, mode, compression, options) if compression else open(output_file, mode) as f:
+                # polars writes to any binary file object, not only the io.BytesIO of its signature
+                if output_file_format == "ndjson":
+                    data.write_ndjson(cast(io.BytesIO, f))
+                else:
+                    data.write_csv(file=cast(io.BytesIO, f), has_header=has_header)
+        elif output_file_format == "sql":
+            write_sql(data, output_file, options or {}, append=append)
+        elif output_file_format in ("npy", "ipc"):
+            if append:
+                raise ValueError(f"Appending is not supported for {output_file_format} output")
+            if output_file_format == "npy":
+                options = options or {}
+                write_feature_matrix(
+                    data, output_file, dtype=options.get("dtype", "float32"), order=options.get("order", "C")
+                )
+            else:
+                data.write_ipc(output_file, compression="uncompressed")
+        elif output_file_format == "parquet":
+            options = options or {}
+            if options.get("partition_by") or options.get("max_rows_per_file"):
+                write_parquet_dataset(data, output_file, options, append=append)
+            else:
+                if append:
+                    raise ValueError("Appending to parquet output requires partition_by or max_rows_per_file")
+                _write_parquet_file(data, output_file, options)
     except Exception as e:
         raise Exception(f"Error writing data to {output_file}: {str(e)}")
+
+
+def write_chunks(
+    chunks: Iterable[pl.DataFrame],
+    output_file: str,
+    output_file_format: str,
+    append: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    spill_dir: Optional[str] = None,
+) -> int:
+    """
+    Write processed chunks one at a time, so the output never has to be in memory as a whole.
+
+    csv, ndjson, sql and partitioned parquet output is appended to chunk by chunk. Chunks of npy, ipc and single
+    file parquet output are spilled to temporary parquet files first and then streamed into the output: the
+    parquet and ipc outputs by the streaming engine, the npy matrix through a memmap filled part by part.
+
+    :param chunks: The chunks to write. They must share a schema.
+    :type chunks: Iterable[polars.DataFrame]
+    :param output_file: The file path to save the data.
+    :type output_file: str
+    :param output_file_format: The output file format, see :func:`write_data`.
+    :type output_file_format: str
+    :param append: Append the first chunk too, e.g. to the output of a previous incremental run.
+    :type append: bool
+    :param options: The output configuration, see :func:`write_data`.
+    :type options: Optional[Dict]
+    :param spill_dir: The directory of the temporary spill files (default: the system temporary directory).
+    :type spill_dir: Optional[str]
+    :returns: The number of rows written.
+    :rtype: int
+
+    :raises Exception: If there is an error while writing the data.
+    """
+    options = options or {}
+    rows = 0
+    partitioned = output_file_format == "parquet" and (options.get("partition_by") or options.get("max_rows_per_file"))
+    if output_file_format in ("csv", "ndjson", "sql") or partitioned:
+        for i, chunk in enumerate(chunks):
+            write_data(chunk, output_file, output_file_format, append=append or i > 0, options=options)
+            rows += chunk.shape[0]
+        return rows
+
+    if append:
+        raise Exception(f"Error writing data to {output_file}: Appending is not supported for {output_file_format}")
+    with tempfile.TemporaryDirectory(prefix="proxiflow-spill-", dir=spill_dir) as directory:
+        parts = []
+        for i, chunk in enumerate(chunks):
+            parts.append((os.path.join(directory, f"part-{i:05d}.parquet"), chunk.shape[0]))
+            chunk.write_parquet(parts[-1][0], compression="lz4")
+            rows += chunk.shape[0]
+        if len(parts) == 0:
+            return rows
+
+        try:
+            if output_file_format == "npy":
+                dtype, order = options.get("dtype", "float32"), options.get("order", "C")
+                _write_feature_matrix_parts(parts, output_file, dtype, order)
+            else:
+                spilled = pl.scan_parquet(os.path.join(directory, "part-*.parquet"))
+                if output_file_format == "ipc":
+                    spilled.sink_ipc(output_file, compression=None)
+                elif output_file_format == "parquet":
+                    spilled.sink_parquet(
+                        output_file,
+                        compression=options.get("compression", "zstd"),
+                        compression_level=options.get("compression_level"),
+                        row_group_size=options.get("row_group_size"),
+                        statistics=True,
+                    )
+                else:
+                    raise ValueError(f"Unsupported output format {output_file_format}")
+        except Exception as e:
+            raise Exception(f"Error writing data to {output_file}: {str(e)}")
+    return rows
+
+
+def _write_feature_matrix_parts(parts: List[Tuple[str, int]], output_file: str, dtype: str, order: str) -> None:
+    """
+    Write spilled parquet parts as one .npy feature matrix, see :func:`write_feature_matrix`. Only one part is
+    in memory at a time.
+
+    :param parts: The paths of the parts and their number of rows, in row order.
+    :type parts: List[Tuple[str, int]]
+    :param output_file: The file path of the .npy file.
+    :type output_file: str
+    :param dtype: The float type of the matrix, float32 or float64.
+    :type dtype: str
+    :param order: "C" for a row-major or "F" for a column-major matrix.
+    :type order: str
+    """
+    columns = feature_columns(pl.read_parquet(parts[0][0], n_rows=0))
+    shape = (sum(rows for _, rows in parts), len(columns))
+    memmap = np.lib.format.open_memmap(output_file, mode="w+", dtype=dtype, shape=shape, fortran_order=order == "F")
+    start = 0
+    for path, rows in parts:
+        part = pl.read_parquet(path, columns=columns)
+        to_feature_matrix(part, dtype=dtype, order=order, out=memmap[start : start + rows])
+        start += rows
+    memmap.flush()
+    del memmap
+    _write_manifest(output_file, columns, dtype, order, shape)
+
+
+def write_parquet_dataset(
+    data: pl.DataFrame, output_dir: str, options: Dict[str, Any], append: bool = False
+) -> List[str]:
+    """
+    Write a DataFrame as a Hive-partitioned parquet dataset, e.g. ``output_dir/Date=2023-05-01/part-00000.parquet``.
+
+    Query engines can skip partitions that do not match a filter on the partition columns. The partition columns
+    are encoded in the directory names and not stored in the files. Each partition is split into files of at most
+    ``max_rows_per_file`` rows and the files are written in parallel by a pool of ``writers`` threads (the parquet
+    encoder releases the GIL). Column statistics are written so row groups can be skipped as well.
+
+    Supported options: partition_by (column or list of columns), max_rows_per_file, row_group_size,
+    compression (default zstd), compression_level and writers (default: number of CPUs).
+
+    :param data: The DataFrame to be written.
+    :type data: polars.DataFrame
+    :param output_dir: The root directory of the dataset.
+    :type output_dir: str
+    :param options: The parquet output configuration.
+    :type options: Dict
+    :param append: Add the files next to the ones of previous runs. Otherwise part files of previous runs are
+        removed first.
+    :type append: bool
+    :returns: The paths of the written files.
+    :rtype: List[str]
+
+    :raises ValueError: If a partition column does not exist or max_rows_per_file is not positive.
+    """
+    partition_by = options.get("partition_by") or []
+    partition_by = [partition_by] if isinstance(partition_by, str) else list(partition_by)
+    missing = [col for col in partition_by if col not in data.columns]
+    if len(missing) > 0:
+        raise ValueError(f"Partition columns {', '.join(missing)} are missing in the DataFrame.")
+    max_rows = options.get("max_rows_per_file") or max(data.shape[0], 1)
+    if max_rows <= 0:
+        raise ValueError("max_rows_per_file must be positive")
+
+    if not append:
+        for path in glob.glob(os.path.join(output_dir, "**", "part-*.parquet"), recursive=True):
+            os.remove(path)
+    # Files of an appending run get a unique prefix so they never replace the files of previous runs
+    prefix = f"part-{uuid.uuid4().hex[:8]}-" if append else "part-"
+
+    if len(partition_by) > 0:
+        groups = data.partition_by(partition_by, as_dict=True)
+        partitions = [(key if isinstance(key, tuple) else (key,), part) for key, part in groups.items()]
+    else:
+        partitions = [((), data)]
+
+    tasks = []
+    for key, part in partitions:
+        directory = os.path.join(output_dir, *[_hive_directory(col, value) for col, value in zip(partition_by, key)])
+        os.makedirs(directory, exist_ok=True)
+        part = part.drop(partition_by) if len(partition_by) > 0 else part
+        for i, offset in enumerate(range(0, max(part.shape[0], 1), max_rows)):
+            tasks.append((part.slice(offset, max_rows), os.path.join(directory, f"{prefix}{i:05d}.parquet")))
+
+    with ThreadPoolExecutor(max_workers=options.get("writers") or os.cpu_count()) as pool:
+        list(pool.map(lambda task: _write_parquet_file(task[0], task[1], options), tasks))
+
+    return [path for _, path in tasks]
+
+
+def _hive_directory(col: str, value: Any) -> str:
+    """
+    Get the Hive directory name of a partition value.
+
+    :param col: The partition column.
+    :type col: str
+    :param value: The partition value.
+    :type value: Any
+    :returns: The directory name, e.g. "Date=2023-05-01".
+    :rtype: str
+    """
+    encoded = HIVE_NULL_PARTITION if value is None else quote(str(value), safe="")
+    return f"{quote(col, safe='')}={encoded}"
+
+
+def _write_parquet_file(data: pl.DataFrame, output_file: str, options: Dict[str, Any]) -> None:
+    """
+    Write a single parquet file with the configured compression and row group size.
+
+    :param data: The DataFrame to be written.
+    :type data: polars.DataFrame
+    :param output_file: The file path to save the data.
+    :type output_file: str
+    :param options: The parquet output configuration.
+    :type options: Dict
+    """
+    data.write_parquet(
+        output_file,
+        compression=options.get("compression", "zstd"),
+        compression_level=options.get("compression_level"),
+        row_group_size=options.get("row_group_size"),
+        statistics=True,
+    )
+
+
+def to_feature_matrix(
+    data: pl.DataFrame,
+    dtype: str = "float32",
+    order: str = "C",
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Convert the numeric columns of a DataFrame into a contiguous 2D NumPy array for training.
+
+    Every column is copied exactly once, straight into the result array. Columns without missing values are
+    read without an intermediate copy; missing values become NaN.
+
+    :param data: The DataFrame to convert.
+    :type data: polars.DataFrame
+    :param dtype: The float type of the matrix, float32 or float64.
+    :type dtype: str
+    :param order: "C" for a row-major or "F" for a column-major matrix.
+    :type order: str
+    :param out: A preallocated array (e.g. a memmap) of shape (rows, numeric columns) to fill.
+    :type out: Optional[numpy.ndarray]
+    :returns: The matrix and the names of its columns (the manifest).
+    :rtype: Tuple[numpy.ndarray, List[str]]
+
+    :raises ValueError: If dtype or order is not supported.
+    """
+    if dtype not in ("float32", "float64"):
+        raise ValueError(f"Unsupported feature matrix dtype {dtype}, use float32 or float64")
+    if order not in ("C", "F"):
+        raise ValueError(f"Unsupported feature matrix order {order}, use C (row-major) or F (column-major)")
+
+    columns = feature_columns(data)
+    shape = (data.shape[0], len(columns))
+    matrix = out if out is not None else np.empty(shape, dtype=dtype, order="C" if order == "C" else "F")
+    for i, col in enumerate(columns):
+        series = data[col]
+        if series.null_count() > 0:
+            series = series.cast(pl.Float64).fill_null(np.nan)
+        matrix[:, i] = series.to_numpy()
+    return matrix, columns
+
+
+def feature_columns(data: pl.DataFrame) -> List[str]:
+    """
+    Get the numeric and boolean columns of a DataFrame, i.e. the columns of its feature matrix.
+
+    :param data: The DataFrame.
+    :type data: polars.DataFrame
+    :returns: The column names in their DataFrame order.
+    :rtype: List[str]
+    """
+    return [col for col in data.columns if data[col].dtype in pl.NUMERIC_DTYPES or data[col].dtype == pl.Boolean]
+
+
+def write_feature_matrix(data: pl.DataFrame, output_file: str, dtype: str = "float32", order: str = "C") -> None:
+    """
+    Write the numeric columns of a DataFrame as a .npy file that trainers can memory-map with
+    ``numpy.load(output_file, mmap_mode="r")``.
+
+    The matrix is filled in place through a memmap, so it never has to exist in memory as a whole. A JSON
+    manifest with the column names, dtype, order and shape is written next to it as ``<output_file>.json``.
+
+    :param data: The DataFrame to be written.
+    :type data: polars.DataFrame
+    :param output_file: The file path of the .npy file.
+    :type output_file: str
+    :param dtype: The float type of the matrix, float32 or float64.
+    :type dtype: str
+    :param order: "C" for a row-major or "F" for a column-major matrix.
+    :type order: str
+    """
+    columns = feature_columns(data)
+    shape = (data.shape[0], len(columns))
+    memmap = np.lib.format.open_memmap(output_file, mode="w+", dtype=dtype, shape=shape, fortran_order=order == "F")
+    to_feature_matrix(data, dtype=dtype, order=order, out=memmap)
+    memmap.flush()
+    del memmap
+
+    _write_manifest(output_file, columns, dtype, order, shape)
+
+
+def _write_manifest(output_file: str, columns: List[str], dtype: str, order: str, shape: Tuple[int, int]) -> None:
+    """
+    Write the JSON manifest of a .npy feature matrix as ``<output_file>.json``.
+
+    :param output_file: The file path of the .npy file.
+    :type output_file: str
+    :param columns: The names of the matrix columns.
+    :type columns: List[str]
+    :param dtype: The float type of the matrix.
+    :type dtype: str
+    :param order: The memory order of the matrix, C or F.
+    :type order: str
+    :param shape: The shape of the matrix.
+    :type shape: Tuple[int, int]
+    """
+    manifest = {"columns": columns, "dtype": dtype, "order": order, "shape": list(shape)}
+    with open(f"{output_file}.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def to_arrow(data: pl.DataFrame) -> Any:
+    """
+    Hand a DataFrame over as an in-memory pyarrow Table. The column buffers are shared, not copied.
+
+    :param data: The DataFrame to convert.
+    :type data: polars.DataFrame
+    :returns: The Arrow table.
+    :rtype: pyarrow.Table
+
+    :raises ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow export, install it with: pip install proxiflow[arrow]")
+    return data.to_arrow()
+
+
+class SharedFrame:
+    """
+    A handle to a DataFrame stored as an uncompressed Arrow IPC file in shared memory.
+
+    The handle only holds the name of the buffer, so it is cheap to pickle into worker processes. Workers attach
+    to the column buffers by memory-mapping the file instead of receiving a pickled copy of the data.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize a handle to an existing shared frame.
+
+        :param name: The name of the shared frame.
+        :type name: str
+        """
+        self.name = name
+
+    @property
+    def path(self) -> str:
+        """
+        Get the path of the shared IPC file.
+
+        :returns: The file path.
+        :rtype: str
+        """
+        return os.path.join(SHARED_DIR, f"{self.name}.arrow")
+
+    @classmethod
+    def create(cls, df: pl.DataFrame, name: Optional[str] = None) -> "SharedFrame":
+        """
+        Write a DataFrame into shared memory.
+
+        :param df: The DataFrame to share.
+        :type df: polars.DataFrame
+        :param name: The name of the shared frame. A unique name is generated if not given.
+        :type name: Optional[str]
+        :returns: The handle to the shared frame.
+        :rtype: SharedFrame
+        """
+        shared = cls(name or f"proxiflow-{uuid.uuid4().hex}")
+        # Uncompressed IPC keeps the Arrow buffers as they are, so readers can map them without decoding
+        df.write_ipc(shared.path, compression="uncompressed")
+        return shared
+
+    def attach(self, columns: Optional[List[str]] = None) -> pl.DataFrame:
+        """
+        Attach to the shared frame without copying its buffers.
+
+        :param columns: The columns to attach to. All columns are attached if not given.
+        :type columns: Optional[List[str]]
+        :returns: The memory-mapped DataFrame.
+        :rtype: polars.DataFrame
+        """
+        return pl.read_ipc(self.path, columns=columns, memory_map=True, rechunk=False)
+
+    def unlink(self) -> None:
+        """
+        Release the shared memory. Frames already attached stay valid until they are dropped.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.unlink()
+
+
+def share_frame(df: pl.DataFrame, name: Optional[str] = None) -> SharedFrame:
+    """
+    Write a DataFrame into shared memory so that other processes can attach to it by name.
+
+    :param df: The DataFrame to share.
+    :type df: polars.DataFrame
+    :param name: The name of the shared frame. A unique name is generated if not given.
+    :type name: Optional[str]
+    :returns: The handle to the shared frame.
+    :rtype: SharedFrame
+    """
+    return SharedFrame.create(df, name)
+
+
+def attach_frame(name: str, columns: Optional[List[str]] = None) -> pl.DataFrame:
+    """
+    Attach to a DataFrame shared by another process.
+
+    :param name: The name of the shared frame.
+    :type name: str
+    :param columns: The columns to attach to. All columns are attached if not given.
+    :type columns: Optional[List[str]]
+    :returns: The memory-mapped DataFrame.
+    :rtype: polars.DataFrame
+    """
+    return SharedFrame(name).attach(columns)
+
+
+def _run_shared(func: Callable[..., pl.DataFrame], name: str, args: Tuple[Any, ...]) -> str:
+    # Worker side of map_shared: attach to the input, run the task and share the result
+    result = func(attach_frame(name), *args)
+    return share_frame(result).name
+
+
+def map_shared(
+    func: Callable[..., pl.DataFrame],
+    df: pl.DataFrame,
+    tasks: Sequence[Tuple[Any, ...]],
+    max_workers: Optional[int] = None,
+) -> List[pl.DataFrame]:
+    """
+    Run tasks on a DataFrame in a process pool without pickling the data.
+
+    The DataFrame is shared once and every worker attaches to it by name. Each task calls
+    ``func(df, *args)`` and hands its result back through shared memory as well.
+
+    :param func: A picklable (module level) function taking the DataFrame and the task arguments.
+    :type func: Callable
+    :param df: The DataFrame to share with the workers.
+    :type df: polars.DataFrame
+    :param tasks: The arguments of each task, e.g. row ranges.
+    :type tasks: Sequence[Tuple]
+    :param max_workers: The number of worker processes. Defaults to the number of CPUs.
+    :type max_workers: Optional[int]
+    :returns: The results of the tasks in the order of the tasks.
+    :rtype: List[polars.DataFrame]
+    """
+    results = []
+    futures: List["Future[str]"] = []
+    with share_frame(df) as shared:
+        # Forking a process that runs polars threads can deadlock, so the workers are spawned
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                futures = [executor.submit(_run_shared, func, shared.name, tuple(args)) for args in tasks]
+                try:
+                    for future in futures:
+                        with SharedFrame(future.result()) as result:
+                            results.append(result.attach())
+                except BaseException:
+                    # Do not start the tasks still pending if one of them failed
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            # The executor has shut down, so every started task is done: release the results not attached yet
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    SharedFrame(future.result()).unlink()
+    return results
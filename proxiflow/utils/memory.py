@@ -0,0 +1,158 @@
+import re
+import polars as pl
+
+from typing import Any, Dict, Optional, Union
+
+# Copies of the input the eager pipeline holds at its peak: the parse buffers of load_data, the frames of the
+# stages and the written output. Measured at about 3x the estimated DataFrame size for a clean, normalize and
+# one-hot run, rounded up.
+DEFAULT_PEAK_FACTOR = 4.0
+
+# Bytes per value of the fixed width types
+DTYPE_BYTES: Dict[Any, int] = {
+    pl.Boolean: 1,
+    pl.Int8: 1,
+    pl.UInt8: 1,
+    pl.Int16: 2,
+    pl.UInt16: 2,
+    pl.Int32: 4,
+    pl.UInt32: 4,
+    pl.Float32: 4,
+    pl.Date: 4,
+    pl.Categorical: 4,
+    pl.Int64: 8,
+    pl.UInt64: 8,
+    pl.Float64: 8,
+    pl.Datetime: 8,
+    pl.Duration: 8,
+    pl.Time: 8,
+}
+
+# Bytes per string value besides its characters (the offset into the string buffer)
+STRING_OFFSET_BYTES = 8
+
+_UNITS = {"": 1, "b": 1, "k": 2**10, "m": 2**20, "g": 2**30, "t": 2**40}
+
+
+def parse_size(size: Union[int, float, str]) -> int:
+    """
+    Parse a memory size like ``512MB``, ``2GiB``, ``1.5g`` or a number of bytes. Units are binary (1KB = 1024
+    bytes).
+
+    :param size: The size.
+    :type size: Union[int, float, str]
+    :returns: The size in bytes.
+    :rtype: int
+
+    :raises ValueError: If the size can not be parsed or is not positive.
+    """
+    if isinstance(size, (int, float)):
+        value = float(size)
+    else:
+        match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([kmgt]?)(i?b)?\s*", size.lower())
+        if match is None:
+            raise ValueError(f"Invalid memory size {size}, use e.g. 512MB or 2GB")
+        value = float(match.group(1)) * _UNITS[match.group(2)]
+    if value <= 0:
+        raise ValueError(f"Memory size must be positive, got {size}")
+    return int(value)
+
+
+def row_footprint(df: pl.DataFrame) -> float:
+    """
+    Estimate the in-memory size of a row from the schema. Fixed width columns count their type width, string
+    columns the mean length of the sampled values plus an offset, and every column a validity bit.
+
+    :param df: A sample of the rows, e.g. the first rows of the input.
+    :type df: polars.DataFrame
+    :returns: The estimated number of bytes per row.
+    :rtype: float
+    """
+    size = 0.0
+    for col, dtype in df.schema.items():
+        if dtype == pl.Utf8:
+            lengths = df[col].str.lengths().mean() if df.shape[0] > 0 else None
+            size += STRING_OFFSET_BYTES + float(lengths or 0.0)
+        else:
+            # Equality also matches parametrized types like Datetime("ms"); nested types are counted as 8 bytes
+            size += next((width for base, width in DTYPE_BYTES.items() if dtype == base), 8)
+        size += 1 / 8
+    return size
+
+
+class MemoryGovernor:
+    """
+    Decide how to run the pipeline within a memory budget.
+
+    The peak memory of a run is estimated as rows x row footprint x peak factor. Inputs that fit are processed
+    eagerly as a whole; larger inputs are streamed in chunks sized to the budget.
+    """
+
+    def __init__(self, max_memory: Union[int, float, str], peak_factor: Optional[float] = None):
+        """
+        Initialize a new MemoryGovernor object.
+
+        :param max_memory: The memory budget, e.g. "4GB" or a number of bytes.
+        :type max_memory: Union[int, float, str]
+        :param peak_factor: The number of copies of the data the pipeline holds at its peak (default: 4).
+        :type peak_factor: Optional[float]
+
+        :raises ValueError: If the budget can not be parsed or the peak factor is not positive.
+        """
+        self.max_memory = parse_size(max_memory)
+        self.peak_factor = float(peak_factor) if peak_factor is not None else DEFAULT_PEAK_FACTOR
+        if self.peak_factor <= 0:
+            raise ValueError(f"peak_factor must be positive, got {peak_factor}")
+
+    def peak_memory(self, rows: int, row_bytes: float) -> int:
+        """
+        Estimate the peak memory of processing a number of rows eagerly.
+
+        :param rows: The number of rows.
+        :type rows: int
+        :param row_bytes: The estimated bytes per row, see :func:`row_footprint`.
+        :type row_bytes: float
+        :returns: The estimated peak memory in bytes.
+        :rtype: int
+        """
+        return int(rows * row_bytes * self.peak_factor)
+
+    def fits(self, rows: int, row_bytes: float) -> bool:
+        """
+        Check whether a number of rows can be processed eagerly within the budget.
+
+        :param rows: The number of rows.
+        :type rows: int
+        :param row_bytes: The estimated bytes per row.
+        :type row_bytes: float
+        :returns: True if the estimated peak memory is within the budget.
+        :rtype: bool
+        """
+        return self.peak_memory(rows, row_bytes) <= self.max_memory
+
+    def chunk_rows(self, row_bytes: float) -> int:
+        """
+        Get the number of rows of a chunk that can be processed within the budget.
+
+        :param row_bytes: The estimated bytes per row.
+        :type row_bytes: float
+        :returns: The chunk size, at least one row.
+        :rtype: int
+        """
+        return max(1, int(self.max_memory / (max(row_bytes, 1.0) * self.peak_factor)))
+
+
+def format_size(size: float) -> str:
+    """
+    Format a number of bytes for log messages, e.g. "1.5 GB".
+
+    :param size: The number of bytes.
+    :type size: float
+    :returns: The formatted size.
+    :rtype: str
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
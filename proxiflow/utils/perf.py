@@ -0,0 +1,213 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from .memory import format_size
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Before Python 3.12 cProfile only sees the thread that enabled it, since then it profiles all threads through
+# sys.monitoring and only one profile can be enabled at a time
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+# Functions listed in the text summary of the profile and allocation sites listed per stage
+DEFAULT_TOP = 30
+# Frames of the tracing machinery itself, excluded from the allocation sites
+IGNORED_FRAMES = {
+    tracemalloc.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+}
+
+
+class RunProfiler:
+    """
+    Profile a run for later analysis: the CPU time of every Python function with cProfile and, if enabled, the
+    allocations of every stage with tracemalloc.
+
+    The operations of a layer run on a thread pool. Before Python 3.12 every thread started while profiling gets
+    its own profile, merged into the profile of the run; since 3.12 the profile of the run covers all threads.
+    Tracing allocations slows down every allocation of Python code and the snapshots of a stage cost time growing
+    with the number of live Python objects, so the timings of a run tracing allocations are skewed. tracemalloc
+    only sees allocations made by Python code: the buffers polars allocates in Rust are not traced, they show up
+    as the allocation sites of the Python objects wrapping them.
+
+    The directory gets ``run.pstats`` (load it with :mod:`pstats` or a viewer like snakeviz), ``run.txt`` (the
+    functions with the highest cumulative time), ``allocations.txt`` when tracing allocations (the top allocation
+    sites and the peak traced memory of every stage and of the whole run) and ``plan.txt`` (the execution plans
+    of the run).
+    """
+
+    def __init__(self, directory: str, top: int = DEFAULT_TOP, trace_allocations: bool = False):
+        """
+        Initialize a new RunProfiler object.
+
+        :param directory: The output directory, created if missing.
+        :type directory: str
+        :param top: The number of functions and allocation sites listed in the text files.
+        :type top: int
+        :param trace_allocations: Whether to trace the allocations of every stage with tracemalloc.
+        :type trace_allocations: bool
+        """
+        self.directory = directory
+        self.top = top
+        self.trace_allocations = trace_allocations
+        self.profile = cProfile.Profile()
+        # Profiles of the threads started while profiling
+        self.thread_profiles: List[cProfile.Profile] = []
+        self.lock = threading.Lock()
+        # Net allocations of every site by stage, summed over the runs of a stage (e.g. one per chunk)
+        self.allocations: Dict[str, Dict[Tuple[str, int], List[int]]] = {}
+        # Peak traced memory of every stage above the traced memory when the stage started
+        self.peaks: Dict[str, int] = {}
+        # Execution plans by name
+        self.plans: Dict[str, str] = {}
+        self._tracing = False
+        self._start: Optional[tracemalloc.Snapshot] = None
+        # Traced memory when profiling started and the highest traced memory since, as every stage resets the peak
+        self._traced = 0
+        self._peak = 0
+
+    def __enter__(self) -> "RunProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Start profiling the calling thread and the threads it starts, and tracing allocations if enabled.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            self._start = tracemalloc.take_snapshot()
+            self._traced = self._peak = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if PER_THREAD_PROFILES:
+            threading.setprofile(self._profile_thread)
+        self.profile.enable()
+
+    def stop(self) -> None:
+        """
+        Stop profiling and write the profile, the allocations and the plans to the directory.
+        """
+        self.profile.disable()
+        if PER_THREAD_PROFILES:
+            threading.setprofile(None)
+        if self._start is not None:
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self._record("run", self._start, self._peak - self._traced)
+            self._start = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        with self.lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        stats.dump_stats(os.path.join(self.directory, "run.pstats"))
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with open(os.path.join(self.directory, "run.txt"), "w") as f:
+            f.write(summary.getvalue())
+        if self.trace_allocations:
+            with open(os.path.join(self.directory, "allocations.txt"), "w") as f:
+                f.write(self.format_allocations())
+        if self.plans:
+            with open(os.path.join(self.directory, "plan.txt"), "w") as f:
+                f.write("\n\n".join(f"# {name}\n{text}" for name, text in self.plans.items()) + "\n")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Record the allocations of a stage: the sites of the memory allocated by the stage and still held at its
+        end, and the peak traced memory while it ran. A stage run several times accumulates its allocations.
+        Nothing is recorded without tracing allocations.
+
+        :param name: The stage name.
+        :type name: str
+        """
+        if not self.trace_allocations:
+            yield
+            return
+        before = tracemalloc.take_snapshot()
+        traced, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._peak = max(self._peak, peak)
+            self._record(name, before, peak - traced)
+
+    def explain(self, name: str, text: str) -> None:
+        """
+        Add an execution plan to ``plan.txt``. Only the first plan of a name is kept, e.g. of the first chunk.
+
+        :param name: The name of the plan, e.g. the stage or the split it runs on.
+        :type name: str
+        :param text: The plan as text.
+        :type text: str
+        """
+        self.plans.setdefault(name, text)
+
+    def format_allocations(self) -> str:
+        """
+        Format the top allocation sites of every stage, in the order the stages ran.
+
+        :returns: The allocations as text.
+        :rtype: str
+        """
+        lines = []
+        for name, sites in self.allocations.items():
+            net = sum(size for size, _ in sites.values())
+            lines.append(f"{name}: peak {format_size(self.peaks[name])}, net {format_size(net)}")
+            top = sorted(sites.items(), key=lambda site: site[1][0], reverse=True)[: self.top]
+            for (filename, lineno), (size, count) in top:
+                if size <= 0:
+                    break
+                lines.append(f"  {format_size(size):>10}  {count:>8} blocks  {filename}:{lineno}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def _record(self, name: str, before: tracemalloc.Snapshot, peak: int) -> None:
+        """
+        Add the net allocations since a snapshot to a stage.
+
+        :param name: The stage name.
+        :type name: str
+        :param before: The snapshot taken when the stage started.
+        :type before: tracemalloc.Snapshot
+        :param peak: The peak traced memory of the stage.
+        :type peak: int
+        """
+        sites = self.allocations.setdefault(name, {})
+        for diff in tracemalloc.take_snapshot().compare_to(before, "lineno"):
+            frame = diff.traceback[0]
+            if frame.filename in IGNORED_FRAMES or (diff.size_diff == 0 and diff.count_diff == 0):
+                continue
+            site = sites.setdefault((frame.filename, frame.lineno), [0, 0])
+            site[0] += diff.size_diff
+            site[1] += diff.count_diff
+        self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def _profile_thread(self, frame: Any, event: str, arg: Any) -> None:
+        """
+        Start a profile of a new thread. Installed with :func:`threading.setprofile`, it runs on the first event of
+        every thread and replaces itself with the profile. Only used before Python 3.12, see PER_THREAD_PROFILES.
+        """
+        profile = cProfile.Profile()
+        with self.lock:
+            self.thread_profiles.append(profile)
+        profile.enable()
@@ -0,0 +1,394 @@
+import queue
+import sqlite3
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Rows fetched from or inserted into the database per round trip
+DEFAULT_BATCH_SIZE = 10_000
+# SQLite column types of the polars dtypes, everything else is stored as TEXT
+SQLITE_TYPES: Dict[Any, str] = {
+    pl.Int8: "INTEGER",
+    pl.Int16: "INTEGER",
+    pl.Int32: "INTEGER",
+    pl.Int64: "INTEGER",
+    pl.UInt8: "INTEGER",
+    pl.UInt16: "INTEGER",
+    pl.UInt32: "INTEGER",
+    pl.UInt64: "INTEGER",
+    pl.Boolean: "INTEGER",
+    pl.Float32: "REAL",
+    pl.Float64: "REAL",
+    pl.Binary: "BLOB",
+}
+
+
+class ConnectionPool:
+    """
+    A fixed-size pool of SQLite connections that can be shared by threads.
+    """
+
+    def __init__(self, database: str, size: int = 1, timeout: float = 30.0):
+        """
+        Initialize a new ConnectionPool object. The connections are opened lazily.
+
+        :param database: The path to the SQLite database file.
+        :type database: str
+        :param size: The maximum number of open connections.
+        :type size: int
+        :param timeout: Seconds a connection waits for a lock held by another connection.
+        :type timeout: float
+        """
+        self.database = database
+        self.timeout = timeout
+        self._idle: queue.Queue = queue.Queue()
+        self._slots: queue.Queue = queue.Queue()
+        for _ in range(max(size, 1)):
+            self._slots.put(None)
+        self._connections: List[sqlite3.Connection] = []
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection, waiting until one is free.
+
+        :returns: A context manager yielding the connection. It goes back to the pool on exit.
+        :rtype: Iterator[sqlite3.Connection]
+        """
+        self._slots.get()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+            self._connections.append(conn)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+            self._slots.put(None)
+
+    def close(self) -> None:
+        """
+        Close all connections of the pool.
+        """
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+        self._idle = queue.Queue()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def load_sql(database: str, options: Dict[str, Any], skip_rows: int = 0) -> pl.DataFrame:
+    """
+    Read the result of a query or a whole table of a SQLite database.
+
+    Rows are fetched in batches of ``batch_size``, each batch is turned into a DataFrame right away, so the cursor
+    never materializes the full result as rows. A table with rowids can be read by ``readers`` connections in
+    parallel, each one reading a range of rowids; views and WITHOUT ROWID tables are read by one connection.
+
+    A table is read in storage order, or sorted by ``order_by`` if configured, which reads it over one connection.
+
+    Supported options: query or table (one is mandatory), order_by, batch_size and readers.
+
+    :param database: The path to the SQLite database file.
+    :type database: str
+    :param options: The sql input configuration.
+    :type options: Dict
+    :param skip_rows: The number of result rows to skip, e.g. rows processed by a previous incremental run. Queries
+        need a stable ORDER BY and tables an order_by for this to be meaningful.
+    :type skip_rows: int
+    :returns: The DataFrame containing the rows.
+    :rtype: polars.DataFrame
+
+    :raises ValueError: If neither a query nor a table is configured.
+    """
+    query = options.get("query")
+    table = options.get("table")
+    if query is None and table is None:
+        raise ValueError("input.query or input.table is required for sql input")
+    batch_size = options.get("batch_size") or DEFAULT_BATCH_SIZE
+    readers = options.get("readers") or 1
+
+    with ConnectionPool(database, size=readers) as pool:
+        ranges = None
+        if table is not None and query is None and readers > 1 and not options.get("order_by"):
+            ranges = _rowid_ranges(pool, table, readers, skip_rows)
+        if ranges is None:
+            with pool.connection() as conn:
+                return concat_frames(list(_fetch(conn, _select(options, skip_rows), (), batch_size)))
+
+        sql = f"SELECT * FROM {_quote(table)} WHERE rowid BETWEEN ? AND ? ORDER BY rowid"
+
+        def read(bounds: Tuple[int, int]) -> List[pl.DataFrame]:
+            with pool.connection() as conn:
+                return list(_fetch(conn, sql, bounds, batch_size))
+
+        with ThreadPoolExecutor(max_workers=readers) as executor:
+            frames = [frame for result in executor.map(read, ranges) for frame in result]
+        if len(frames) == 0:
+            with pool.connection() as conn:
+                frames = list(_fetch(conn, f"SELECT * FROM {_quote(table)} LIMIT 0", (), batch_size))
+        return concat_frames(frames)
+
+
+def iter_sql(database: str, options: Dict[str, Any], chunk_rows: int, skip_rows: int = 0) -> Iterator[pl.DataFrame]:
+    """
+    Read the result of a query or a whole table of a SQLite database in chunks of rows, over a single cursor.
+
+    :param database: The path to the SQLite database file.
+    :type database: str
+    :param options: The sql input configuration, see :func:`load_sql`. readers is ignored.
+    :type options: Dict
+    :param chunk_rows: The number of rows per chunk.
+    :type chunk_rows: int
+    :param skip_rows: The number of result rows to skip.
+    :type skip_rows: int
+    :returns: An iterator over the chunks.
+    :rtype: Iterator[polars.DataFrame]
+
+    :raises ValueError: If neither a query nor a table is configured.
+    """
+    sql = _select(options, skip_rows)
+    with ConnectionPool(database) as pool, pool.connection() as conn:
+        for chunk in _fetch(conn, sql, (), chunk_rows):
+            if chunk.shape[0] > 0:
+                yield chunk
+
+
+def count_sql(database: str, options: Dict[str, Any], skip_rows: int = 0) -> int:
+    """
+    Count the rows of the configured query or table.
+
+    :param database: The path to the SQLite database file.
+    :type database: str
+    :param options: The sql input configuration, see :func:`load_sql`.
+    :type options: Dict
+    :param skip_rows: The number of result rows to skip.
+    :type skip_rows: int
+    :returns: The number of rows.
+    :rtype: int
+
+    :raises ValueError: If neither a query nor a table is configured.
+    """
+    with ConnectionPool(database) as pool, pool.connection() as conn:
+        return int(conn.execute(f"SELECT COUNT(*) FROM ({_select(options, skip_rows)})").fetchone()[0])
+
+
+def _select(options: Dict[str, Any], skip_rows: int) -> str:
+    """
+    Build the query reading the configured query or table.
+
+    :param options: The sql input configuration.
+    :type options: Dict
+    :param skip_rows: The number of result rows to skip.
+    :type skip_rows: int
+    :returns: The query.
+    :rtype: str
+
+    :raises ValueError: If neither a query nor a table is configured.
+    """
+    query = options.get("query")
+    table = options.get("table")
+    if query is None and table is None:
+        raise ValueError("input.query or input.table is required for sql input")
+    if query is not None:
+        sql = str(query)
+    else:
+        sql = f"SELECT * FROM {_quote(table)}"
+        order_by = options.get("order_by")
+        if order_by:
+            keys = [order_by] if isinstance(order_by, str) else order_by
+            sql += " ORDER BY " + ", ".join(_quote(key) for key in keys)
+    if skip_rows > 0:
+        sql = f"SELECT * FROM ({sql}) LIMIT -1 OFFSET {int(skip_rows)}"
+    return sql
+
+
+def write_sql(data: pl.DataFrame, database: str, options: Dict[str, Any], append: bool = False) -> None:
+    """
+    Write a DataFrame to a SQLite table with batched inserts.
+
+    Each batch of ``batch_size`` rows is inserted with one ``executemany`` call and all batches are committed in
+    a single transaction. SQLite allows one writer at a time, so the rows are written over a single pooled
+    connection; parallel writers would only wait for each other's locks.
+
+    Supported options: table (mandatory) and batch_size.
+
+    :param data: The DataFrame to be written.
+    :type data: polars.DataFrame
+    :param database: The path to the SQLite database file.
+    :type database: str
+    :param options: The sql output configuration.
+    :type options: Dict
+    :param append: Insert the rows into an existing table. Otherwise the table is replaced.
+    :type append: bool
+
+    :raises ValueError: If no table is configured.
+    """
+    table = options.get("table")
+    if table is None:
+        raise ValueError("output.table is required for sql output")
+    batch_size = options.get("batch_size") or DEFAULT_BATCH_SIZE
+
+    # Temporal and nested values have no SQLite type, store their string representation
+    data = data.with_columns(
+        [pl.col(col).cast(pl.Utf8) for col in data.columns if data[col].dtype not in SQLITE_TYPES]
+    )
+    columns = ", ".join(f"{_quote(col)} {SQLITE_TYPES.get(data[col].dtype, 'TEXT')}" for col in data.columns)
+    placeholders = ", ".join("?" for _ in data.columns)
+
+    with ConnectionPool(database) as pool, pool.connection() as conn:
+        with conn:
+            if not append:
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+            for offset in range(0, data.shape[0], batch_size):
+                batch = data.slice(offset, batch_size)
+                conn.executemany(f"INSERT INTO {_quote(table)} VALUES ({placeholders})", batch.rows())
+
+
+def _fetch(conn: sqlite3.Connection, sql: str, params: Sequence[Any], batch_size: int) -> Iterator[pl.DataFrame]:
+    """
+    Run a query and turn every batch of fetched rows into a DataFrame. A result without rows gives one empty
+    DataFrame with the result columns.
+
+    :param conn: The database connection.
+    :type conn: sqlite3.Connection
+    :param sql: The query.
+    :type sql: str
+    :param params: The query parameters.
+    :type params: Sequence
+    :param batch_size: The number of rows per fetch.
+    :type batch_size: int
+    :returns: An iterator over the batches.
+    :rtype: Iterator[polars.DataFrame]
+    """
+    cursor = conn.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    empty = True
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            empty = False
+            yield pl.DataFrame([_to_series(col, values) for col, values in zip(columns, zip(*rows))])
+    finally:
+        cursor.close()
+    if empty:
+        yield pl.DataFrame([pl.Series(col, [], dtype=pl.Utf8) for col in columns])
+
+
+def _rowid_ranges(pool: ConnectionPool, table: str, parts: int, skip_rows: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Split the rowids of a table into ranges for parallel reads.
+
+    :param pool: The connection pool.
+    :type pool: ConnectionPool
+    :param table: The table name.
+    :type table: str
+    :param parts: The number of ranges.
+    :type parts: int
+    :param skip_rows: The number of leading rows to leave out.
+    :type skip_rows: int
+    :returns: Inclusive (first, last) rowid ranges in rowid order, None if the table has no rowids (a view or a
+        WITHOUT ROWID table).
+    :rtype: Optional[List[Tuple[int, int]]]
+    """
+    with pool.connection() as conn:
+        try:
+            conn.execute(f"SELECT rowid FROM {_quote(table)} LIMIT 0")
+        except sqlite3.OperationalError:
+            return None
+        first = conn.execute(
+            f"SELECT rowid FROM {_quote(table)} ORDER BY rowid LIMIT 1 OFFSET ?", (skip_rows,)
+        ).fetchone()
+        last = conn.execute(f"SELECT MAX(rowid) FROM {_quote(table)}").fetchone()
+    if first is None:
+        return []
+    # Views of some SQLite versions have a rowid column, always null
+    if first[0] is None:
+        return None
+    start, end = first[0], last[0]
+    step = (end - start) // parts + 1
+    return [(lower, min(lower + step - 1, end)) for lower in range(start, end + 1, step)]
+
+
+def _to_series(name: str, values: Tuple[Any, ...]) -> pl.Series:
+    """
+    Build a Series from the values of a column. SQLite columns are dynamically typed: polars promotes mixed
+    integers and floats to Float64, other mixed values are stored as strings.
+
+    :param name: The column name.
+    :type name: str
+    :param values: The values.
+    :type values: Tuple
+    :returns: The Series.
+    :rtype: polars.Series
+    """
+    try:
+        series = pl.Series(name, values)
+    except (OverflowError, TypeError, ValueError):
+        series = None
+    # Values polars cannot convert to the inferred type become null
+    if series is None or series.null_count() != values.count(None):
+        series = pl.Series(name, [str(value) if value is not None else None for value in values], dtype=pl.Utf8)
+    return series
+
+
+def concat_frames(frames: List[pl.DataFrame]) -> pl.DataFrame:
+    """
+    Concatenate frames with their own inferred schemas, e.g. chunks of a file or batches of a query, like the
+    schema inference of the whole input: columns missing or only null in a frame take the type of the other
+    frames, numeric columns of different types become Float64 and other conflicting types Utf8. The frames are
+    not copied into contiguous columns.
+
+    :param frames: The frames.
+    :type frames: List[polars.DataFrame]
+    :returns: The concatenated DataFrame.
+    :rtype: polars.DataFrame
+    """
+    if len(frames) == 0:
+        return pl.DataFrame()
+    dtypes: Dict[str, List[Any]] = {}
+    for frame in frames:
+        for col, dtype in frame.schema.items():
+            types = dtypes.setdefault(col, [])
+            if frame.shape[0] > frame[col].null_count() and dtype not in types:
+                types.append(dtype)
+    schema = {}
+    for col, types in dtypes.items():
+        if len(types) <= 1:
+            schema[col] = types[0] if types else next(frame.schema[col] for frame in frames if col in frame.columns)
+        else:
+            schema[col] = pl.Float64 if all(dtype in pl.NUMERIC_DTYPES for dtype in types) else pl.Utf8
+    if all(frame.schema == schema for frame in frames):
+        return pl.concat(frames, rechunk=False)
+    aligned = [
+        frame.select(
+            [
+                (pl.col(col) if col in frame.columns else pl.lit(None)).cast(dtype).alias(col)
+                for col, dtype in schema.items()
+            ]
+        )
+        for frame in frames
+    ]
+    return pl.concat(aligned, rechunk=False)
+
+
+def _quote(identifier: Optional[str]) -> str:
+    """
+    Quote a table or column name.
+
+    :param identifier: The name.
+    :type identifier: str
+    :returns: The quoted name.
+    :rtype: str
+    """
+    return '"' + str(identifier).replace('"', '""') + '"'
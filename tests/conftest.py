@@ -0,0 +1,17 @@
+import copy
+import pytest
+
+
+@pytest.fixture()
+def make_stage(config):
+    """
+    Build a stage from the config of the test module with one configuration section replaced, e.g.
+    ``make_stage(Sampler, "sampling", {"size": 100})``. The config of the module is left unchanged.
+    """
+
+    def make(cls, key, section):
+        stage_config = copy.copy(config)
+        stage_config.config = {**config.config, key: section}
+        return cls(stage_config)
+
+    return make
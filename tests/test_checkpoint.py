@@ -0,0 +1,65 @@
+import os
+import pytest
+import polars as pl
+from proxiflow.core import Checkpoint, IncrementalState, run_fingerprint
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame({"A": [1, 2, None], "B": ["x", "y", "z"]})
+
+
+class TestCheckpoint:
+    """
+    A test class for the stage and chunk checkpoints in the proxiflow library.
+    """
+
+    def test_save_and_resume(self, df, tmp_path):
+        checkpoint = Checkpoint(str(tmp_path), "run")
+        checkpoint.save("data_cleaning", df, input_rows=3)
+        checkpoint.save("chunk-00000", df[:1], input_rows=2)
+
+        resumed = Checkpoint(str(tmp_path), "run", resume=True)
+        assert resumed.names() == ["data_cleaning", "chunk-00000"]
+        assert resumed.names("chunk-") == ["chunk-00000"]
+        assert resumed.meta("chunk-00000") == {"file": "chunk-00000.arrow", "rows": 1, "input_rows": 2}
+        assert resumed.load("data_cleaning").frame_equal(df, null_equal=True)
+
+    def test_fresh_run_clears(self, df, tmp_path):
+        Checkpoint(str(tmp_path), "run").save("data_cleaning", df)
+        assert not Checkpoint(str(tmp_path), "run").has("data_cleaning")
+        assert os.listdir(tmp_path) == []
+
+    def test_clear_keeps_other_files(self, df, tmp_path):
+        (tmp_path / "data.arrow").write_bytes(b"not a checkpoint")
+        checkpoint = Checkpoint(str(tmp_path), "run")
+        checkpoint.save("data_cleaning", df)
+        checkpoint.clear()
+        assert os.listdir(tmp_path) == ["data.arrow"]
+
+    def test_different_run(self, df, tmp_path):
+        Checkpoint(str(tmp_path), "run").save("data_cleaning", df)
+        with pytest.raises(ValueError):
+            Checkpoint(str(tmp_path), "other run", resume=True)
+
+    def test_state(self, df, tmp_path):
+        state = IncrementalState()
+        state.update("data_cleaning", df)
+        checkpoint = Checkpoint(str(tmp_path), "run")
+        assert checkpoint.state() is None
+        checkpoint.save("data_cleaning", df, state)
+        resumed = Checkpoint(str(tmp_path), "run", resume=True).state()
+        assert resumed is not None
+        assert resumed.stats("data_cleaning")["A"].count == 2
+
+    def test_run_fingerprint(self, tmp_path):
+        input_file = tmp_path / "data.csv"
+        input_file.write_text("A\n1\n")
+        fingerprint = run_fingerprint(CONFIG_FILE_PATH, str(input_file))
+        assert fingerprint == run_fingerprint(CONFIG_FILE_PATH, str(input_file))
+        assert fingerprint != run_fingerprint(CONFIG_FILE_PATH, str(input_file), skip_rows=1)
+        assert fingerprint != run_fingerprint(CONFIG_FILE_PATH, str(input_file), chunk_rows=10)
+        input_file.write_text("A\n1\n2\n")
+        assert fingerprint != run_fingerprint(CONFIG_FILE_PATH, str(input_file))
@@ -3,7 +3,7 @@ import polars as pl
 import numpy as np
 from sklearn.impute import KNNImputer
 from proxiflow.config import Config
-from proxiflow.core import Cleaner
+from proxiflow.core import Cleaner, IncrementalState
 
 CONFIG_FILE_PATH = "tests/data/config.yaml"
 DATA_FILE_PATH = "tests/data/input.csv"
@@ -40,6 +40,36 @@ class TestCleaner:
         with pytest.raises(ValueError):
             cleaner.clean_data(pl.DataFrame())
 
+    def test_clean_data_runs_all_steps(self):
+        """
+        Test that filling missing values does not skip outlier handling and duplicate removal.
+        """
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH))
+        cleaner.config = {
+            "handle_missing_values": {"drop": False, "mean": True},
+            "handle_outliers": False,
+            "remove_duplicates": True,
+        }
+        df = pl.DataFrame({"A": [1.0, 1.0, None, 4.0], "B": ["x", "x", "y", "z"]})
+        cleaned_data = cleaner.clean_data(df)
+        assert cleaned_data.shape[0] == 3
+        assert cleaned_data["A"].null_count() == 0
+
+    def test_outliers_after_fill(self):
+        """
+        Test that columns filling missing values turns into Float64 get their outliers handled.
+        """
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH))
+        cleaner.config = {
+            "handle_missing_values": {"drop": False, "median": True},
+            "handle_outliers": True,
+            "remove_duplicates": False,
+        }
+        df = pl.DataFrame({"A": [1, 2, 3, None, 4, 100], "B": [1, 2, 3, 4, 5, 6]})
+        cleaned_data = cleaner.clean_data(df)
+        assert cleaned_data["A"].to_list() == [1.0, 2.0, 3.0, 3.0, 4.0, 3.0]
+        assert cleaned_data["B"].to_list() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
     def test_remove_duplicates(self, data, cleaner):
         """
         Test the remove_duplicates method of the Cleaner class.
@@ -124,17 +154,65 @@ class TestCleaner:
         Raises:
         AssertionError: If the test fails.
         """
-        pass
-        # df_with_nulls = pl.DataFrame({
-        #     "A": [1, 2, 2, 2, 4, None],
-        #     "B": ["One","One", "Five", "Two", None, "Three"]
-        # })
-        # cleaned_data = cleaner.mode_missing(df_with_nulls)
-        # expected_df =  pl.DataFrame({
-        #     "A": [1, 2, 2, 2, 4, 2],
-        #     "B": ["One","One", "Five", "Two", "One", "Three"]
-        # })
-        # assert expected_df.frame_equal(cleaned_data)
+        df_with_nulls = pl.DataFrame({
+            "A": [1, 2, 2, 2, 4, None],
+            "B": ["One", "One", "Five", "Two", None, "Three"]
+        })
+        cleaned_data = cleaner._mode_missing(df_with_nulls)
+        expected_df = pl.DataFrame({
+            "A": [1, 2, 2, 2, 4, 2],
+            "B": ["One", "One", "Five", "Two", "One", "Three"]
+        })
+        assert expected_df.frame_equal(cleaned_data)
+
+    def test_mode_missing_categorical(self, cleaner):
+        df_with_nulls = pl.DataFrame({"A": pl.Series(["x", None, "y", "y", None]).cast(pl.Categorical)})
+        cleaned_data = cleaner._mode_missing(df_with_nulls)
+        assert cleaned_data["A"].cast(pl.Utf8).to_list() == ["x", "y", "y", "y", "y"]
+
+    def test_fill_missing_per_column(self, cleaner):
+        """
+        Test that every column is filled with its own strategy and the global switch applies to the rest.
+        """
+        df_with_nulls = pl.DataFrame(
+            {
+                "A": [1.0, None, 3.0, 10.0],
+                "B": [1.0, None, 3.0, 4.0],
+                "C": [None, 2, None, 4],
+                "D": ["x", None, "y", None],
+                "E": [1.0, None, 5.0, None],
+            }
+        )
+        missing_values = {
+            "mean": True,
+            "columns": {
+                "B": "interpolate",
+                "C": {"strategy": "forward_fill"},
+                "D": {"strategy": "constant", "value": "unknown"},
+                "E": "median",
+            },
+        }
+        strategies = cleaner._missing_strategies(df_with_nulls, missing_values)
+        cleaned_data = cleaner._fill_missing(df_with_nulls, strategies)
+        expected = pl.DataFrame(
+            {
+                "A": [1.0, 14.0 / 3.0, 3.0, 10.0],
+                "B": [1.0, 2.0, 3.0, 4.0],
+                "C": [None, 2, 2, 4],
+                "D": ["x", "unknown", "y", "unknown"],
+                "E": [1.0, 3.0, 5.0, 3.0],
+            }
+        )
+        assert expected.frame_equal(cleaned_data)
+
+    def test_missing_strategies_invalid(self, cleaner):
+        df_with_nulls = pl.DataFrame({"A": ["x", None]})
+        with pytest.raises(ValueError):
+            cleaner._missing_strategies(df_with_nulls, {"columns": {"A": "mean"}})
+        with pytest.raises(ValueError):
+            cleaner._missing_strategies(df_with_nulls, {"columns": {"A": "unknown"}})
+        with pytest.raises(ValueError):
+            cleaner._missing_strategies(df_with_nulls, {"columns": {"A": {"strategy": "constant"}}})
 
     def test_knn_impute_missing(self, cleaner):
         # Create a sample DataFrame with missing values
@@ -175,3 +253,75 @@ class TestCleaner:
         cleaned_data = cleaner._handle_outliers(df)
         print(cleaned_data)
         assert cleaned_data.frame_equal(expected)
+
+    def test_mean_missing_incremental(self):
+        """
+        In incremental mode missing values are filled with the running mean of all rows seen so far.
+        """
+        state = IncrementalState()
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH), state)
+        state.update("data_cleaning", pl.DataFrame({"A": [1.0, 2.0, 3.0]}))
+        batch = pl.DataFrame({"A": [7.0, None]})
+        state.update("data_cleaning", batch)
+        cleaned_data = cleaner._mean_missing(batch)
+        assert cleaned_data["A"].to_list() == [7.0, 3.25]
+
+    def test_fill_missing_group_by(self):
+        """
+        Test that the statistics are computed per group when a group_by key is configured.
+        """
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH))
+        cleaner.config = {"group_by": "sensor"}
+        df_with_nulls = pl.DataFrame(
+            {
+                "sensor": ["a", "a", "a", "b", "b", "b"],
+                "mean": [1.0, None, 3.0, 10.0, None, 30.0],
+                "median": [1.0, 2.0, None, 10.0, 20.0, None],
+                "ffill": [1, None, None, None, 5, None],
+            }
+        )
+        strategies = {
+            "mean": {"strategy": "mean"},
+            "median": {"strategy": "median"},
+            "ffill": {"strategy": "forward_fill"},
+        }
+        cleaned_data = cleaner._fill_missing(df_with_nulls, strategies)
+        expected = pl.DataFrame(
+            {
+                "sensor": ["a", "a", "a", "b", "b", "b"],
+                "mean": [1.0, 2.0, 3.0, 10.0, 20.0, 30.0],
+                "median": [1.0, 2.0, 1.5, 10.0, 20.0, 15.0],
+                "ffill": [1, 1, 1, None, 5, 5],
+            }
+        )
+        assert expected.frame_equal(cleaned_data)
+
+    def test_fit_group_by(self):
+        """
+        Test that statistics per group are fitted and applied to other rows of the same groups.
+        """
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH))
+        cleaner.config = {"group_by": "sensor"}
+        strategies = {"mean": {"strategy": "mean"}, "mode": {"strategy": "mode"}}
+        train = pl.DataFrame({"sensor": ["a", "a", "b"], "mean": [1.0, 3.0, 10.0], "mode": ["x", "x", "y"]})
+        test = pl.DataFrame({"sensor": ["b", "a", "c"], "mean": [None, None, 4.0], "mode": [None, "z", None]})
+        cleaner.fitting = True
+        cleaner._fill_missing(train, strategies)
+        cleaner.fitting = False
+        cleaned_data = cleaner._fill_missing(test, strategies)
+        expected = pl.DataFrame({"sensor": ["b", "a", "c"], "mean": [10.0, 2.0, 4.0], "mode": ["y", "z", None]})
+        assert expected.frame_equal(cleaned_data)
+
+    def test_knn_impute_missing_workers(self):
+        """
+        Test that imputing row ranges in worker processes gives the same result as a single process.
+        """
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(60, 3))
+        values[rng.random((60, 3)) < 0.1] = np.nan
+        df = pl.DataFrame(values, schema=["A", "B", "C"])
+
+        cleaner = Cleaner(Config(CONFIG_FILE_PATH))
+        expected = cleaner._knn_impute_missing(df)
+        cleaner.config = {"handle_missing_values": {"knn_workers": 2}}
+        assert expected.frame_equal(cleaner._knn_impute_missing(df))
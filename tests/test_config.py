@@ -44,7 +44,7 @@ class TestConfig:
         assert "handle_missing_values" in cleaning_config
         assert "drop" in cleaning_config["handle_missing_values"]
         assert "mean" in cleaning_config["handle_missing_values"]
-        # assert "mode" in cleaning_config["handle_missing_values"]
+        assert "mode" in cleaning_config["handle_missing_values"]
         assert "remove_duplicates" in cleaning_config
         assert cleaning_config["remove_duplicates"]
 
@@ -82,3 +82,28 @@ class TestConfig:
         assert "one_hot_encoding" in feature_engineering_config
         assert "feature_scaling" in feature_engineering_config
      
+
+    def test_profiling_config(self, config):
+        """
+        Test that the optional profiling configuration defaults to an empty dictionary.
+
+        Parameters:
+        config (Config): A Config object with the loaded configuration values.
+
+        Raises:
+        AssertionError: If the profiling configuration is not an empty dictionary.
+        """
+        assert config.profiling_config == {}
+
+    def test_input_output_config(self, config):
+        """
+        Test that the optional input and output configurations default to empty dictionaries.
+
+        Parameters:
+        config (Config): A Config object with the loaded configuration values.
+
+        Raises:
+        AssertionError: If the input or output configuration is not an empty dictionary.
+        """
+        assert config.input_config == {}
+        assert config.output_config == {}
@@ -0,0 +1,226 @@
+import os
+import gzip
+import json
+import time
+import pytest
+import numpy as np
+import polars as pl
+from proxiflow.utils import (
+    SharedFrame,
+    count_rows,
+    iter_data,
+    load_data,
+    share_frame,
+    attach_frame,
+    map_shared,
+    to_feature_matrix,
+    write_chunks,
+    write_data,
+    write_parquet_dataset,
+)
+from proxiflow.utils.data import SHARED_DIR
+
+
+def tag_rows(df, tag, delay):
+    # A map_shared task: it fails for a negative tag, other tasks finish after the failure
+    time.sleep(delay)
+    if tag < 0:
+        raise ValueError("Task failed")
+    return df.with_columns(pl.lit(tag).alias("tag"))
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame({"A": [1, 2, 3], "B": [0.5, None, 1.5], "C": ["x", "y", "z"]})
+
+
+class TestSharedFrame:
+    """
+    A test class for the shared-memory handoff in the proxiflow library.
+    """
+
+    def test_share_and_attach(self, df):
+        with share_frame(df) as shared:
+            assert df.frame_equal(attach_frame(shared.name), null_equal=True)
+            assert attach_frame(shared.name, columns=["C"]).columns == ["C"]
+        assert not os.path.exists(shared.path)
+
+    def test_map_shared(self, df):
+        results = map_shared(tag_rows, df, [(1, 0.0), (2, 0.0)], max_workers=2)
+        assert [result["tag"].to_list() for result in results] == [[1, 1, 1], [2, 2, 2]]
+
+    def test_map_shared_failure(self, df):
+        before = set(os.listdir(SHARED_DIR))
+        with pytest.raises(ValueError):
+            map_shared(tag_rows, df, [(-1, 0.0), (1, 1.0), (2, 1.0), (3, 0.0)], max_workers=2)
+        # The results of the tasks still running when the first one failed are released
+        assert set(os.listdir(SHARED_DIR)) <= before
+
+    def test_named_frame(self, df):
+        shared = SharedFrame.create(df, name="proxiflow-test-named-frame")
+        try:
+            assert SharedFrame("proxiflow-test-named-frame").attach().shape == df.shape
+        finally:
+            shared.unlink()
+
+
+class TestFeatureMatrix:
+    """
+    A test class for the NumPy/Arrow export of the feature matrix in the proxiflow library.
+    """
+
+    def test_to_feature_matrix(self, df):
+        matrix, columns = to_feature_matrix(df)
+        assert columns == ["A", "B"]
+        assert matrix.dtype == np.float32
+        assert matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(matrix, [[1.0, 0.5], [2.0, np.nan], [3.0, 1.5]])
+
+    def test_column_major(self, df):
+        matrix, _ = to_feature_matrix(df, dtype="float64", order="F")
+        assert matrix.dtype == np.float64
+        assert matrix.flags["F_CONTIGUOUS"]
+
+    def test_invalid_dtype(self, df):
+        with pytest.raises(ValueError):
+            to_feature_matrix(df, dtype="int8")
+
+    def test_write_npy(self, df, tmp_path):
+        file_path = str(tmp_path / "features.npy")
+        write_data(df, file_path, "npy", options={"dtype": "float64", "order": "F"})
+        matrix = np.load(file_path, mmap_mode="r")
+        np.testing.assert_array_equal(matrix, to_feature_matrix(df, dtype="float64")[0])
+        with open(f"{file_path}.json") as f:
+            manifest = json.load(f)
+        assert manifest == {"columns": ["A", "B"], "dtype": "float64", "order": "F", "shape": [3, 2]}
+
+    def test_write_ipc(self, df, tmp_path):
+        file_path = str(tmp_path / "features.arrow")
+        write_data(df, file_path, "ipc")
+        assert df.frame_equal(pl.read_ipc(file_path), null_equal=True)
+
+
+class TestParquetDataset:
+    """
+    A test class for the partitioned parquet output in the proxiflow library.
+    """
+
+    @pytest.fixture()
+    def sales_df(self):
+        return pl.DataFrame(
+            {
+                "Date": ["2023-05-01", "2023-05-01", "2023-05-02", None, "2023-05-02"],
+                "Store": ["a/b", "c", "c", "c", "a/b"],
+                "Price": [1.0, 2.0, 3.0, 4.0, 5.0],
+            }
+        )
+
+    def test_hive_partitions(self, sales_df, tmp_path):
+        output_dir = str(tmp_path / "out")
+        files = write_parquet_dataset(sales_df, output_dir, {"partition_by": "Date", "writers": 2})
+        partitions = ["Date=2023-05-01", "Date=2023-05-02", "Date=__HIVE_DEFAULT_PARTITION__"]
+        assert sorted(os.listdir(output_dir)) == partitions
+        assert len(files) == 3
+        day = pl.read_parquet(os.path.join(output_dir, "Date=2023-05-02", "part-00000.parquet"))
+        assert day.columns == ["Store", "Price"]
+        assert day["Price"].to_list() == [3.0, 5.0]
+
+    def test_max_rows_per_file(self, sales_df, tmp_path):
+        output_dir = str(tmp_path / "out")
+        write_data(sales_df, output_dir, "parquet", options={"partition_by": ["Store"], "max_rows_per_file": 2})
+        assert sorted(os.listdir(os.path.join(output_dir, "Store=c"))) == ["part-00000.parquet", "part-00001.parquet"]
+        assert os.path.isdir(os.path.join(output_dir, "Store=a%2Fb"))
+        written = pl.read_parquet(os.path.join(output_dir, "*", "*.parquet"))
+        assert sorted(written["Price"].to_list()) == sales_df["Price"].to_list()
+
+    def test_append_and_overwrite(self, sales_df, tmp_path):
+        output_dir = str(tmp_path / "out")
+        options = {"max_rows_per_file": 10, "compression": "snappy", "row_group_size": 2}
+        write_data(sales_df, output_dir, "parquet", options=options)
+        write_data(sales_df, output_dir, "parquet", append=True, options=options)
+        assert pl.read_parquet(os.path.join(output_dir, "*.parquet")).shape[0] == 10
+        write_data(sales_df, output_dir, "parquet", options=options)
+        assert os.listdir(output_dir) == ["part-00000.parquet"]
+
+    def test_missing_partition_column(self, sales_df, tmp_path):
+        with pytest.raises(ValueError):
+            write_parquet_dataset(sales_df, str(tmp_path / "out"), {"partition_by": "Missing"})
+
+
+class TestCompressedStreams:
+    """
+    A test class for the compressed csv and ndjson input and output in the proxiflow library.
+    """
+
+    @pytest.mark.parametrize("file_name", ["data.csv.gz", "data.csv.bz2", "data.ndjson.gz", "data.ndjson"])
+    def test_round_trip(self, df, tmp_path, file_name):
+        file_path = str(tmp_path / file_name)
+        file_format = file_name.split(".")[1]
+        write_data(df[:2], file_path, file_format)
+        write_data(df[2:], file_path, file_format, append=True)
+        assert df.frame_equal(load_data(file_path, file_format), null_equal=True)
+        assert load_data(file_path, file_format, skip_rows=2).shape == (1, 3)
+
+    @pytest.mark.parametrize("file_name", ["data.csv.gz", "data.ndjson.bz2"])
+    def test_load_in_chunks(self, df, tmp_path, monkeypatch, file_name):
+        monkeypatch.setattr("proxiflow.utils.data.LOAD_BLOCK_SIZE", 20)
+        file_path = str(tmp_path / file_name)
+        file_format = file_name.split(".")[1]
+        write_data(df, file_path, file_format)
+        loaded = load_data(file_path, file_format)
+        assert loaded.n_chunks() > 1
+        assert loaded.select(df.columns).frame_equal(df, null_equal=True)
+        assert load_data(file_path, file_format, skip_rows=1).select(df.columns).frame_equal(df[1:], null_equal=True)
+        assert load_data(file_path, file_format, skip_rows=3).shape[0] == 0
+
+    def test_inferred_compression(self, df, tmp_path):
+        file_path = str(tmp_path / "data.csv.gz")
+        write_data(df, file_path, "csv")
+        with gzip.open(file_path, "rb") as f:
+            assert f.readline() == b"A,B,C\n"
+
+    def test_configured_compression(self, df, tmp_path):
+        file_path = str(tmp_path / "data.csv")
+        write_data(df, file_path, "csv", options={"compression": "bz2"})
+        with open(file_path, "rb") as f:
+            assert f.read(3) == b"BZh"
+        assert df.frame_equal(load_data(file_path, "csv", options={"compression": "bz2"}), null_equal=True)
+
+    def test_zstd(self, df, tmp_path):
+        pytest.importorskip("zstandard")
+        file_path = str(tmp_path / "data.csv.zst")
+        write_data(df, file_path, "csv", options={"compression_threads": 2})
+        write_data(df, file_path, "csv", append=True)
+        assert load_data(file_path, "csv").shape == (6, 3)
+
+
+class TestChunks:
+    """
+    A test class for the chunked input and output used within a memory budget in the proxiflow library.
+    """
+
+    @pytest.mark.parametrize("file_name", ["data.csv", "data.csv.gz", "data.ndjson", "data.ndjson.bz2"])
+    def test_iter_data(self, df, tmp_path, file_name):
+        file_path = str(tmp_path / file_name)
+        file_format = file_name.split(".")[1]
+        write_data(df, file_path, file_format)
+        assert count_rows(file_path, file_format) == 3
+        assert count_rows(file_path, file_format, skip_rows=1) == 2
+        chunks = list(iter_data(file_path, file_format, chunk_rows=2, skip_rows=1))
+        assert all(chunk.schema == chunks[0].schema for chunk in chunks)
+        # ndjson rows leave out null values, the column order follows the first row
+        assert pl.concat(chunks).select(df.columns).frame_equal(df[1:], null_equal=True)
+
+    @pytest.mark.parametrize("file_format", ["csv", "npy", "ipc", "parquet"])
+    def test_write_chunks(self, df, tmp_path, file_format):
+        file_path = str(tmp_path / f"data.{file_format}")
+        rows = write_chunks(iter([df[:2], df[2:]]), file_path, file_format, spill_dir=str(tmp_path))
+        assert rows == 3
+        # Spill files are removed after the output is assembled
+        expected = [f"data.{file_format}"] + (["data.npy.json"] if file_format == "npy" else [])
+        assert sorted(os.listdir(tmp_path)) == sorted(expected)
+        if file_format == "npy":
+            np.testing.assert_allclose(np.load(file_path)[:, 1], [0.5, np.nan, 1.5])
+        else:
+            read = {"csv": pl.read_csv, "ipc": pl.read_ipc, "parquet": pl.read_parquet}[file_format]
+            assert read(file_path).frame_equal(df, null_equal=True)
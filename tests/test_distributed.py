@@ -0,0 +1,105 @@
+import copy
+import pytest
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import (
+    Cleaner,
+    Coordinator,
+    Engineer,
+    ExecutionPlan,
+    IncrementalState,
+    Normalizer,
+    Profiler,
+    parse_address,
+    partition_path,
+)
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    config = Config(CONFIG_FILE_PATH)
+    config.config = copy.deepcopy(config.config)
+    config.config["data_cleaning"] = {
+        "handle_missing_values": {"drop": False, "mean": True, "mode": False, "knn": False},
+        "handle_outliers": False,
+        "remove_duplicates": False,
+    }
+    config.config["data_normalization"] = {"min_max": ["A"], "z_score": ["B"], "log": None}
+    config.config["feature_engineering"] = {"one_hot_encoding": ["C"], "feature_scaling": {}}
+    return config
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "A": [1.0, None, 3.0, 10.0, 5.0, 6.0, None, 8.0, 2.0],
+            "B": [4.0, 5.0, 6.0, 7.0, 80.0, 9.0, 10.0, 11.0, 12.0],
+            "C": ["x", "y", "x", "z", "y", "x", "w", "x", "y"],
+        }
+    )
+
+
+def run(config, df):
+    # A single incremental run over all rows computes its statistics from all rows
+    state = IncrementalState()
+    stats = Profiler(config).profile(df)
+    for stage in [Cleaner(config, state, stats), Normalizer(config, state, stats), Engineer(config, state)]:
+        df = ExecutionPlan(stage.operations(df)).execute(df)
+    return df
+
+
+class TestDistributed:
+    """
+    A test class for the distributed coordinator and workers in the proxiflow library.
+    """
+
+    def test_matches_single_run(self, config, df, tmp_path):
+        partitions = []
+        for i, (start, end) in enumerate([(0, 4), (4, 6), (6, 9)]):
+            input_file = str(tmp_path / f"part{i}.csv")
+            df[start:end].write_csv(input_file)
+            output_file = partition_path(str(tmp_path / "{partition}.out.csv"), f"part{i}")
+            partitions.append((f"part{i}", input_file, output_file))
+
+        coordinator = Coordinator(config, partitions, workers=2)
+        assert coordinator.run() == {"part0": 4, "part1": 2, "part2": 3}
+        assert coordinator.input_rows == 9
+
+        # Partitions without some categories get all columns of the vocabulary
+        result = pl.concat([pl.read_csv(output_file) for _, _, output_file in partitions])
+        expected = run(config, df)
+        assert result.columns == expected.columns
+        for col in expected.columns:
+            assert result[col].cast(pl.Float64).to_list() == pytest.approx(expected[col].cast(pl.Float64).to_list())
+
+    def test_worker_error(self, config, tmp_path):
+        input_file = str(tmp_path / "invalid.csv")
+        pl.DataFrame({"D": [1, 2]}).write_csv(input_file)
+        coordinator = Coordinator(config, [("invalid", input_file, str(tmp_path / "out.csv"))], workers=2)
+        assert coordinator.workers == 1
+        with pytest.raises(RuntimeError):
+            coordinator.run()
+
+    def test_invalid_setup(self, config):
+        with pytest.raises(ValueError):
+            Coordinator(config, [], workers=2)
+        with pytest.raises(ValueError):
+            Coordinator(config, [("a", "a.csv", "b.csv")], workers=1, address=("127.0.0.1", 0))
+
+    def test_accept_timeout(self, config):
+        coordinator = Coordinator(
+            config, [("a", "a.csv", "b.csv")], workers=1, address=("127.0.0.1", 0), authkey=b"x", accept_timeout=0.2
+        )
+        with pytest.raises(RuntimeError, match="0 of 1 workers connected"):
+            coordinator.run()
+
+    def test_addresses(self):
+        assert parse_address("10.0.0.1:7000") == ("10.0.0.1", 7000)
+        assert parse_address(":7000") == ("127.0.0.1", 7000)
+        with pytest.raises(ValueError):
+            parse_address("localhost")
+        assert partition_path("out/{partition}.csv", "a") == "out/a.csv"
+        assert partition_path("out.csv", "a") == "out-a.csv"
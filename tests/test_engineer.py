@@ -2,7 +2,8 @@ import pytest
 import polars as pl
 import numpy as np
 from proxiflow.config import Config
-from proxiflow.core import Engineer
+from proxiflow.core import Engineer, IncrementalState
+from proxiflow.core import engineer as engineer_module
 
 CONFIG_FILE_PATH = "tests/data/config.yaml"
 
@@ -22,6 +23,34 @@ def df():
     )
 
 
+@pytest.fixture(scope="module")
+def series_df():
+    return pl.DataFrame(
+        {
+            "sensor": ["a", "b", "a", "a", "b"],
+            "date": ["2023-01-01", "2023-01-01", "2023-01-02", "2023-01-05", "2023-01-03"],
+            "value": [1.0, 10.0, 2.0, 3.0, 20.0],
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def wide_df():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(500, 6)) @ rng.normal(size=(6, 6))
+    return pl.DataFrame(values, schema=[f"x{i}" for i in range(6)]).with_columns(pl.lit("a").alias("label"))
+
+
+@pytest.fixture(scope="module")
+def text_df():
+    return pl.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "text": ["a quick brown fox", "the lazy dog", "Quick quick dog jumps", None],
+        }
+    )
+
+
 class TestOneHotEncoding:
     """
     A test class for the one hot encoding in the proxiflow library.
@@ -50,6 +79,23 @@ class TestOneHotEncoding:
         engineered_result = engineer.one_hot_encode(df, ["category2"])
         assert expected.frame_equal(engineered_result)
 
+    def test_one_hot_encode_incremental(self):
+        """
+        In incremental mode every batch is encoded with the vocabulary of the first run.
+        """
+        state = IncrementalState()
+        state.update("feature_engineering", pl.DataFrame({"cat": ["a", "b"]}))
+        engineer = Engineer(Config(CONFIG_FILE_PATH), state)
+        df = pl.DataFrame({"cat": ["b", "c"], "num": [1, 2]})
+        expected = pl.DataFrame(
+            {
+                "cat_a": pl.Series([0, 0], dtype=pl.UInt8),
+                "cat_b": pl.Series([1, 0], dtype=pl.UInt8),
+                "num": [1, 2],
+            }
+        )
+        assert expected.frame_equal(engineer.one_hot_encode(df, ["cat"]))
+
 
 class TestFeatureScaling:
     """
@@ -91,3 +137,243 @@ class TestFeatureScaling:
         )
         result = engineer.feature_scaling(df, ["A", "B"], 3)
         assert expected.frame_equal(result)
+
+
+class TestTimeSeriesFeatures:
+    """
+    A test class for the time-series feature engineering in the proxiflow library.
+    """
+
+    def test_lags_and_leads(self, engineer, series_df):
+        """
+        Lags and leads are computed per group after sorting by the order column.
+        """
+        config = {"order_by": "date", "group_by": "sensor", "lags": {"value": [1]}, "leads": {"value": [1]}}
+        result = engineer.time_series_features(series_df, config)
+        assert result["sensor"].to_list() == ["a", "a", "a", "b", "b"]
+        assert result["value_lag_1"].to_list() == [None, 1.0, 2.0, None, 10.0]
+        assert result["value_lead_1"].to_list() == [2.0, 3.0, None, 20.0, None]
+
+    def test_rolling_windows(self, engineer, series_df):
+        """
+        Rolling windows can be given as a number of rows or as a duration of the order column.
+        """
+        config = {
+            "order_by": "date",
+            "group_by": "sensor",
+            "rolling": {"value": [{"window": 2, "stats": ["mean", "max"], "min_periods": 1}, {"window": "2d"}]},
+        }
+        result = engineer.time_series_features(series_df, config)
+        assert result["value_rolling_mean_2"].to_list() == [1.0, 1.5, 2.5, 10.0, 15.0]
+        assert result["value_rolling_max_2"].to_list() == [1.0, 2.0, 3.0, 10.0, 20.0]
+        assert result["value_rolling_mean_2d"].to_list() == [1.0, 1.5, 3.0, 10.0, 20.0]
+
+    def test_ewm_and_date_parts(self, engineer, series_df):
+        config = {"order_by": "date", "ewm": {"value": [0.5]}, "date_parts": {"date": ["year", "month", "day"]}}
+        result = engineer.time_series_features(series_df, config)
+        np.testing.assert_allclose(result["value_ewm_0.5"].to_numpy(), [1.0, 5.5, 3.75, 11.875, 7.4375])
+        assert result["date_year"].to_list() == [2023] * 5
+        assert result["date_day"].to_list() == [1, 1, 2, 3, 5]
+
+    def test_invalid_config(self, engineer, series_df):
+        with pytest.raises(ValueError):
+            engineer.time_series_features(series_df, {"rolling": {"value": {"window": "2d"}}})
+        with pytest.raises(ValueError):
+            engineer.time_series_features(series_df, {"lags": {"missing": [1]}})
+        with pytest.raises(ValueError):
+            engineer.time_series_features(series_df, {"date_parts": {"date": ["century"]}})
+
+
+class TestDimensionalityReduction:
+    """
+    A test class for the incremental PCA and sparse random projection in the proxiflow library.
+    """
+
+    def test_pca(self, wide_df):
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        result = engineer.reduce_dimensions(wide_df, {"method": "pca", "n_components": 2, "batch_size": 1000})
+        assert result.columns == ["label", "pca_0", "pca_1"]
+        assert result.dtypes[1:] == [pl.Float32, pl.Float32]
+
+        values = wide_df.drop("label").to_numpy()
+        centered = values - values.mean(axis=0)
+        expected = centered @ np.linalg.svd(centered, full_matrices=False)[2][:2].T
+        np.testing.assert_allclose(np.abs(result.drop("label").to_numpy()), np.abs(expected), rtol=1e-3, atol=1e-3)
+
+    def test_random_projection(self, wide_df):
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        config = {"method": "random_projection", "n_components": 3, "exclude": ["x0"], "keep_columns": True}
+        result = engineer.reduce_dimensions(wide_df, config)
+        assert result.columns == wide_df.columns + ["random_projection_0", "random_projection_1", "random_projection_2"]
+        assert engineer.reducer is not None and engineer.reducer.columns == ["x1", "x2", "x3", "x4", "x5"]
+
+    def test_fit_on_sample_and_persist(self, wide_df, tmp_path):
+        config = Config(CONFIG_FILE_PATH)
+        components_file = str(tmp_path / "pca.npz")
+        config.config["feature_engineering"] = {
+            "one_hot_encoding": [],
+            "feature_scaling": {},
+            "dimensionality_reduction": {"n_components": 2, "batch_size": 100, "components_file": components_file},
+        }
+        engineer = Engineer(config)
+        engineer.fit(wide_df[:200])
+        projected = engineer.execute(wide_df)
+
+        # A transform-only run loads the persisted components
+        loaded = Engineer(config).execute(wide_df)
+        assert loaded.frame_equal(projected)
+        with pytest.raises(Exception):
+            Engineer(config).execute(wide_df.drop("x3"))
+
+    def test_invalid_config(self, wide_df):
+        with pytest.raises(ValueError):
+            Engineer(Config(CONFIG_FILE_PATH)).reduce_dimensions(wide_df, {"method": "tsne", "n_components": 2})
+        with pytest.raises(ValueError):
+            Engineer(Config(CONFIG_FILE_PATH)).reduce_dimensions(wide_df, {"n_components": 10})
+
+
+class TestBinning:
+    """
+    A test class for the equal-width, quantile and custom binning in the proxiflow library.
+    """
+
+    def test_methods(self):
+        df = pl.DataFrame(
+            {
+                "A": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 9.0],
+                "P": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, None],
+                "S": [10, 60, 100, -5, 50, 0, 1, 2, 3],
+            }
+        )
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        config = {
+            "A": {"method": "equal_width", "bins": 3},
+            "P": {"method": "quantile", "bins": 4},
+            "S": {"edges": [0, 50, 100], "keep": True},
+        }
+        result = engineer.bin_columns(df, config)
+        assert result.columns == ["A", "P", "S", "S_bin"]
+        assert result.dtypes == [pl.UInt8, pl.UInt8, pl.Int64, pl.UInt8]
+        assert result["A"].to_list() == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+        assert result["P"].to_list() == [0, 0, 1, 1, 2, 2, 3, 3, None]
+        # Values outside the edges fall into the outer bins
+        assert result["S_bin"].to_list() == [0, 1, 1, 0, 1, 0, 0, 0, 0]
+        assert engineer.bin_edges["P"] == [1.0, 2.75, 4.5, 6.25, 8.0]
+
+    def test_one_hot_and_fitted_edges(self):
+        config = Config(CONFIG_FILE_PATH)
+        config.config["feature_engineering"] = {
+            "one_hot_encoding": [],
+            "feature_scaling": {},
+            "binning": {"A": {"method": "equal_width", "bins": 2, "output": "one_hot"}},
+        }
+        engineer = Engineer(config)
+        engineer.fit(pl.DataFrame({"A": [0.0, 10.0], "B": [1, 2]}))
+        # Later rows are binned with the edges fitted on the sample
+        result = engineer.execute(pl.DataFrame({"A": [1.0, 8.0, 100.0], "B": [1, 2, 3]}))
+        assert result.columns == ["A_bin_0", "A_bin_1", "B"]
+        assert result["A_bin_1"].to_list() == [0, 1, 1]
+
+    def test_wide_codes(self):
+        df = pl.DataFrame({"A": np.arange(1000, dtype=np.float64)})
+        result = Engineer(Config(CONFIG_FILE_PATH)).bin_columns(df, {"A": {"method": "quantile", "bins": 300}})
+        assert result["A"].dtype == pl.UInt16
+        assert result["A"].max() == 299
+
+    def test_sampled_quantile_edges(self, monkeypatch):
+        monkeypatch.setattr(engineer_module, "QUANTILE_SAMPLE_ROWS", 1000)
+        df = pl.DataFrame({"A": np.random.default_rng(1).permutation(10000).astype(np.float64)})
+        edges = [Engineer(Config(CONFIG_FILE_PATH))._fit_bins(df, {"A": {"bins": 4}})["A"] for _ in range(2)]
+        # The edges of a large input come from a reproducible sample, close to the exact quartiles
+        assert edges[0] == edges[1]
+        assert edges[0] != list(np.quantile(df["A"].to_numpy(), [0.0, 0.25, 0.5, 0.75, 1.0]))
+        np.testing.assert_allclose(edges[0], [0.0, 2500.0, 5000.0, 7500.0, 10000.0], atol=500)
+
+    def test_incremental_quantile_edges(self, tmp_path):
+        state = IncrementalState()
+        config = {"P": {"method": "quantile", "bins": 2}}
+        Engineer(Config(CONFIG_FILE_PATH), state).bin_columns(pl.DataFrame({"P": [0.0, 1.0, 2.0]}), config)
+        state.save(str(tmp_path / "state.json"))
+        # The next run bins the appended rows with the edges of the first run
+        state = IncrementalState.load(str(tmp_path / "state.json"))
+        engineer = Engineer(Config(CONFIG_FILE_PATH), state)
+        result = engineer.bin_columns(pl.DataFrame({"P": [0.5, 1.5, 100.0]}), config)
+        assert engineer.bin_edges["P"] == [0.0, 1.0, 2.0]
+        assert result["P"].to_list() == [0, 1, 1]
+
+    def test_invalid_config(self):
+        df = pl.DataFrame({"A": [1.0, 2.0], "S": ["x", "y"], "N": [None, None]}, schema_overrides={"N": pl.Float64})
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        with pytest.raises(ValueError):
+            engineer.bin_columns(df, {"S": {"bins": 2}})
+        with pytest.raises(ValueError):
+            engineer.bin_columns(df, {"A": {"method": "kmeans"}})
+        with pytest.raises(ValueError):
+            engineer.bin_columns(df, {"A": {"edges": [1.0]}})
+        with pytest.raises(ValueError):
+            engineer.bin_columns(df, {"A": {"output": "dense"}})
+        with pytest.raises(ValueError):
+            engineer.bin_columns(df, {"N": {"method": "equal_width"}})
+
+
+class TestTextFeatures:
+    """
+    A test class for the hashed text features in the proxiflow library.
+    """
+
+    def test_counts(self, text_df):
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        result = engineer.text_features(text_df, {"text": {"n_features": 16}})
+        assert result.columns == ["id"] + [f"text_hash_{i}" for i in range(16)]
+        assert result.dtypes[1] == pl.UInt32
+        # Tokens are lowercased and have at least two characters
+        assert result.drop("id").sum(axis=1).to_list() == [3, 3, 4, 0]
+
+    def test_dense_batches(self, text_df):
+        whole = Engineer(Config(CONFIG_FILE_PATH)).text_features(text_df, {"text": {"n_features": 16, "idf": True}})
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        batched = engineer.text_features(text_df, {"text": {"n_features": 16, "idf": True, "batch_size": 3}})
+        # Every batch is a chunk of the output columns
+        assert batched["text_hash_0"].n_chunks() == 2
+        assert batched.frame_equal(whole)
+        empty = Engineer(Config(CONFIG_FILE_PATH)).text_features(text_df.clear(), {"text": {"n_features": 16}})
+        assert empty.shape == (0, 17) and empty.dtypes[1] == pl.UInt32
+
+    def test_tf_idf_matches_scikit_learn(self, text_df):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        config = {"text": {"n_features": 2**20, "idf": True, "output": "sparse", "batch_size": 3, "keep": True}}
+        result = engineer.text_features(text_df, config)
+        assert result.columns == ["id", "text", "text_indices", "text_values"]
+        assert result["text_indices"][3].to_list() == []
+
+        expected = TfidfVectorizer().fit_transform(text_df["text"].fill_null("").to_list())
+        for i in range(3):
+            np.testing.assert_allclose(
+                sorted(result["text_values"][i].to_list()), sorted(expected[i].data), rtol=1e-5
+            )
+
+    def test_fitted_idf_is_persisted(self, text_df, tmp_path):
+        config = Config(CONFIG_FILE_PATH)
+        idf_file = str(tmp_path / "idf.npy")
+        config.config["feature_engineering"] = {
+            "one_hot_encoding": [],
+            "feature_scaling": {},
+            "text_features": {"text": {"n_features": 32, "idf": True, "idf_file": idf_file}},
+        }
+        engineer = Engineer(config)
+        engineer.fit(text_df[:2])
+        weighted = engineer.execute(text_df)
+
+        # A later run loads the IDF weights fitted on the sample
+        assert Engineer(config).execute(text_df).frame_equal(weighted)
+
+    def test_invalid_config(self, text_df):
+        engineer = Engineer(Config(CONFIG_FILE_PATH))
+        with pytest.raises(ValueError):
+            engineer.text_features(text_df, {"id": {}})
+        with pytest.raises(ValueError):
+            engineer.text_features(text_df, {"text": {"output": "csr"}})
+        with pytest.raises(ValueError):
+            engineer.text_features(text_df, {"text": {"norm": "max"}})
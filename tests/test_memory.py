@@ -0,0 +1,32 @@
+import pytest
+import polars as pl
+from proxiflow.utils import MemoryGovernor, parse_size, row_footprint
+
+
+class TestMemoryGovernor:
+    """
+    A test class for the memory budget estimates in the proxiflow library.
+    """
+
+    @pytest.mark.parametrize(
+        "size, expected", [("512MB", 512 * 2**20), ("2GiB", 2 * 2**30), ("1.5k", 1536), (1000, 1000)]
+    )
+    def test_parse_size(self, size, expected):
+        assert parse_size(size) == expected
+
+    @pytest.mark.parametrize("size", ["lots", "-1GB", 0])
+    def test_invalid_size(self, size):
+        with pytest.raises(ValueError):
+            parse_size(size)
+
+    def test_row_footprint(self):
+        df = pl.DataFrame({"A": [1, 2], "B": [0.5, None], "C": ["ab", "abcd"], "D": [True, False]})
+        # 8 + 8 + (8 offset + 3 characters) + 1, plus a validity bit per column
+        assert row_footprint(df) == 28.5
+
+    def test_chunk_rows(self):
+        governor = MemoryGovernor("1MB", peak_factor=4)
+        assert governor.fits(2**20 // 64, 16)
+        assert not governor.fits(2**20 // 64 + 1, 16)
+        assert governor.chunk_rows(16) == 2**20 // 64
+        assert MemoryGovernor(100).chunk_rows(10_000) == 1
@@ -1,8 +1,9 @@
 import pytest
 import polars as pl
 import numpy as np
+import scipy.stats as stats
 from proxiflow.config import Config
-from proxiflow.core import Normalizer
+from proxiflow.core import Normalizer, IncrementalState
 # from proxiflow.core.core_utils import check_columns
 
 CONFIG_FILE_PATH = "tests/data/config.yaml"
@@ -76,6 +77,43 @@ class TestNormalizer():
         # Check that the output DataFrame is equal to the expected DataFrame
         np.testing.assert_allclose(normalized_result.to_numpy(), expected_df.to_numpy(), rtol=1e-5, atol=1e-8)
     
+    def test_log_normalize_invalid_domain(self, config):
+        df = pl.DataFrame({'col1': [-1.0, 0.0, 1.0]})
+        normalizer = Normalizer(config)
+        with pytest.raises(ValueError):
+            normalizer._log_normalize(df, ['col1'])
+
+    def test_box_cox_normalize(self, config):
+        values = np.random.default_rng(0).lognormal(size=500)
+        df = pl.DataFrame({'col1': values})
+        normalizer = Normalizer(config)
+        normalized_result = normalizer._box_cox_normalize(df, ['col1'])
+        expected, lmbda = stats.boxcox(values)
+        np.testing.assert_allclose(normalizer.fitted_params['box_cox']['col1'], lmbda, rtol=1e-5)
+        np.testing.assert_allclose(normalized_result['col1'].to_numpy(), expected, rtol=1e-5, atol=1e-8)
+
+        with pytest.raises(ValueError):
+            normalizer._box_cox_normalize(pl.DataFrame({'col1': [0.0, 1.0]}), ['col1'])
+
+    def test_yeo_johnson_normalize(self, config):
+        values = np.random.default_rng(0).normal(size=500) * 3
+        df = pl.DataFrame({'col1': values})
+        normalizer = Normalizer(config)
+        normalized_result = normalizer._yeo_johnson_normalize(df, ['col1'])
+        expected, _ = stats.yeojohnson(values)
+        np.testing.assert_allclose(normalized_result['col1'].to_numpy(), expected, rtol=1e-5, atol=1e-8)
+
+    def test_quantile_normalize(self, config):
+        df = pl.DataFrame({'col1': [1.0, 2.0, 3.0, 4.0, 100.0, None]})
+        normalizer = Normalizer(config)
+        normalized_result = normalizer._quantile_normalize(df, {'columns': ['col1'], 'n_quantiles': 5})
+        assert normalized_result['col1'].to_list() == [0.0, 0.25, 0.5, 0.75, 1.0, None]
+
+        normalized_result = normalizer._quantile_normalize(
+            df, {'columns': ['col1'], 'n_quantiles': 5, 'output_distribution': 'normal'}
+        )
+        np.testing.assert_allclose(normalized_result['col1'].to_numpy()[2], 0.0, atol=1e-8)
+
     # def test_check_columns(self, config):
     #     df = pl.DataFrame({
     #         'col1': [1, 2, 3],
@@ -93,3 +131,62 @@ class TestNormalizer():
     #     assert expected == result
 
 
+
+    def test_min_max_normalize_incremental(self, config):
+        """
+        In incremental mode a new batch is scaled with the running min and max of all rows seen so far.
+        """
+        state = IncrementalState()
+        state.update("data_normalization", pl.DataFrame({"col1": [0.0, 10.0]}))
+        normalizer = Normalizer(config, state)
+        batch = pl.DataFrame({"col1": [5.0, 20.0]})
+        state.update("data_normalization", batch)
+        normalized_result = normalizer._min_max_normalize(batch, ["col1"])
+        np.testing.assert_allclose(normalized_result["col1"].to_numpy(), [0.25, 1.0])
+
+    def test_normalize_group_by(self, config):
+        """
+        Test that min-max and z-score statistics are computed per group when a group_by key is configured.
+        """
+        df = pl.DataFrame({
+            'customer': ['a', 'a', 'a', 'b', 'b'],
+            'col1': [1.0, 2.0, 3.0, 10.0, 30.0],
+            'col2': [1.0, 2.0, 3.0, 10.0, 30.0],
+        })
+        normalizer = Normalizer(config)
+        normalizer.config = {'group_by': 'customer'}
+        normalized_result = normalizer._min_max_normalize(df, ['col1'])
+        normalized_result = normalizer._z_score_normalize(normalized_result, ['col2'])
+        np.testing.assert_allclose(normalized_result['col1'].to_numpy(), [0.0, 0.5, 1.0, 0.0, 1.0])
+        expected_z_score = [-1.224745, 0.0, 1.224745, -1.0, 1.0]
+        np.testing.assert_allclose(normalized_result['col2'].to_numpy(), expected_z_score, rtol=1e-5)
+        assert normalized_result['customer'].to_list() == df['customer'].to_list()
+
+        normalizer.config = {'group_by': 'missing'}
+        with pytest.raises(ValueError):
+            normalizer._min_max_normalize(df, ['col1'])
+
+    def test_normalize_group_by_constant_groups(self, config):
+        """
+        Test that constant and single-row groups are normalized to 0 instead of failing or producing NaN.
+        """
+        df = pl.DataFrame({
+            'customer': ['a', 'a', 'b', 'c', 'c'],
+            'col1': [1.0, 3.0, 7.0, 4.0, None],
+            'col2': [1.0, 3.0, 7.0, 4.0, 4.0],
+        })
+        normalizer = Normalizer(config)
+        normalizer.config = {'group_by': 'customer'}
+        normalized_result = normalizer._min_max_normalize(df, ['col1'])
+        normalized_result = normalizer._z_score_normalize(normalized_result, ['col2'])
+        assert normalized_result['col1'].to_list() == [0.0, 1.0, 0.0, 0.0, None]
+        assert normalized_result['col2'].to_list() == [-1.0, 1.0, 0.0, 0.0, 0.0]
+
+    def test_z_score_constant_column(self, config):
+        """
+        Test that z-score normalization of a constant column fails like min-max normalization.
+        """
+        df = pl.DataFrame({'col1': [2.0, 2.0, 2.0]})
+        normalizer = Normalizer(config)
+        with pytest.raises(ValueError):
+            normalizer._z_score_normalize(df, ['col1'])
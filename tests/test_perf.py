@@ -0,0 +1,90 @@
+import os
+import pstats
+import pytest
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from proxiflow.utils import RunProfiler
+
+
+def allocate(n):
+    return [bytearray(1024) for _ in range(n)]
+
+
+# The allocation site of allocate
+ALLOCATE_LINE = allocate.__code__.co_firstlineno + 1
+
+
+class TestRunProfiler:
+    """
+    A test class for the run profiling of the proxiflow library.
+    """
+
+    def test_files(self, tmp_path):
+        directory = os.path.join(tmp_path, "profile")
+        with RunProfiler(directory, trace_allocations=True) as profiler:
+            with profiler.stage("data_cleaning"):
+                kept = allocate(100)
+            profiler.explain("data_cleaning", "Execution plan: 1 operations in 1 layers")
+        assert sorted(os.listdir(directory)) == ["allocations.txt", "plan.txt", "run.pstats", "run.txt"]
+        assert not tracemalloc.is_tracing()
+
+        functions = {function for _, _, function in pstats.Stats(os.path.join(directory, "run.pstats")).stats}
+        assert "allocate" in functions
+        with open(os.path.join(directory, "plan.txt")) as f:
+            assert f.read() == "# data_cleaning\nExecution plan: 1 operations in 1 layers\n"
+        with open(os.path.join(directory, "allocations.txt")) as f:
+            allocations = f.read()
+        assert allocations.startswith("data_cleaning: peak")
+        assert f"{__file__}:{ALLOCATE_LINE}" in allocations
+        assert "\nrun: peak" in allocations
+        del kept
+
+    def test_stage_allocations(self, tmp_path):
+        with RunProfiler(str(tmp_path), trace_allocations=True) as profiler:
+            kept = []
+            for _ in range(2):
+                with profiler.stage("data_normalization"):
+                    kept.append(allocate(100))
+            with profiler.stage("feature_engineering"):
+                pass
+        size, count = profiler.allocations["data_normalization"][(__file__, ALLOCATE_LINE)]
+        # Both runs of the stage are summed
+        assert count >= 200
+        assert size >= 200 * 1024
+        assert profiler.peaks["data_normalization"] >= 100 * 1024
+        assert (__file__, ALLOCATE_LINE) not in profiler.allocations["feature_engineering"]
+        assert list(profiler.allocations) == ["data_normalization", "feature_engineering", "run"]
+
+    def test_without_allocations(self, tmp_path):
+        with RunProfiler(str(tmp_path)) as profiler:
+            assert not tracemalloc.is_tracing()
+            with profiler.stage("data_cleaning"):
+                allocate(10)
+        assert sorted(os.listdir(tmp_path)) == ["run.pstats", "run.txt"]
+        assert profiler.allocations == {}
+
+    def test_threads(self, tmp_path):
+        with RunProfiler(str(tmp_path)):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(allocate, [10, 10]))
+        stats = pstats.Stats(os.path.join(tmp_path, "run.pstats")).stats
+        # The calls on the worker threads are merged into the profile
+        calls = [stat[1] for (_, _, function), stat in stats.items() if function == "allocate"]
+        assert calls == [2]
+
+    @pytest.mark.skipif(sys.version_info < (3, 12), reason="cProfile uses sys.monitoring since Python 3.12")
+    def test_threads_monitoring(self, tmp_path):
+        # A profile per thread would fail to enable next to the profile of the run, the run profile covers them
+        with RunProfiler(str(tmp_path)) as profiler:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(allocate, [10, 10]))
+        assert profiler.thread_profiles == []
+        stats = pstats.Stats(os.path.join(tmp_path, "run.pstats")).stats
+        assert sum(stat[1] for (_, _, function), stat in stats.items() if function == "allocate") == 2
+
+    def test_first_plan(self, tmp_path):
+        with RunProfiler(str(tmp_path)) as profiler:
+            profiler.explain("data_cleaning", "chunk 0")
+            profiler.explain("data_cleaning", "chunk 1")
+        assert profiler.plans == {"data_cleaning": "chunk 0"}
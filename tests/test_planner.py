@@ -0,0 +1,109 @@
+import pytest
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import (
+    Cleaner,
+    Engineer,
+    ExecutionPlan,
+    Normalizer,
+    Operation,
+    build_plan,
+    build_stages,
+    named_stages,
+)
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame({"A": [1.0, 2.0, 3.0], "B": [4.0, 5.0, 6.0], "C": ["x", "y", "x"]})
+
+
+def add_one(col: str) -> Operation:
+    return Operation(f"add_one({col})", lambda df: df.select(pl.col(col) + 1), reads=[col], writes=[col])
+
+
+class TestExecutionPlan:
+    """
+    A test class for the column-dependency execution planner in the proxiflow library.
+    """
+
+    def test_independent_operations_share_a_layer(self, df):
+        plan = ExecutionPlan([add_one("A"), add_one("B")])
+        assert len(plan.layers) == 1
+        assert plan.execute(df, workers=2)["B"].to_list() == [5.0, 6.0, 7.0]
+
+    def test_dependencies(self, df):
+        copy = Operation("copy", lambda df: df.select(pl.col("A").alias("D")), reads=["A"], writes=["D"])
+        overwrite = Operation("overwrite", lambda df: df.select(pl.lit(0.0).alias("A")), writes=["A"])
+        plan = ExecutionPlan([add_one("A"), copy, overwrite, add_one("D")])
+        # copy reads the result of add_one(A); overwrite only has to run after it was read
+        assert [[op.name for op in layer] for layer in plan.layers] == [
+            ["add_one(A)"],
+            ["copy", "overwrite"],
+            ["add_one(D)"],
+        ]
+        result = plan.execute(df, workers=4)
+        assert result["A"].to_list() == [0.0, 0.0, 0.0]
+        assert result["D"].to_list() == [3.0, 4.0, 5.0]
+
+    def test_barrier(self, df):
+        head = Operation("head", lambda df: df.head(2), reads=df.columns, barrier=True)
+        plan = ExecutionPlan([add_one("A"), head, add_one("B")])
+        assert len(plan.layers) == 3
+        assert plan.execute(df).shape == (2, 3)
+
+    def test_explain(self, df):
+        explained = ExecutionPlan([add_one("A"), add_one("B")]).explain()
+        assert "1 layers" in explained
+        assert "add_one(A)  reads [A]  writes [A]" in explained
+
+
+class TestStageOperations:
+    """
+    A test class for the operations the pipeline stages hand to the execution planner.
+    """
+
+    def test_normalizer_operations(self, config):
+        normalizer = Normalizer(config)
+        normalizer.config = {"min_max": ["A"], "z_score": ["B"], "log": [], "yeo_johnson": ["A", "B"]}
+        df = pl.DataFrame({"A": [1.0, 2.0, 4.0, 8.0], "B": [3.0, 1.0, 2.0, 9.0]})
+        plan = ExecutionPlan(normalizer.operations(df))
+        assert [len(layer) for layer in plan.layers] == [2, 2]
+        assert plan.execute(df, workers=4).frame_equal(plan.execute(df, workers=1))
+
+    def test_stages_combine(self, config, df):
+        operations = (
+            Cleaner(config).operations(df) + Normalizer(config).operations(df) + Engineer(config).operations(df)
+        )
+        result = ExecutionPlan(operations).execute(df)
+        expected = Engineer(config).execute(Normalizer(config).normalize(Cleaner(config).clean_data(df)))
+        assert result.frame_equal(expected)
+
+
+class TestPipeline:
+    """
+    A test class for the stages shared by the run modes of the proxiflow library.
+    """
+
+    def test_stages(self, config):
+        df = pl.read_csv("tests/data/input.csv")
+        stages = build_stages(config)
+        assert [name for name, _ in named_stages(stages)] == [
+            "data_cleaning",
+            "data_normalization",
+            "feature_engineering",
+            "custom_transforms",
+            "feature_selection",
+        ]
+        # One plan over all stages gives the same result as running them one by one
+        staged = df
+        for _, stage in named_stages(build_stages(config)):
+            staged = ExecutionPlan(stage.operations(staged)).execute(staged)
+        assert build_plan(df, stages).execute(df).frame_equal(staged)
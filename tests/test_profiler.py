@@ -0,0 +1,93 @@
+import pytest
+import polars as pl
+import numpy as np
+from proxiflow.config import Config
+from proxiflow.core import Cleaner, Normalizer, Profiler, StatsIndex
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "A": [1, 2, None, 4, 5],
+            "B": [0.5, 1.5, 2.5, 3.5, 10.0],
+            "C": ["x", "y", None, "x", "z"],
+        }
+    )
+
+
+class TestProfiler:
+    """
+    A test class for the single-pass profiling stage in the proxiflow library.
+    """
+
+    def test_profile(self, config, df):
+        stats = Profiler(config).profile(df)
+        assert stats.rows == 5
+        assert stats.get("A", "null_count") == 1
+        assert stats.get("A", "min") == 1
+        assert stats.get("A", "max") == 5
+        np.testing.assert_allclose(stats.get("A", "mean"), 3.0)
+        np.testing.assert_allclose(stats.get("B", "std"), np.std([0.5, 1.5, 2.5, 3.5, 10.0]))
+        assert stats.get("B", "median") == df["B"].median()
+        assert stats.get("B", "q0.25") == df["B"].quantile(0.25)
+        assert stats.get("B", "q0.75") == df["B"].quantile(0.75)
+        assert stats.get("C", "null_count") == 1
+        assert stats.get("C", "mean") is None
+
+    def test_sort_statistics(self, df):
+        config = Config(CONFIG_FILE_PATH)
+        config.config["data_cleaning"] = {"handle_missing_values": {"columns": {"B": "mean"}}, "handle_outliers": False}
+        stats = Profiler(config).profile(df)
+        # Nothing reads the median or quartiles, so the columns are not sorted
+        assert stats.has("B", "mean", "std")
+        assert not stats.has("B", "median") and not stats.has("B", "q0.25")
+
+        config.config["data_cleaning"]["handle_missing_values"]["columns"]["A"] = {"strategy": "median"}
+        config.config["profiling"] = {"quantiles": [0.9]}
+        stats = Profiler(config).profile(df)
+        assert stats.get("B", "median") == df["B"].median()
+        assert stats.get("B", "q0.9") == df["B"].quantile(0.9)
+        assert not stats.has("B", "q0.25")
+
+    def test_write_report(self, config, df, tmp_path):
+        file_path = tmp_path / "profile.json"
+        Profiler(config).profile(df).write(str(file_path))
+        assert '"null_count": 1' in file_path.read_text()
+
+    def test_invalidate(self):
+        stats = StatsIndex({"A": {"mean": 1.0}, "B": {"mean": 2.0}})
+        stats.invalidate(["A"])
+        assert not stats.has("A", "mean")
+        assert stats.has("B", "mean")
+        stats.invalidate()
+        assert not stats.has("B", "mean")
+
+
+class TestStatsReuse:
+    """
+    A test class for the reuse of profiled statistics by the pipeline stages.
+    """
+
+    def test_cleaner_reads_stats(self, config):
+        stats = StatsIndex({"A": {"mean": 10.0, "null_count": 1}})
+        cleaner = Cleaner(config, stats=stats)
+        cleaned_data = cleaner._mean_missing(pl.DataFrame({"A": [1.0, None]}))
+        assert cleaned_data["A"].to_list() == [1.0, 10.0]
+        # The filled column was modified, so its statistics are stale
+        assert not stats.has("A", "mean")
+
+    def test_normalizer_reads_stats(self, config):
+        stats = StatsIndex({"A": {"min": 0.0, "max": 10.0}, "B": {"min": 0.0}})
+        normalizer = Normalizer(config, stats=stats)
+        normalized_result = normalizer._min_max_normalize(pl.DataFrame({"A": [1.0, 5.0]}), ["A"])
+        assert normalized_result["A"].to_list() == [0.1, 0.5]
+        assert not stats.has("A", "min")
+        assert stats.has("B", "min")
@@ -0,0 +1,84 @@
+import pytest
+import polars as pl
+import numpy as np
+from proxiflow.config import Config
+from proxiflow.core import Cleaner, Engineer, Normalizer, Sampler
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "A": [float(i) for i in range(1000)],
+            "B": ["x"] * 950 + ["y"] * 45 + ["z"] * 5,
+        }
+    )
+
+
+class TestSampler:
+    """
+    A test class for the reservoir sampling in the proxiflow library.
+    """
+
+    def test_sample(self, df, make_stage):
+        sample = make_stage(Sampler, "sampling", {"size": 100, "seed": 1}).sample(df)
+        assert sample.shape == (100, 2)
+        assert sample["A"].is_sorted()
+        assert sample.frame_equal(make_stage(Sampler, "sampling", {"size": 100, "seed": 1}).sample(df))
+        assert not sample.frame_equal(make_stage(Sampler, "sampling", {"size": 100, "seed": 2}).sample(df))
+
+    def test_batches_match_single_pass(self, df, make_stage):
+        batched = make_stage(Sampler, "sampling", {"size": 50, "seed": 3})
+        for offset in range(0, 1000, 300):
+            batched.add(df.slice(offset, 300))
+        assert batched.sample().frame_equal(make_stage(Sampler, "sampling", {"size": 50, "seed": 3}).sample(df))
+
+    def test_stratified(self, df, make_stage):
+        sample = make_stage(Sampler, "sampling", {"size": 100, "stratify_by": "B"}).sample(df)
+        counts = dict(sample.groupby("B").count().iter_rows())
+        assert counts == {"x": 95, "y": 5, "z": 1}
+
+    def test_missing_size(self, make_stage):
+        with pytest.raises(ValueError):
+            make_stage(Sampler, "sampling", {"seed": 1})
+
+
+class TestFitOnSample:
+    """
+    A test class for fitting the stage parameters on a sample and applying them to all rows.
+    """
+
+    def test_cleaner_fit(self, config):
+        cleaner = Cleaner(config)
+        cleaner.config = {
+            "handle_missing_values": {"columns": {"A": "mean", "B": "mode"}},
+            "handle_outliers": False,
+            "remove_duplicates": False,
+        }
+        cleaner.fit(pl.DataFrame({"A": [1.0, 3.0, None], "B": ["y", "y", "x"]}))
+        cleaned_data = cleaner.clean_data(pl.DataFrame({"A": [10.0, None], "B": [None, "x"]}))
+        assert cleaned_data["A"].to_list() == [10.0, 2.0]
+        assert cleaned_data["B"].to_list() == ["y", "x"]
+
+    def test_normalizer_fit(self, config):
+        normalizer = Normalizer(config)
+        normalizer.config = {"min_max": ["A"], "z_score": ["B"], "log": []}
+        normalizer.fit(pl.DataFrame({"A": [0.0, 10.0], "B": [1.0, 3.0]}))
+        normalized_data = normalizer.normalize(pl.DataFrame({"A": [5.0, 20.0], "B": [2.0, 4.0]}))
+        np.testing.assert_allclose(normalized_data["A"].to_list(), [0.5, 2.0])
+        np.testing.assert_allclose(normalized_data["B"].to_list(), [0.0, 2.0])
+
+    def test_engineer_fit(self, config):
+        engineer = Engineer(config)
+        engineer.config = {"one_hot_encoding": ["B"], "feature_scaling": {}}
+        engineer.fit(pl.DataFrame({"B": ["x", "y"]}))
+        engineered_data = engineer.execute(pl.DataFrame({"B": ["y", "z"]}))
+        assert engineered_data.columns == ["B_x", "B_y"]
+        assert engineered_data["B_y"].to_list() == [1, 0]
@@ -0,0 +1,88 @@
+import json
+import pytest
+import numpy as np
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import ExecutionPlan, Selector
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=1000)
+    return pl.DataFrame(
+        {
+            "A": a,
+            "B": a * 2 + 0.01 * rng.normal(size=1000),
+            "C": rng.normal(size=1000),
+            "D": [1.0] * 1000,
+            "E": [None] * 800 + [1.0] * 200,
+            "F": -a,
+            "K": a,
+            "S": ["x"] * 1000,
+        }
+    )
+
+
+class TestSelector:
+    """
+    A test class for the feature selection stage in the proxiflow library.
+    """
+
+    def test_filters(self, df, make_stage):
+        s = make_stage(
+            Selector,
+            "feature_selection",
+            {"max_null_ratio": 0.5, "min_variance": 0.0, "max_correlation": 0.9, "keep": ["K"]},
+        )
+        selected = s.execute(df)
+        assert selected.columns == ["A", "C", "K", "S"]
+        assert set(s.dropped) == {"B", "D", "E", "F"}
+        assert s.dropped["F"] == "correlation -1 with A"
+
+    def test_blocks(self, df, make_stage):
+        # Correlations across blocks prune the same columns as within a block
+        full = make_stage(Selector, "feature_selection", {"max_correlation": 0.9}).select(df)
+        assert make_stage(Selector, "feature_selection", {"max_correlation": 0.9, "block_size": 2}).select(df) == full
+        assert full == ["A", "C", "D", "E", "S"]
+
+    def test_pairwise_complete(self, make_stage):
+        rng = np.random.default_rng(1)
+        a = rng.normal(size=1000)
+        b = a + 0.1 * rng.normal(size=1000)
+        # Half of B is missing, filling it with the mean would halve its correlation with A
+        df = pl.DataFrame({"A": a, "B": np.where(np.arange(1000) % 2 == 0, b, np.nan), "C": rng.normal(size=1000)})
+        df = df.with_columns(pl.col("B").fill_nan(None))
+        s = make_stage(Selector, "feature_selection", {"max_correlation": 0.9, "block_size": 2})
+        assert s.select(df) == ["A", "C"]
+        present = ~np.isnan(df["B"].to_numpy())
+        expected = np.corrcoef(a[present], b[present])[0, 1]
+        assert s.dropped["B"] == f"correlation {expected:.3g} with A"
+
+    def test_fitted_selection_is_reused(self, df, tmp_path, make_stage):
+        columns_file = str(tmp_path / "features.json")
+        s = make_stage(Selector, "feature_selection", {"min_variance": 0.0, "columns_file": columns_file})
+        plan = ExecutionPlan(s.operations(df))
+        assert "D" not in plan.execute(df).columns
+        with open(columns_file) as f:
+            assert json.load(f)["columns"] == s.columns
+
+        # A later run selects the persisted columns, even if they would be dropped now
+        loaded = make_stage(Selector, "feature_selection", {"min_variance": 100.0, "columns_file": columns_file})
+        assert loaded.execute(df).columns == s.columns
+        with pytest.raises(Exception):
+            ExecutionPlan(loaded.operations(df)).execute(df.drop("A"))
+
+    def test_not_configured(self, df, make_stage):
+        assert make_stage(Selector, "feature_selection", {}).operations(df) == []
+
+    def test_invalid_threshold(self, df, make_stage):
+        with pytest.raises(ValueError):
+            make_stage(Selector, "feature_selection", {"max_correlation": 1.5}).select(df)
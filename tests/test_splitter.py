@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import Normalizer, Splitter
+from proxiflow.core.splitter import SPLIT_COLUMN
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    rows = 3000
+    return pl.DataFrame(
+        {
+            "Id": np.arange(rows),
+            "Group": np.arange(rows) // 7,
+            "Label": np.where(np.arange(rows) % 10 == 0, "rare", "common"),
+            "Value": np.arange(rows, dtype=np.float64),
+        }
+    )
+
+
+class TestSplitter:
+    """
+    A test class for the train/validation/test and k-fold splits in the proxiflow library.
+    """
+
+    def test_holdout(self, df, make_stage):
+        s = make_stage(Splitter, "split", {"fractions": {"train": 0.6, "val": 0.2, "test": 0.2}, "seed": 1})
+        [(fit_on, splits)] = list(s.split(df))
+        assert fit_on == "train"
+        assert list(splits) == ["train", "val", "test"]
+        assert sum(split.shape[0] for split in splits.values()) == df.shape[0]
+        assert splits["train"].shape[0] == pytest.approx(1800, rel=0.1)
+        # Rows keep their order, the assignment is reproducible and depends on the seed
+        assert splits["val"]["Id"].is_sorted()
+        assert s.assign(df).series_equal(s.assign(df))
+        reseeded = make_stage(Splitter, "split", {"fractions": {"train": 0.6, "val": 0.2, "test": 0.2}, "seed": 2})
+        assert not reseeded.assign(df).series_equal(s.assign(df))
+
+    def test_key(self, df, make_stage):
+        # Rows are assigned by their key, not their position
+        s = make_stage(Splitter, "split", {"key": "Id"})
+        assigned = df.with_columns(s.assign(df))
+        shuffled = df.sample(fraction=1.0, shuffle=True, seed=0)
+        assert assigned.join(shuffled.with_columns(s.assign(shuffled)), on="Id").select(
+            pl.col(SPLIT_COLUMN) == pl.col(f"{SPLIT_COLUMN}_right")
+        ).to_series().all()
+
+    def test_stratified(self, df, make_stage):
+        s = make_stage(Splitter, "split", {"fractions": {"train": 0.5, "test": 0.5}, "stratify_by": "Label"})
+        [(_, splits)] = list(s.split(df))
+        for split in splits.values():
+            assert (split["Label"] == "rare").sum() == 150
+
+    def test_grouped(self, df, make_stage):
+        s = make_stage(Splitter, "split", {"group_by": ["Group"]})
+        [(_, splits)] = list(s.split(df))
+        groups = [set(split["Group"]) for split in splits.values()]
+        assert not groups[0] & groups[1] and not groups[0] & groups[2] and not groups[1] & groups[2]
+
+    def test_kfold(self, df, make_stage):
+        s = make_stage(Splitter, "split", {"method": "kfold", "folds": 3, "stratify_by": "Label"})
+        runs = list(s.split(df))
+        assert [fit_on for fit_on, _ in runs] == ["fold0-train", "fold1-train", "fold2-train"]
+        validation = pl.concat([splits[f"fold{i}-val"] for i, (_, splits) in enumerate(runs)])
+        assert sorted(validation["Id"]) == list(range(df.shape[0]))
+        for i, (_, splits) in enumerate(runs):
+            assert splits[f"fold{i}-train"].shape[0] + splits[f"fold{i}-val"].shape[0] == df.shape[0]
+            assert (splits[f"fold{i}-val"]["Label"] == "rare").sum() == 100
+
+    def test_train_only_fit(self, df, make_stage):
+        s = make_stage(Splitter, "split", {"fractions": {"train": 0.5, "test": 0.5}})
+        [(fit_on, splits)] = list(s.split(df))
+        normalizer = make_stage(Normalizer, "data_normalization", {"min_max": ["Value"], "z_score": None, "log": None})
+        train = normalizer.fit(splits[fit_on])
+        test = normalizer.normalize(splits["test"])
+        assert train["Value"].min() == 0.0 and train["Value"].max() == 1.0
+        # The test rows are scaled with the bounds of the training rows
+        expected = (splits["test"]["Value"] - splits["train"]["Value"].min()) / (
+            splits["train"]["Value"].max() - splits["train"]["Value"].min()
+        )
+        assert test["Value"].to_list() == pytest.approx(expected.to_list())
+
+    def test_train_only_fit_group_by(self, make_stage):
+        train = pl.DataFrame({"Group": ["a", "a", "b", "b"], "Value": [0.0, 10.0, 100.0, 200.0]})
+        test = pl.DataFrame({"Group": ["b", "a", "c"], "Value": [150.0, 5.0, 1.0]})
+        normalizer = make_stage(
+            Normalizer, "data_normalization", {"min_max": ["Value"], "z_score": None, "log": None, "group_by": "Group"}
+        )
+        normalizer.fit(train)
+        # The test rows are scaled with the bounds of their group in the training rows, unseen groups are null
+        assert normalizer.normalize(test)["Value"].to_list() == [0.5, 0.5, None]
+        assert normalizer.normalize(test).columns == ["Group", "Value"]
+
+    def test_invalid(self, df, make_stage):
+        with pytest.raises(ValueError):
+            make_stage(Splitter, "split", {"fractions": {"train": 0.5, "test": 0.4}})
+        with pytest.raises(ValueError):
+            make_stage(Splitter, "split", {"method": "kfold", "folds": 1})
+        with pytest.raises(ValueError):
+            make_stage(Splitter, "split", {"stratify_by": "Label", "group_by": "Group"})
+        with pytest.raises(ValueError):
+            make_stage(Splitter, "split", {"fit_on": "holdout"})
+        with pytest.raises(ValueError):
+            make_stage(Splitter, "split", {"key": "Missing"}).assign(df)
@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+import polars as pl
+from proxiflow.utils import ConnectionPool, load_data, write_data
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "A": [1, None, 3, 4, 5],
+            "B": ["x", "y", None, "z", "w"],
+            "C": [0.5, 1.0, None, 2.0, 3.0],
+        }
+    )
+
+
+@pytest.fixture()
+def database(df, tmp_path):
+    file_path = str(tmp_path / "data.db")
+    write_data(df, file_path, "sql", options={"table": "data", "batch_size": 2})
+    return file_path
+
+
+class TestSql:
+    """
+    A test class for the SQLite input and output in the proxiflow library.
+    """
+
+    def test_write_and_read_table(self, df, database):
+        assert df.frame_equal(load_data(database, "sql", options={"table": "data"}), null_equal=True)
+
+    def test_parallel_readers(self, df, database):
+        loaded = load_data(database, "sql", options={"table": "data", "readers": 3, "batch_size": 1})
+        assert df.frame_equal(loaded, null_equal=True)
+        assert load_data(database, "sql", skip_rows=3, options={"table": "data", "readers": 2}).shape == (2, 3)
+
+    def test_query(self, database):
+        loaded = load_data(database, "sql", options={"query": 'SELECT "A", "C" FROM data WHERE "A" > 1 ORDER BY "A"'})
+        assert loaded["A"].to_list() == [3, 4, 5]
+        assert loaded.columns == ["A", "C"]
+
+    def test_skip_rows(self, database):
+        options = {"query": "SELECT * FROM data ORDER BY rowid"}
+        assert load_data(database, "sql", skip_rows=4, options=options)["B"].to_list() == ["w"]
+        assert load_data(database, "sql", skip_rows=5, options=options).shape[0] == 0
+
+    def test_append(self, df, database):
+        write_data(df, database, "sql", append=True, options={"table": "data"})
+        with sqlite3.connect(database) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM data").fetchone() == (10,)
+        write_data(df, database, "sql", options={"table": "data"})
+        with sqlite3.connect(database) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM data").fetchone() == (5,)
+
+    def test_order_by(self, database):
+        loaded = load_data(database, "sql", skip_rows=1, options={"table": "data", "order_by": ["B", "A"]})
+        # SQLite sorts nulls first
+        assert loaded["B"].to_list() == ["w", "x", "y", "z"]
+
+    def test_without_rowid(self, df, database):
+        with sqlite3.connect(database) as conn:
+            conn.execute("CREATE VIEW data_view AS SELECT * FROM data")
+            conn.execute('CREATE TABLE keyed ("K" INTEGER PRIMARY KEY, "V" TEXT) WITHOUT ROWID')
+            conn.executemany("INSERT INTO keyed VALUES (?, ?)", [(2, "b"), (1, "a")])
+        # Tables without rowids are read over one connection
+        loaded = load_data(database, "sql", options={"table": "data_view", "readers": 2})
+        assert df.frame_equal(loaded, null_equal=True)
+        loaded = load_data(database, "sql", options={"table": "keyed", "readers": 2, "order_by": "K"})
+        assert loaded["V"].to_list() == ["a", "b"]
+
+    def test_mixed_types(self, tmp_path):
+        database = str(tmp_path / "mixed.db")
+        with sqlite3.connect(database) as conn:
+            conn.execute('CREATE TABLE mixed ("A", "B", "C")')
+            conn.executemany("INSERT INTO mixed VALUES (?, ?, ?)", [(1, 1, None), (2.5, "x", None), (None, 3, 4)])
+        loaded = load_data(database, "sql", options={"table": "mixed", "batch_size": 1})
+        assert loaded["A"].to_list() == [1.0, 2.5, None]
+        assert loaded["B"].to_list() == ["1", "x", "3"]
+        assert loaded["C"].to_list() == [None, None, 4]
+
+    def test_missing_query(self, database):
+        with pytest.raises(ValueError):
+            load_data(database, "sql", options={})
+
+    def test_connection_pool(self, database):
+        with ConnectionPool(database, size=1) as pool:
+            with pool.connection() as conn:
+                first = conn
+            with pool.connection() as conn:
+                assert conn is first
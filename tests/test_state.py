@@ -0,0 +1,97 @@
+import pytest
+import polars as pl
+import numpy as np
+from proxiflow.core import IncrementalState
+from proxiflow.core.state import ColumnStats, batch_stats, merge_stats
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "A": [1, 2, None, 4, 5, 6],
+            "B": [0.5, 1.5, 2.5, 3.5, None, 10.0],
+            "C": ["x", "y", None, "x", "z", "y"],
+        }
+    )
+
+
+class TestColumnStats:
+    """
+    A test class for the mergeable running statistics in the proxiflow library.
+    """
+
+    def test_batch_stats(self, df):
+        stats = batch_stats(df)
+        assert stats["A"].count == 5
+        assert stats["A"].null_count == 1
+        assert stats["A"].min == 1.0
+        assert stats["A"].max == 6.0
+        np.testing.assert_allclose(stats["A"].mean, 3.6)
+        np.testing.assert_allclose(stats["A"].variance, np.var([1, 2, 4, 5, 6]))
+        assert stats["C"].vocabulary == ["x", "y", "z"]
+        assert stats["C"].null_count == 1
+
+    def test_merge_matches_full_pass(self, df):
+        """
+        Merging the statistics of several batches must give the same result as a single pass over all rows.
+        """
+        full = batch_stats(df)
+        merged = batch_stats(df[:2])
+        for batch in (df[2:3], df[3:5], df[5:]):
+            merged = {col: merged[col].merge(s) for col, s in batch_stats(batch).items()}
+
+        for col in ("A", "B"):
+            assert merged[col].count == full[col].count
+            assert merged[col].null_count == full[col].null_count
+            assert merged[col].min == full[col].min
+            assert merged[col].max == full[col].max
+            np.testing.assert_allclose(merged[col].mean, full[col].mean)
+            np.testing.assert_allclose(merged[col].variance, full[col].variance)
+        assert merged["C"].vocabulary == full["C"].vocabulary
+
+    def test_merge_stats(self, df):
+        merged = merge_stats([batch_stats(df[:4]), batch_stats(df[4:]), {}])
+        assert merged["A"].count == 5
+        np.testing.assert_allclose(merged["A"].variance, batch_stats(df)["A"].variance)
+        assert merged["C"].vocabulary == ["x", "y", "z"]
+        assert merge_stats([]) == {}
+
+    def test_merge_empty(self):
+        stats = ColumnStats(count=2, mean=1.5, m2=0.5, min=1.0, max=2.0)
+        merged = ColumnStats().merge(stats)
+        assert merged.to_dict() == stats.to_dict()
+
+
+class TestIncrementalState:
+    """
+    A test class for the persistent incremental state in the proxiflow library.
+    """
+
+    def test_save_and_load(self, df, tmp_path):
+        file_path = str(tmp_path / "state.json")
+        state = IncrementalState()
+        state.update("data_cleaning", df)
+        state.mark_processed("input.csv", 6)
+        state.save(file_path)
+
+        loaded = IncrementalState.load(file_path)
+        assert loaded.rows_processed("input.csv") == 6
+        assert loaded.stats("data_cleaning")["A"].to_dict() == state.stats("data_cleaning")["A"].to_dict()
+
+    def test_frozen_section(self, df):
+        state = IncrementalState()
+        state.freeze("data_cleaning", batch_stats(df))
+        state.update("data_cleaning", df)
+        assert state.stats("data_cleaning")["A"].count == 5
+
+    def test_load_missing_file(self, tmp_path):
+        state = IncrementalState.load(str(tmp_path / "missing.json"))
+        assert state.rows_processed("input.csv") == 0
+        assert state.stats("data_cleaning") == {}
+
+    def test_load_invalid_file(self, tmp_path):
+        file_path = tmp_path / "state.json"
+        file_path.write_text("not json")
+        with pytest.raises(ValueError):
+            IncrementalState.load(str(file_path))
@@ -0,0 +1,82 @@
+import pytest
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import Cleaner, Engineer, ExecutionPlan, Normalizer, Profiler, Sweep, Transformer, expand_grid
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {"A": [1.0, 2.0, None, 4.0, 5.0], "B": [4.0, 5.0, 6.0, 7.0, 8.0], "C": ["x", "y", "x", "y", "z"]}
+    )
+
+
+def run(config, df):
+    stats = Profiler(config).profile(df)
+    stages = [Cleaner(config, stats=stats), Normalizer(config, stats=stats), Engineer(config), Transformer(config)]
+    for stage in stages:
+        df = ExecutionPlan(stage.operations(df)).execute(df)
+    return df
+
+
+class TestSweep:
+    """
+    A test class for the multi-config sweep in the proxiflow library.
+    """
+
+    def test_expand_grid(self, config):
+        variants = expand_grid(config, {"data_normalization.min_max": [["A"], ["B"]], "sampling.seed": [1, 2]})
+        assert len(variants) == 4
+        assert [params for _, params in variants][1] == {"data_normalization.min_max": ["A"], "sampling.seed": 2}
+        assert variants[3][0].normalization_config["min_max"] == ["B"]
+        assert variants[3][0].sampling_config == {"seed": 2}
+        assert config.normalization_config["min_max"] is None
+        assert "sampling" not in config.config
+
+    def test_invalid_grid(self, config):
+        with pytest.raises(ValueError):
+            expand_grid(config, {"data_normalization.min_max": []})
+        with pytest.raises(ValueError):
+            expand_grid(config, {"input_format.compression": ["gzip"]})
+
+    def test_shared_prefixes(self, config):
+        grid = {"data_normalization.min_max": [["A"], ["B"]], "feature_engineering.one_hot_encoding": [[], ["C"]]}
+        sweep = Sweep({f"v{i}": variant for i, (variant, _) in enumerate(expand_grid(config, grid))})
+        assert list(sweep.groups("data_cleaning").values()) == [["v0", "v1", "v2", "v3"]]
+        assert list(sweep.groups("data_normalization").values()) == [["v0", "v1"], ["v2", "v3"]]
+        assert len(sweep.groups("feature_engineering")) == 4
+
+    def test_run_matches_single_runs(self, config, df):
+        grid = {"data_normalization.z_score": [["A"], ["B"], ["B"]]}
+        variants = {f"v{i}": variant for i, (variant, _) in enumerate(expand_grid(config, grid))}
+        results = dict(Sweep(variants).run(df, workers=2))
+        assert sorted(results) == ["v0", "v1", "v2"]
+        for name, variant in variants.items():
+            assert results[name].frame_equal(run(variant, df), null_equal=True)
+
+    def test_streams_variants(self, config, df):
+        grid = {"data_normalization.z_score": [["A"], ["B"]], "feature_engineering.one_hot_encoding": [[], ["C"]]}
+        sweep = Sweep({f"v{i}": variant for i, (variant, _) in enumerate(expand_grid(config, grid))})
+        levels = []
+        run_level = sweep._run_level
+        sweep._run_level = lambda level, names, parent: levels.append(level) or run_level(level, names, parent)
+        results = sweep.run(df, workers=1)
+        # The first variant is yielded before the other variants ran their last levels
+        name, _ = next(results)
+        assert name == "v0"
+        assert levels.count("feature_selection") == 1
+        assert levels.count("data_normalization") == 1
+        assert sorted(name for name, _ in results) == ["v1", "v2", "v3"]
+        assert levels.count("feature_selection") == 4
+
+    def test_different_inputs(self, config):
+        (csv, _), (ndjson, _) = expand_grid(config, {"input_format": ["csv", "ndjson"]})
+        with pytest.raises(ValueError):
+            Sweep({"csv": csv, "ndjson": ndjson})
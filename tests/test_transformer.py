@@ -0,0 +1,85 @@
+import pytest
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import ExecutionPlan, Transformer, get_transform, register_transform
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@register_transform("test_ratio")
+def ratio(numerator: pl.Expr, denominator: pl.Expr) -> pl.Expr:
+    return numerator / denominator
+
+
+@register_transform()
+def clip_range(column: pl.Expr, lower: float, upper: float) -> pl.Expr:
+    return column.clip(lower, upper)
+
+
+@register_transform()
+def double(column: pl.Expr) -> pl.Expr:
+    return column * 2
+
+
+@register_transform()
+def add_col(column: pl.Expr, other: str) -> pl.Expr:
+    return column + pl.col(other)
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame({"Price": [10.0, 20.0, 30.0], "Area": [2.0, 4.0, 5.0]})
+
+
+class TestTransformer:
+    """
+    A test class for the custom expression transforms in the proxiflow library.
+    """
+
+    def test_execute(self, config, df):
+        transformer = Transformer(config)
+        transformer.config = [
+            {"transform": "test_ratio", "columns": ["Price", "Area"], "output": "Price_per_Area"},
+            {"transform": "clip_range", "columns": "Area", "params": {"lower": 3.0, "upper": 4.0}},
+        ]
+        result = transformer.execute(df)
+        assert result["Price_per_Area"].to_list() == [5.0, 5.0, 6.0]
+        assert result["Area"].to_list() == [3.0, 4.0, 4.0]
+
+    def test_fused_into_one_layer(self, config, df):
+        transformer = Transformer(config)
+        transformer.config = [
+            {"transform": "test_ratio", "columns": ["Price", "Area"], "output": "A"},
+            {"transform": "clip_range", "columns": ["Price"], "output": "B", "params": {"lower": 0, "upper": 15}},
+        ]
+        plan = ExecutionPlan(transformer.operations(df))
+        assert len(plan.layers) == 1
+        assert plan.execute(df).columns == ["Price", "Area", "A", "B"]
+
+    def test_reads_from_params(self, config):
+        df = pl.DataFrame({"a": [1, 2], "b": [10, 20]})
+        transformer = Transformer(config)
+        transformer.config = [
+            {"transform": "double", "columns": "a"},
+            {"transform": "add_col", "columns": "b", "output": "s", "params": {"other": "a"}},
+        ]
+        plan = ExecutionPlan(transformer.operations(df))
+        # The column named in the params is written by the first transform, so the second runs after it
+        assert len(plan.layers) == 2
+        assert plan.execute(df)["s"].to_list() == [12, 24]
+
+    def test_import_path(self):
+        assert get_transform("math:sqrt") is get_transform("math.sqrt")
+
+    def test_invalid_transform(self, config, df):
+        with pytest.raises(ValueError):
+            get_transform("unknown_transform")
+        transformer = Transformer(config)
+        transformer.config = [{"transform": "builtins:len"}]
+        with pytest.raises(ValueError):
+            transformer.operations(df)
@@ -0,0 +1,78 @@
+import pytest
+import polars as pl
+from proxiflow.config import Config
+from proxiflow.core import Validator
+
+CONFIG_FILE_PATH = "tests/data/config.yaml"
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config(CONFIG_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pl.DataFrame(
+        {
+            "Id": [1, 2, 2, 3, 4],
+            "Name": ["a", None, "b", "a", "a"],
+            "Age": ["3", "x", "200", "3", "4"],
+            "Email": ["a@b", "c@d", "e", "f@g", None],
+        }
+    )
+
+
+class TestValidator:
+    """
+    A test class for the Validator class in the proxiflow library.
+    """
+
+    def test_rules(self, df, make_stage):
+        rules = {
+            "schema": {"Age": "int"},
+            "not_null": ["Name"],
+            "range": {"Age": {"min": 0, "max": 120}},
+            "unique": ["Id", ["Name", "Age"]],
+            "regex": {"Email": "^[^@]+@[^@]+$"},
+        }
+        v = make_stage(Validator, "validation", rules)
+        valid, quarantined = v.validate(df)
+
+        assert valid["Id"].to_list() == [1, 4]
+        assert valid.schema["Age"] == pl.Int64
+        assert quarantined["Id"].to_list() == [2, 2, 3]
+        assert quarantined["violations"].to_list() == [
+            "schema(Age); not_null(Name)",
+            "range(Age); unique(Id); regex(Email)",
+            "unique(Name, Age)",
+        ]
+        assert v.violations == {
+            "schema(Age)": 1,
+            "not_null(Name)": 1,
+            "range(Age)": 1,
+            "unique(Id)": 1,
+            "unique(Name, Age)": 1,
+            "regex(Email)": 1,
+        }
+
+    def test_counts_accumulate(self, df, make_stage):
+        v = make_stage(Validator, "validation", {"not_null": ["Email"]})
+        v.validate(df)
+        v.validate(df)
+        assert v.violations == {"not_null(Email)": 2}
+
+    def test_no_rules(self, df, make_stage):
+        valid, quarantined = make_stage(Validator, "validation", {"quarantine": "quarantine.csv"}).validate(df)
+        assert valid.frame_equal(df, null_equal=True)
+        assert quarantined.shape == (0, 5)
+
+    def test_missing_column(self, df, make_stage):
+        with pytest.raises(ValueError):
+            make_stage(Validator, "validation", {"not_null": ["Missing"]}).validate(df)
+
+    def test_invalid_rules(self, df, make_stage):
+        with pytest.raises(ValueError):
+            make_stage(Validator, "validation", {"schema": {"Age": "Decimal128x"}}).validate(df)
+        with pytest.raises(ValueError):
+            make_stage(Validator, "validation", {"range": {"Id": {}}}).validate(df)